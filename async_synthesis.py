@@ -0,0 +1,93 @@
+import io
+import os
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional
+import numpy as np
+from synthesis_engine import SynthesisEngine
+from audio_concat import write_wav
+
+class AsyncSynthesizer:
+    """asyncio front end for a SynthesisEngine.
+
+    Phonemization, rendering and cache I/O run on an executor, so the
+    event loop never blocks and one loop can serve many concurrent
+    requests. Synthesis proceeds one sentence-sized chunk per executor
+    call: cancelling the awaiting task lets the chunk in progress finish
+    and then stops, so no more than one chunk of work outlives the
+    cancellation.
+    """
+
+    def __init__(self, engine: Optional[SynthesisEngine] = None,
+                 executor: Optional[Executor] = None, max_workers: Optional[int] = None,
+                 **engine_options):
+        self.engine = engine or SynthesisEngine(**engine_options)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers or min(32, (os.cpu_count() or 1) + 4), thread_name_prefix='synthesis')
+
+    async def _run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def phonemize(self, text: str) -> List[str]:
+        """Phoneme list for text"""
+        return await self._run(self.engine.text_to_phonemes, text)
+
+    async def iter_chunks(self, text: str, max_words: int = 12, **settings) -> AsyncIterator[np.ndarray]:
+        """Yield int16 audio blocks as each chunk of text is rendered"""
+        chunks = self.engine.iter_chunks(text, max_words, **settings)
+        step = None
+        try:
+            while True:
+                step = self.executor.submit(next, chunks, None)
+                block = await asyncio.wrap_future(step)
+                step = None
+                if block is None:
+                    return
+                yield block
+        finally:
+            if step is None:
+                chunks.close()
+            else:
+                # Cancelled mid-chunk: stop the generator once that chunk is done
+                step.add_done_callback(lambda _step: chunks.close())
+
+    async def synthesize_samples(self, text: str, **settings) -> np.ndarray:
+        """Render text to mono int16 samples"""
+        blocks = [block async for block in self.iter_chunks(text, **settings)]
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+    async def synthesize(self, text: str, **settings) -> bytes:
+        """Render text to the bytes of a WAV file, using the engine's cache if any"""
+        settings = self.engine.settings(**settings)
+        cache = self.engine.cache
+        if cache is not None:
+            key = await self._run(self.engine.cache_key, text, **settings)
+            wav = await self._run(cache.get, key)
+            if wav is not None:
+                return wav
+
+        samples = await self.synthesize_samples(text, **settings)
+        buffer = io.BytesIO()
+        write_wav(buffer, samples, settings['sample_rate'])
+        wav = buffer.getvalue()
+        if cache is not None:
+            try:
+                await self._run(cache.put, key, wav)
+            except OSError as e:
+                # A full or read-only cache must not fail the request
+                print(f"Synthesis cache error: {e}")
+        return wav
+
+    def close(self):
+        """Shut down the executor if this object created it"""
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,28 @@
+import os
+import tempfile
+from typing import Iterable, Union
+
+def atomic_write(path: str, data: Union[bytes, Iterable[bytes]]):
+    """Replace path with data so readers never see a partial file.
+
+    data is bytes or an iterable of byte blocks. It is written to a
+    temporary file in the same directory (created if missing), which is
+    then renamed over path; on any error the temporary file is removed.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                out.write(data)
+            else:
+                for block in data:
+                    out.write(block)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
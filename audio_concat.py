@@ -0,0 +1,299 @@
+import time
+import wave
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+class ConcatenationEngine:
+    """Join phoneme clips and pauses into one mono 16-bit utterance.
+
+    The output length is computed before any samples are copied, so every
+    clip and pause is written straight into a single preallocated int16
+    buffer. Clips whose sample rate, width or channel count differ from
+    the target are converted with vectorised NumPy operations, and their
+    leading and trailing silence is trimmed; converted clips are cached
+    per bank version so each is prepared only once. When a PhonemeIndex
+    (see phoneme_index.py) has an up-to-date entry for a clip, its
+    precomputed trim offsets and loudness gain are applied instead of
+    analyzing the clip here.
+
+    Adjacent clips overlap by crossfade_ms with linear fades, and clip
+    edges next to pauses get a ramp of the same length, so joins do not
+    click. last_stats reports the cost of the joins for the most recent
+    utterance.
+
+    Clips named by pin() (typically the most frequent phonemes of a
+    corpus profile) are prepared up front and prepared again whenever
+    the bank or index changes, so common phonemes never wait on disk.
+    """
+
+    def __init__(self, bank, sample_rate: int = 16000, crossfade_ms: float = 8.0,
+                 trim_silence: bool = True, silence_threshold: int = 256,
+                 trim_padding_ms: float = 5.0, index=None, normalize_loudness: bool = True):
+        self.bank = bank
+        self.sample_rate = sample_rate
+        self.crossfade_ms = crossfade_ms
+        self.trim_silence = trim_silence
+        self.silence_threshold = silence_threshold
+        self.trim_padding_ms = trim_padding_ms
+        self.index = index
+        self.normalize_loudness = normalize_loudness
+        self.last_stats = {}
+        self._lock = threading.Lock()
+        self._converted = {}
+        self._converted_key = None
+        self._fades = {}
+        self.pinned = []
+        self._pinned_warm = set()
+
+    def _cache_key(self) -> tuple:
+        """Identifies the bank and index contents the clip cache was built from"""
+        return (id(self.bank), getattr(self.bank, 'version', None),
+                id(self.index), getattr(self.index, 'version', None))
+
+    def _trim_key(self) -> tuple:
+        return (self.trim_silence, self.silence_threshold, self.trim_padding_ms,
+                self.normalize_loudness)
+
+    def _clip_samples(self, phoneme: str, sample_rate: int) -> Optional[np.ndarray]:
+        """Return the clip as trimmed mono int16 samples at sample_rate"""
+        index = self.index
+        key = self._cache_key()
+        trim = self._trim_key()
+        with self._lock:
+            if key != self._converted_key:
+                self._converted = {}
+                self._converted_key = key
+            cached = self._converted.get((phoneme, sample_rate, trim))
+        if cached is not None:
+            return cached
+
+        clip = self.bank.get(phoneme)
+        if clip is None:
+            return None
+        analysis = None
+        stat = getattr(self.bank, 'file_stat', lambda _phoneme: None)(phoneme)
+        if index is not None and stat is not None:
+            analysis = index.lookup(phoneme, *stat)
+
+        pcm = clip.pcm
+        if analysis is not None and self.trim_silence:
+            frame_bytes = clip.params.sampwidth * clip.params.nchannels
+            pcm = pcm[analysis.start * frame_bytes:analysis.end * frame_bytes]
+        samples = convert_pcm(pcm, clip.params.sampwidth, clip.params.nchannels,
+                              clip.params.framerate, sample_rate)
+        if analysis is not None:
+            if self.normalize_loudness and analysis.gain != 1.0:
+                samples = np.clip(samples * analysis.gain, -32768, 32767).astype(np.int16)
+        elif self.trim_silence:
+            padding = int(sample_rate * self.trim_padding_ms / 1000)
+            start, end = find_trim_bounds(samples, self.silence_threshold, padding)
+            samples = samples[start:end]
+        with self._lock:
+            self._converted[(phoneme, sample_rate, trim)] = samples
+        return samples
+
+    def prewarm(self, phonemes: Iterable[str], sample_rate: Optional[int] = None) -> int:
+        """Load and prepare clips ahead of use; return how many are in the bank.
+
+        For banks whose clips are not held in memory (a memory-mapped
+        packed bank), prepared clips are copied so they stay resident.
+        """
+        sample_rate = int(sample_rate or self.sample_rate)
+        copy = not getattr(self.bank, 'resident', True)
+        entry_key = (sample_rate, self._trim_key())
+        count = 0
+        for phoneme in phonemes:
+            key = self._cache_key()
+            samples = self._clip_samples(phoneme, sample_rate)
+            if samples is None:
+                continue
+            count += 1
+            if copy and not samples.flags.owndata:
+                with self._lock:
+                    if self._converted_key == key:
+                        self._converted[(phoneme,) + entry_key] = samples.copy()
+        return count
+
+    def pin(self, phonemes: Iterable[str], sample_rate: Optional[int] = None) -> int:
+        """Keep these clips prepared, now and after every bank or index change.
+
+        Replaces any previously pinned list; returns how many of the
+        phonemes are in the bank.
+        """
+        self.pinned = list(dict.fromkeys(phonemes))
+        self._pinned_warm = set()
+        return self._warm_pinned(int(sample_rate or self.sample_rate))
+
+    def _warm_pinned(self, sample_rate: int) -> int:
+        """Prepare the pinned clips unless already done for this cache state"""
+        key = (self._cache_key(), sample_rate, self._trim_key())
+        if not self.pinned or key in self._pinned_warm:
+            return 0
+        count = self.prewarm(self.pinned, sample_rate)
+        self._pinned_warm = {warm for warm in self._pinned_warm if warm[0] == key[0]} | {key}
+        return count
+
+    def settings_key(self) -> Dict:
+        """Engine settings that change the rendered audio, e.g. for cache keys"""
+        if self.index is not None:
+            self.index.refresh()
+        return {
+            'crossfade_ms': self.crossfade_ms,
+            'trim_silence': self.trim_silence,
+            'silence_threshold': self.silence_threshold,
+            'trim_padding_ms': self.trim_padding_ms,
+            'normalize_loudness': self.normalize_loudness,
+            'index': self.index.fingerprint() if self.index is not None else None
+        }
+
+    def _fade(self, length: int) -> np.ndarray:
+        """Cached linear fade-in ramp of the given length"""
+        fade = self._fades.get(length)
+        if fade is None:
+            fade = (np.arange(1, length + 1, dtype=np.float32) / (length + 1))
+            self._fades[length] = fade
+        return fade
+
+    def render(self, phoneme_seq: Iterable[Tuple[str, Optional[float]]],
+               sample_rate: Optional[int] = None) -> np.ndarray:
+        """Render a (file or 'pause', pause seconds) sequence to int16 samples"""
+        started = time.perf_counter()
+        sample_rate = int(sample_rate or self.sample_rate)
+        # Pick up changed clips and index entries before using the cache
+        self.bank.refresh()
+        if self.index is not None:
+            self.index.refresh()
+        if self.pinned:
+            self._warm_pinned(sample_rate)
+        crossfade = int(sample_rate * self.crossfade_ms / 1000)
+
+        # First pass: resolve every item, lay it out and size the output.
+        # Each layout entry is (start, samples, overlap with previous clip)
+        # for a clip, or None for a pause.
+        layout = []
+        position = 0
+        previous = None
+        for item, pause in phoneme_seq:
+            if item == 'pause':
+                position += int(sample_rate * pause)
+                layout.append(None)
+                previous = None
+                continue
+            phoneme = item[:-4] if item.endswith('.wav') else item
+            samples = self._clip_samples(phoneme, sample_rate)
+            if samples is None or not len(samples):
+                continue
+            overlap = 0
+            if previous is not None:
+                overlap = min(crossfade, len(previous) // 2, len(samples) // 2)
+            start = position - overlap
+            layout.append((start, samples, overlap))
+            position = start + len(samples)
+            previous = samples
+
+        # Second pass: copy clips into place; pauses are already silent.
+        # Only the join regions are computed in floating point.
+        out = np.zeros(position, dtype=np.int16)
+        joins = 0
+        join_time = 0.0
+        last_clip = None
+        for entry in layout + [None]:
+            if entry is None:
+                # Clip edge before a pause or the end: fade out
+                if last_clip is not None and crossfade:
+                    join_started = time.perf_counter()
+                    end = last_clip[0] + len(last_clip[1])
+                    ramp = min(crossfade, len(last_clip[1]) // 2)
+                    if ramp:
+                        region = out[end - ramp:end]
+                        region[:] = region * self._fade(ramp)[::-1]
+                        joins += 1
+                    join_time += time.perf_counter() - join_started
+                last_clip = None
+                continue
+
+            start, samples, overlap = entry
+            out[start + overlap:start + len(samples)] = samples[overlap:]
+            if crossfade:
+                join_started = time.perf_counter()
+                if overlap:
+                    # Crossfade the previous clip's tail into this clip's head
+                    fade_in = self._fade(overlap)
+                    region = out[start:start + overlap]
+                    region[:] = np.clip(region * fade_in[::-1] + samples[:overlap] * fade_in,
+                                        -32768, 32767)
+                    joins += 1
+                else:
+                    # Clip edge after a pause or the start: fade in
+                    ramp = min(crossfade, len(samples) // 2)
+                    if ramp:
+                        out[start:start + ramp] = samples[:ramp] * self._fade(ramp)
+                        joins += 1
+                join_time += time.perf_counter() - join_started
+            else:
+                out[start:start + overlap] = samples[:overlap]
+            last_clip = (start, samples)
+
+        self.last_stats = {
+            'samples': len(out),
+            'clips': sum(1 for entry in layout if entry is not None),
+            'joins': joins,
+            'join_seconds': join_time,
+            'render_seconds': time.perf_counter() - started,
+            'crossfade_samples': crossfade
+        }
+        return out
+
+    def write_wav(self, phoneme_seq: Iterable[Tuple[str, Optional[float]]], out_path,
+                  sample_rate: Optional[int] = None) -> int:
+        """Render the sequence and write it as a WAV file; return frames written"""
+        sample_rate = int(sample_rate or self.sample_rate)
+        samples = self.render(phoneme_seq, sample_rate)
+        write_wav(out_path, samples, sample_rate)
+        return len(samples)
+
+def write_wav(out_path, samples: np.ndarray, sample_rate: int):
+    """Write mono int16 samples to a WAV file or file object in one pass"""
+    with wave.open(out_path, 'wb') as out_wav:
+        out_wav.setnchannels(1)
+        out_wav.setsampwidth(2)
+        out_wav.setframerate(sample_rate)
+        out_wav.writeframes(np.ascontiguousarray(samples, dtype='<i2'))
+
+def convert_pcm(pcm, sample_width: int, channels: int, source_rate: int,
+                target_rate: int) -> np.ndarray:
+    """Convert raw PCM to mono int16 at target_rate.
+
+    Already-matching 16-bit mono PCM is returned as a zero-copy view.
+    """
+    if sample_width == 2:
+        samples = np.frombuffer(pcm, dtype='<i2')
+    elif sample_width == 1:
+        samples = ((np.frombuffer(pcm, dtype=np.uint8).astype(np.int16) - 128) << 8)
+    elif sample_width == 3:
+        raw = np.frombuffer(pcm, dtype=np.uint8)
+        raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8 >> 16).astype(np.int16)
+    elif sample_width == 4:
+        samples = (np.frombuffer(pcm, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+
+    if source_rate != target_rate and len(samples):
+        length = max(1, int(round(len(samples) * target_rate / source_rate)))
+        positions = np.arange(length) * (source_rate / target_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+    return samples
+
+def find_trim_bounds(samples: np.ndarray, threshold: int, padding: int = 0) -> Tuple[int, int]:
+    """(start, end) of the samples louder than threshold, widened by padding"""
+    loud = np.flatnonzero(np.abs(samples.astype(np.int32)) > threshold)
+    if not len(loud):
+        return 0, len(samples)
+    return max(0, int(loud[0]) - padding), min(len(samples), int(loud[-1]) + 1 + padding)
@@ -0,0 +1,122 @@
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+class TaskCancelled(Exception):
+    """Raised inside a task's work function once the task is cancelled"""
+
+class BackgroundTask:
+    """Run slow work on a thread and hand its output to the UI thread.
+
+    work(task) runs on a daemon thread. It reports with task.emit(item)
+    and task.progress(done, total), and stops early when task.cancelled
+    becomes true (task.check() raises TaskCancelled for it). The UI side
+    never blocks: a poll scheduled with schedule(delay_ms, callback) -
+    root.after for Tk - drains at most batch_size emitted items per tick
+    into on_batch(items), passes the latest progress to on_progress(done,
+    total) and finally calls on_finish(task) once with task.state set to
+    'done', 'cancelled' or 'error' (task.result / task.error hold the
+    outcome). Once cancelled, no further batches are delivered.
+    """
+
+    def __init__(self, work: Callable[['BackgroundTask'], Any],
+                 schedule: Callable[[int, Callable[[], None]], Any],
+                 on_batch: Optional[Callable[[List[Any]], None]] = None,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 on_finish: Optional[Callable[['BackgroundTask'], None]] = None,
+                 batch_size: int = 500, interval_ms: int = 50):
+        self.work = work
+        self.schedule = schedule
+        self.on_batch = on_batch
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self.state = 'pending'
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._items = queue.SimpleQueue()
+        self._progress = None
+        self._reported = None
+        self._finished = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """Event that is set when the task is cancelled"""
+        return self._cancel
+
+    def start(self) -> 'BackgroundTask':
+        """Start the worker thread; call from the UI thread"""
+        self.state = 'running'
+        threading.Thread(target=self._run, daemon=True).start()
+        self.schedule(self.interval_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """Ask the work to stop; on_finish still runs, with state 'cancelled'"""
+        self._cancel.set()
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled"""
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def emit(self, item):
+        """Queue an item for on_batch (worker thread)"""
+        self._items.put(item)
+
+    def progress(self, done: int, total: int):
+        """Record progress for on_progress (worker thread)"""
+        self._progress = (done, total)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the work function has returned"""
+        return self._finished.wait(timeout)
+
+    def _run(self):
+        try:
+            self.result = self.work(self)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    def _drain(self) -> List[Any]:
+        items = []
+        while len(items) < self.batch_size:
+            try:
+                items.append(self._items.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _poll(self):
+        finished = self._finished.is_set()
+        progress = self._progress
+        if progress is not None and progress != self._reported and self.on_progress:
+            self._reported = progress
+            self.on_progress(*progress)
+
+        items = [] if self.cancelled else self._drain()
+        if items and self.on_batch:
+            self.on_batch(items)
+        if not finished or (items and not self.cancelled):
+            # Keep polling while the worker runs or emitted items remain
+            self.schedule(0 if finished else self.interval_ms, self._poll)
+            return
+
+        if self.cancelled:
+            self.state = 'cancelled'
+        elif self.error is not None:
+            self.state = 'error'
+        else:
+            self.state = 'done'
+        if self.on_finish:
+            self.on_finish(self)
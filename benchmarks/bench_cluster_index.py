@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark consonant cluster lookup cost as the rule table grows
+
+Compares the prefix-indexed matcher used by convert_token_to_phoneme
+against the previous linear scan over every cluster rule, at 30, 300
+and 3000 rules.
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+
+RULE_COUNTS = [30, 300, 3000]
+TOKEN_COUNT = 50000
+
+def build_cluster_rules(converter, count, seed=7):
+    """Generate count distinct consonant cluster rules"""
+    rng = random.Random(seed)
+    consonants = sorted(converter.sinhala_consonants)
+    diacritics = sorted(converter.sinhala_diacritics)
+    rules = dict(converter.pronunciation_rules['consonant_clusters'])
+    while len(rules) < count:
+        cluster = rng.choice(consonants) + '්' + rng.choice(consonants)
+        if rng.random() < 0.5:
+            cluster += rng.choice(diacritics)
+        rules.setdefault(cluster, 'x' + str(len(rules)) + 'a')
+    return dict(list(rules.items())[:count])
+
+def generate_tokens(converter, count, seed=11):
+    """Generate tokens from a random syllable-heavy text"""
+    rng = random.Random(seed)
+    consonants = sorted(converter.sinhala_consonants)
+    diacritics = sorted(converter.sinhala_diacritics)
+    text = []
+    for _ in range(count):
+        syllable = rng.choice(consonants)
+        if rng.random() < 0.4:
+            syllable += '්' + rng.choice(consonants)
+        if rng.random() < 0.6:
+            syllable += rng.choice(diacritics)
+        text.append(syllable)
+    return converter.tokenize_sinhala_text(''.join(text))[:count]
+
+def linear_scan(clusters, token):
+    """The previous O(#clusters) lookup"""
+    for cluster, phoneme in clusters.items():
+        if token.startswith(cluster):
+            return cluster, phoneme
+    return None
+
+def time_per_token(function, tokens, repeat=3):
+    """Best-of-repeat time per token in nanoseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for token in tokens:
+            function(token)
+        best = min(best, time.perf_counter() - start)
+    return best / len(tokens) * 1e9
+
+def main():
+    """Run the benchmark and print a table"""
+    converter = SinhalaTextToPhoneme()
+    tokens = generate_tokens(converter, TOKEN_COUNT)
+
+    print("Cluster lookup cost per token")
+    print("=" * 60)
+    print(f"{'rules':>6} {'linear ns':>12} {'indexed ns':>12} {'convert ns':>12}")
+
+    for count in RULE_COUNTS:
+        clusters = build_cluster_rules(converter, count)
+        converter.pronunciation_rules['consonant_clusters'] = clusters
+        index = converter._get_cluster_index()
+
+        for token in tokens:
+            assert index.match(token) == linear_scan(clusters, token)
+
+        linear_ns = time_per_token(lambda token: linear_scan(clusters, token), tokens)
+        indexed_ns = time_per_token(index.match, tokens)
+        convert_ns = time_per_token(converter.convert_token_to_phoneme, tokens)
+        print(f"{count:>6} {linear_ns:>12.0f} {indexed_ns:>12.0f} {convert_ns:>12.0f}")
+
+if __name__ == "__main__":
+    main()
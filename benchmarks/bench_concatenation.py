@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark utterance concatenation: time and peak memory
+
+Compares the ConcatenationEngine (one preallocated int16 buffer) with the
+previous bytes-list implementation of concatenate_audio for 10 s, 60 s
+and 10 min outputs built from a synthetic phoneme bank, then reports the
+join cost of a 60 s utterance for several crossfade lengths.
+"""
+
+import os
+import sys
+import io
+import math
+import time
+import wave
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from phoneme_bank import PhonemeAudioBank
+from audio_concat import ConcatenationEngine
+
+SAMPLE_RATE = 16000
+DURATIONS = [10, 60, 600]
+CROSSFADES_MS = [0, 4, 8, 16, 32]
+PHONEMES = ['a', 'ka', 'ma', 'na', 'tha', 'gee', 'kra', 'sii', 'pu', 'ro']
+
+def build_bank(directory):
+    """Write a tone clip (0.12-0.25 s) for each phoneme"""
+    rng = random.Random(3)
+    for index, phoneme in enumerate(PHONEMES):
+        length = int(SAMPLE_RATE * rng.uniform(0.12, 0.25))
+        t = np.arange(length) / SAMPLE_RATE
+        samples = (8000 * np.sin(2 * math.pi * (200 + 40 * index) * t)).astype('<i2')
+        with wave.open(os.path.join(directory, f"{phoneme}.wav"), 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes(samples.tobytes())
+
+def build_sequence(seconds, rng):
+    """Phoneme/pause sequence lasting roughly the given number of seconds"""
+    sequence = []
+    total = 0.0
+    while total < seconds:
+        for _ in range(rng.randint(2, 5)):
+            sequence.append((f"{rng.choice(PHONEMES)}.wav", None))
+            total += 0.19
+        sequence.append(('pause', 0.3))
+        total += 0.3
+    return sequence
+
+def legacy_concatenate(phonemes_dir, phoneme_seq, out_path, sample_rate):
+    """The previous concatenate_audio implementation"""
+    frames = []
+    params = None
+    for item, pause in phoneme_seq:
+        if item == 'pause':
+            num_samples = int(sample_rate * pause)
+            frames.append(b'\x00\x00' * num_samples)
+            if not params:
+                params = (1, 2, sample_rate, 0, 'NONE', 'not compressed')
+        else:
+            wav_path = os.path.join(phonemes_dir, item)
+            if os.path.exists(wav_path):
+                with wave.open(wav_path, 'rb') as w:
+                    if not params:
+                        params = w.getparams()
+                    frames.append(w.readframes(w.getnframes()))
+    with wave.open(out_path, 'wb') as out_wav:
+        out_wav.setparams(params)
+        out_wav.writeframes(b''.join(frames))
+
+def measure(function):
+    """Return (seconds, peak MB) for one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+def main():
+    """Run the benchmark and print a table"""
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        build_bank(tmp)
+        bank = PhonemeAudioBank(tmp, refresh_interval=None)
+        engine = ConcatenationEngine(bank, SAMPLE_RATE)
+        bank.load_all()
+
+        print("Concatenation: time and peak traced memory")
+        print("=" * 72)
+        print(f"{'output':>8} {'legacy s':>10} {'legacy MB':>10} {'engine s':>10} {'engine MB':>10} {'out MB':>8}")
+
+        for seconds in DURATIONS:
+            sequence = build_sequence(seconds, rng)
+            legacy_time, legacy_peak = measure(
+                lambda: legacy_concatenate(tmp, sequence, io.BytesIO(), SAMPLE_RATE))
+            engine_time, engine_peak = measure(
+                lambda: engine.write_wav(sequence, io.BytesIO(), SAMPLE_RATE))
+            output_mb = len(engine.render(sequence)) * 2 / 1e6
+            print(f"{seconds:>7}s {legacy_time:>10.3f} {legacy_peak:>10.1f} "
+                  f"{engine_time:>10.3f} {engine_peak:>10.1f} {output_mb:>8.1f}")
+
+        print()
+        print("Join cost for a 60 s utterance")
+        print("=" * 72)
+        print(f"{'fade ms':>8} {'joins':>8} {'join ms':>10} {'render ms':>10} {'x real time':>12}")
+        sequence = build_sequence(60, rng)
+        for crossfade_ms in CROSSFADES_MS:
+            engine.crossfade_ms = crossfade_ms
+            engine.render(sequence)
+            stats = engine.last_stats
+            realtime = stats['samples'] / SAMPLE_RATE / stats['render_seconds']
+            print(f"{crossfade_ms:>8} {stats['joins']:>8} {stats['join_seconds'] * 1000:>10.2f} "
+                  f"{stats['render_seconds'] * 1000:>10.2f} {realtime:>12.0f}")
+
+if __name__ == "__main__":
+    main()
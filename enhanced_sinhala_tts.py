@@ -3,11 +3,19 @@ from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import time
 import os
-import wave
 import pygame
 import tempfile
 import json
-from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+import queue
+from phoneme_bank import open_phoneme_bank, PACKED_BANK_EXTENSION
+from audio_concat import convert_pcm, write_wav
+from phoneme_index import build_phoneme_index
+from synthesis_cache import SynthesisCache
+from synthesis_engine import SynthesisEngine
+from text_analysis import IncrementalAnalysis, analyze_files
+from background_task import BackgroundTask
+
+PHONEME_PAGE_ROWS = 200  # Phoneme Explorer rows inserted per scroll step
 
 class EnhancedSinhalaTTS:
     def __init__(self):
@@ -17,17 +25,37 @@ class EnhancedSinhalaTTS:
         self.root.state('zoomed')  # Maximize window
         
         # Initialize components
-        self.phoneme_converter = SinhalaTextToPhoneme()
         pygame.mixer.init(frequency=16000, size=-16, channels=1)
         
         # Directories
         self.phonemes_dir = "phonemes"
         os.makedirs(self.phonemes_dir, exist_ok=True)
         
+        # Synthesis runs in a headless engine: phoneme PCM is decoded once
+        # (or memory-mapped from a packed bank file) and rendered utterances
+        # are reused when the same text and settings recur
+        self.engine = SynthesisEngine(self.phonemes_dir, cache=SynthesisCache())
+        self.phoneme_converter = self.engine.converter
+        
         # State variables
-        self.stop_requested = False
+        # Each playback gets its own stop event, so threads of a stopped
+        # playback cannot be confused with the one that replaced it
+        self.stop_event = threading.Event()
+        self.last_time_to_first_audio = None
         self.current_analysis = {}
         
+        # Per-paragraph analysis of the Linguistic Analysis text; edits only
+        # re-analyze the paragraphs they touch
+        self.analysis_model = IncrementalAnalysis()
+        self._analysis_lock = threading.Lock()
+        self._analysis_after = None
+        
+        # Slow work runs in BackgroundTasks keyed by name; starting a task
+        # cancels the previous one of the same name
+        self.tasks = {}
+        self._phoneme_rows = []
+        self._phoneme_rows_shown = 0
+        
         self.setup_ui()
         self.check_phoneme_files()
 
@@ -169,6 +197,7 @@ class EnhancedSinhalaTTS:
             font=("Noto Sans Sinhala", 12)
         )
         self.analysis_input.pack(fill=tk.BOTH, expand=True)
+        self.analysis_input.bind("<<Modified>>", self.on_analysis_text_modified)
         
         # Analysis controls
         control_frame = ttk.Frame(left_panel)
@@ -179,7 +208,14 @@ class EnhancedSinhalaTTS:
         ttk.Button(control_frame, text="📋 Copy Analysis", 
                   command=self.copy_analysis).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="💾 Save Analysis", 
-                  command=self.save_analysis).pack(side=tk.LEFT)
+                  command=self.save_analysis).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="📂 Analyze File", 
+                  command=self.analyze_text_file).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="⏹ Cancel", 
+                  command=lambda: self.cancel_task('analysis')).pack(side=tk.LEFT)
+        
+        self.analysis_status = ttk.Label(left_panel, text="")
+        self.analysis_status.pack(fill=tk.X)
         
         # Right panel - Results
         right_panel = ttk.Frame(paned)
@@ -267,11 +303,11 @@ class EnhancedSinhalaTTS:
         self.phoneme_tree.column("Status", width=100)
         
         # Scrollbar for treeview
-        phoneme_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.phoneme_tree.yview)
-        self.phoneme_tree.configure(yscrollcommand=phoneme_scrollbar.set)
+        self.phoneme_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.phoneme_tree.yview)
+        self.phoneme_tree.configure(yscrollcommand=self.on_phoneme_tree_scroll)
         
         self.phoneme_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        phoneme_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.phoneme_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Phoneme controls
         control_frame = ttk.Frame(main_container)
@@ -282,7 +318,14 @@ class EnhancedSinhalaTTS:
         ttk.Button(control_frame, text="▶ Play Selected", 
                   command=self.play_selected_phoneme).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="📊 Generate Report", 
-                  command=self.generate_phoneme_report).pack(side=tk.LEFT)
+                  command=self.generate_phoneme_report).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="⏹ Cancel", 
+                  command=self.cancel_explorer_tasks).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.explorer_progress = ttk.Progressbar(control_frame, mode="determinate", length=150)
+        self.explorer_progress.pack(side=tk.LEFT, padx=(0, 10))
+        self.explorer_status = ttk.Label(control_frame, text="")
+        self.explorer_status.pack(side=tk.LEFT)
         
         # Bind double-click to play
         self.phoneme_tree.bind("<Double-1>", lambda e: self.play_selected_phoneme())
@@ -341,6 +384,25 @@ class EnhancedSinhalaTTS:
         ttk.Checkbutton(analysis_frame, text="Show phonetic variations", 
                        variable=self.show_phonetic_var).pack(anchor=tk.W)
         
+        # Playback settings
+        playback_frame = ttk.LabelFrame(main_container, text="Playback Settings", padding=10)
+        playback_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.streaming_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(playback_frame, text="Start playback before the whole text is synthesized", 
+                       variable=self.streaming_var).pack(anchor=tk.W)
+        
+        self.trim_silence_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(playback_frame, text="Trim silence around phoneme clips", 
+                       variable=self.trim_silence_var).pack(anchor=tk.W)
+        
+        crossfade_row = ttk.Frame(playback_frame)
+        crossfade_row.pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(crossfade_row, text="Crossfade (ms):").pack(side=tk.LEFT)
+        self.crossfade_var = tk.IntVar(value=8)
+        ttk.Spinbox(crossfade_row, from_=0, to=50, width=5,
+                    textvariable=self.crossfade_var).pack(side=tk.LEFT, padx=10)
+        
         # File settings
         file_frame = ttk.LabelFrame(main_container, text="File Settings", padding=10)
         file_frame.pack(fill=tk.X, pady=(0, 10))
@@ -350,6 +412,10 @@ class EnhancedSinhalaTTS:
         ttk.Entry(file_frame, textvariable=self.phoneme_dir_var, width=40).grid(row=0, column=1, padx=10)
         ttk.Button(file_frame, text="Browse", 
                   command=self.browse_phoneme_dir).grid(row=0, column=2, padx=5)
+        ttk.Button(file_frame, text="Open Bank File", 
+                  command=self.browse_phoneme_bank).grid(row=0, column=3, padx=5)
+        ttk.Button(file_frame, text="Analyze Clips", 
+                  command=self.analyze_phoneme_clips).grid(row=1, column=1, sticky=tk.W, padx=10)
         
         # Action buttons
         action_frame = ttk.Frame(main_container)
@@ -361,91 +427,26 @@ class EnhancedSinhalaTTS:
                   command=self.reset_settings).pack(side=tk.LEFT)
 
     # Core TTS Methods
-    def text_to_phonemes_enhanced(self, text):
-        """Convert text to phonemes using the enhanced system"""
-        try:
-            phonemes = self.phoneme_converter.text_to_phonemes(text)
-            phoneme_sequence = []
-            
-            for phoneme in phonemes:
-                if phoneme == ' ':
-                    phoneme_sequence.append(('pause', self.word_pause_var.get()))
-                elif phoneme in '.,!?;:\n':
-                    phoneme_sequence.append(('pause', self.sentence_pause_var.get()))
-                else:
-                    # Look for phoneme file
-                    phoneme_file = f"{phoneme}.wav"
-                    if self.ensure_phoneme_file(phoneme_file):
-                        phoneme_sequence.append((phoneme_file, None))
-                    else:
-                        # Fallback: try to break down complex phonemes
-                        fallback_sequence = self.handle_missing_phoneme(phoneme)
-                        phoneme_sequence.extend(fallback_sequence)
-            
-            return phoneme_sequence
-        except Exception as e:
-            messagebox.showerror("Error", f"Error converting text to phonemes: {e}")
-            return []
+    def synthesis_settings(self):
+        """Per-utterance synthesis settings from the Settings tab"""
+        return {
+            'sample_rate': int(self.sample_rate_var.get()),
+            'word_pause': self.word_pause_var.get(),
+            'sentence_pause': self.sentence_pause_var.get(),
+            'speed': self.get_speed()
+        }
 
-    def ensure_phoneme_file(self, filename):
-        """Check if phoneme file exists"""
-        if not filename:
-            return False
-        path = os.path.join(self.phonemes_dir, filename)
-        return os.path.exists(path)
-
-    def handle_missing_phoneme(self, phoneme):
-        """Handle missing phoneme by breaking it down"""
-        sequence = []
-        # Try to break down complex phonemes into simpler ones
-        if len(phoneme) > 2:
-            # Try breaking into smaller parts
-            for i in range(len(phoneme)):
-                part = phoneme[i]
-                part_file = f"{part}.wav"
-                if self.ensure_phoneme_file(part_file):
-                    sequence.append((part_file, None))
-        return sequence
-
-    def concatenate_audio(self, phoneme_seq, out_path):
-        """Concatenate phoneme audio files with improved error handling"""
+    def apply_join_settings(self):
+        """Pass the crossfade and trim settings to the concatenation engine"""
         try:
-            frames = []
-            params = None
-            sample_rate = int(self.sample_rate_var.get())
-            
-            for item, pause in phoneme_seq:
-                if item == 'pause':
-                    # Add silence
-                    num_samples = int(sample_rate * pause)
-                    silence = b'\x00\x00' * num_samples
-                    frames.append(silence)
-                    if not params:
-                        params = (1, 2, sample_rate, 0, 'NONE', 'not compressed')
-                else:
-                    wav_path = os.path.join(self.phonemes_dir, item)
-                    if os.path.exists(wav_path):
-                        try:
-                            with wave.open(wav_path, 'rb') as w:
-                                if not params:
-                                    params = w.getparams()
-                                audio_data = w.readframes(w.getnframes())
-                                frames.append(audio_data)
-                        except Exception as e:
-                            print(f"Error reading {wav_path}: {e}")
-                            continue
-            
-            if not params:
-                raise Exception("No valid audio data found")
-            
-            with wave.open(out_path, 'wb') as out_wav:
-                out_wav.setparams(params)
-                out_wav.writeframes(b''.join(frames))
-            
-            return True
-        except Exception as e:
-            messagebox.showerror("Audio Error", f"Error creating audio: {e}")
-            return False 
+            self.engine.concat.crossfade_ms = max(0, int(self.crossfade_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+        self.engine.concat.trim_silence = self.trim_silence_var.get()
+
+    def get_speed(self):
+        """Playback speed as shown on the speed label"""
+        return round(self.speed_var.get(), 1)
 
     # Event Handlers
     def on_speak(self):
@@ -458,11 +459,17 @@ class EnhancedSinhalaTTS:
         # Update preview
         self.update_preview(text)
         
-        # Convert to phonemes
-        phoneme_seq = self.text_to_phonemes_enhanced(text)
-        if not phoneme_seq:
-            messagebox.showwarning("Warning", "No valid phonemes found in the text.")
-            return
+        stop_event = threading.Event()
+        self.stop_event = stop_event
+        self.apply_join_settings()
+        settings = self.synthesis_settings()
+        if self.streaming_var.get() and not self.engine.is_cached(text, **settings):
+            # Synthesis happens chunk by chunk on the playback threads
+            target = self._stream_audio_sequence
+        else:
+            # Render the whole utterance (or reuse a cached render) first
+            target = self._play_audio_sequence
+        args = (text, settings, stop_event)
         
         # Update UI state
         self.speak_btn.config(state=tk.DISABLED)
@@ -471,12 +478,13 @@ class EnhancedSinhalaTTS:
         self.status_label.config(text="Generating audio...")
         
         # Start playback in thread
-        threading.Thread(target=self._play_audio_sequence, args=(phoneme_seq,), daemon=True).start()
+        threading.Thread(target=target, args=args, daemon=True).start()
 
     def on_stop(self):
         """Handle stop button click"""
-        self.stop_requested = True
+        self.stop_event.set()
         pygame.mixer.music.stop()
+        pygame.mixer.stop()
         self._on_playback_finish()
 
     def clear_text(self):
@@ -516,9 +524,18 @@ class EnhancedSinhalaTTS:
         )
         
         if filename:
-            phoneme_seq = self.text_to_phonemes_enhanced(text)
-            if self.concatenate_audio(phoneme_seq, filename):
-                messagebox.showinfo("Success", f"Audio saved to {filename}")
+            self.apply_join_settings()
+            settings = self.synthesis_settings()
+            try:
+                samples = self.engine.synthesize(text, **settings)
+                if not len(samples):
+                    messagebox.showwarning("Warning", "No valid phonemes found in the text.")
+                    return
+                write_wav(filename, samples, settings['sample_rate'])
+            except Exception as e:
+                messagebox.showerror("Audio Error", f"Error creating audio: {e}")
+                return
+            messagebox.showinfo("Success", f"Audio saved to {filename}")
 
     def update_speed_label(self, *args):
         """Update the speed label"""
@@ -536,35 +553,35 @@ class EnhancedSinhalaTTS:
         except Exception as e:
             print(f"Preview error: {e}")
 
-    def _play_audio_sequence(self, phoneme_seq):
-        """Play the audio sequence in a separate thread"""
+    def _play_audio_sequence(self, text, settings, stop_event):
+        """Render the text, then play it in a separate thread"""
         try:
+            # Generate audio (time-stretched to the requested speed)
+            samples = self.engine.synthesize(text, **settings)
+            if not len(samples):
+                raise ValueError("No valid phonemes found in the text.")
+            
             # Create temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
                 tmp_path = tmp_file.name
+            write_wav(tmp_path, samples, settings['sample_rate'])
             
-            # Generate audio
-            if self.concatenate_audio(phoneme_seq, tmp_path):
-                # Load and play
-                pygame.mixer.music.load(tmp_path)
-                
-                # Apply speed if needed
-                speed = self.speed_var.get()
-                if speed != 1.0:
-                    # For speed adjustment, we'd need more complex audio processing
-                    # For now, just play at normal speed
-                    pass
-                
-                pygame.mixer.music.play()
-                
-                self.root.after(0, lambda: self.status_label.config(text="Playing..."))
-                
-                # Wait for playback to finish
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                    if self.stop_requested:
-                        pygame.mixer.music.stop()
-                        break
+            # Load and play
+            pygame.mixer.music.load(tmp_path)
+            pygame.mixer.music.play()
+            
+            stats = self.engine.last_stats
+            if stats.get('cached'):
+                hit_rate = self.engine.cache.info()['hit_rate']
+                status = f"Playing... (cached, {hit_rate:.0%} cache hit rate)"
+            else:
+                status = (f"Playing... ({stats.get('joins', 0)} joins, "
+                          f"{stats.get('join_seconds', 0.0) * 1000:.1f} ms)")
+            self.root.after(0, lambda: self.status_label.config(text=status))
+            
+            # Wait for playback to finish (on_stop has already stopped the mixer)
+            while pygame.mixer.music.get_busy() and not stop_event.is_set():
+                time.sleep(0.1)
             
             # Cleanup
             try:
@@ -575,88 +592,213 @@ class EnhancedSinhalaTTS:
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Playback Error", f"Error during playback: {e}"))
         finally:
-            self.root.after(0, self._on_playback_finish)
+            self.root.after(0, lambda: self._on_playback_finish(stop_event))
+
+    def _stream_audio_sequence(self, text, settings, stop_event):
+        """Synthesize text chunk by chunk and play each chunk as it is ready.
+        
+        A producer thread renders sentence-sized chunks into a bounded
+        queue; this thread feeds them to a mixer channel, starting on the
+        first chunk. stop_event cancels both sides.
+        """
+        # Render straight at the mixer's rate so chunks play unconverted
+        settings = dict(settings, sample_rate=pygame.mixer.get_init()[0])
+        chunks = queue.Queue(maxsize=4)
+        done = object()
+        started = time.perf_counter()
+        
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for samples in self.engine.iter_chunks(text, **settings):
+                    if stop_event.is_set() or not put(samples):
+                        break
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        
+        try:
+            channel = pygame.mixer.find_channel(True)
+            playing = []  # keep queued sounds alive until they finish
+            finished = False
+            first_audio = True
+            
+            while not stop_event.is_set():
+                if finished:
+                    if not channel.get_busy():
+                        break
+                    time.sleep(0.05)
+                    continue
+                if channel.get_queue() is not None:
+                    time.sleep(0.02)
+                    continue
+                
+                try:
+                    item = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is done:
+                    finished = True
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                
+                sound = pygame.mixer.Sound(buffer=item)
+                playing = playing[-1:] + [sound]
+                if channel.get_busy():
+                    channel.queue(sound)
+                else:
+                    channel.play(sound)
+                
+                if first_audio:
+                    first_audio = False
+                    ttfa = time.perf_counter() - started
+                    self.last_time_to_first_audio = ttfa
+                    self.root.after(0, lambda: self.status_label.config(
+                        text=f"Playing... (first audio after {ttfa * 1000:.0f} ms)"))
+            
+            if not stop_event.is_set():
+                # When stopped, on_stop has already silenced the mixer, and this
+                # channel may now belong to the next playback
+                channel.stop()
+        except Exception as e:
+            stop_event.set()
+            self.root.after(0, lambda: messagebox.showerror("Playback Error", f"Error during playback: {e}"))
+        finally:
+            self.root.after(0, lambda: self._on_playback_finish(stop_event))
 
-    def _on_playback_finish(self):
-        """Clean up after playback finishes"""
-        self.stop_requested = False
+    def _on_playback_finish(self, stop_event=None):
+        """Clean up after playback finishes.
+        
+        Threads pass their playback's stop_event; once a newer playback
+        has started, the threads of the old one leave the UI alone.
+        """
+        if stop_event is not None and stop_event is not self.stop_event:
+            return
         self.progress.stop()
         self.speak_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.status_label.config(text="Ready to speak...")
 
     # Analysis Methods
+    def on_analysis_text_modified(self, event=None):
+        """Re-analyze shortly after the analysis text stops changing"""
+        if not self.analysis_input.edit_modified():
+            return
+        self.analysis_input.edit_modified(False)
+        if self._analysis_after is not None:
+            self.root.after_cancel(self._analysis_after)
+        self._analysis_after = self.root.after(400, self.perform_analysis)
+
     def perform_analysis(self):
-        """Perform comprehensive linguistic analysis"""
+        """Analyze the text in the background and show the results in batches"""
+        self._analysis_after = None
         text = self.analysis_input.get("1.0", tk.END).strip()
         if not text:
             return
-        
-        try:
-            # Perform analysis
-            analysis_results = self.analyze_text_comprehensive(text)
-            
-            # Update analysis tabs
-            self.update_phoneme_analysis(analysis_results)
-            self.update_tokenization_analysis(analysis_results)
-            self.update_statistics_analysis(analysis_results)
-            
-        except Exception as e:
-            messagebox.showerror("Analysis Error", f"Error during analysis: {e}")
-
-    def analyze_text_comprehensive(self, text):
-        """Perform comprehensive text analysis"""
-        results = {
-            'original_text': text,
-            'words': text.split(),
-            'characters': list(text),
-            'phonemes': [],
-            'tokens': [],
-            'clusters': [],
-            'statistics': {}
+        # Tk variables are read here; the worker only sees plain values
+        options = {
+            'show_phonetic': self.show_phonetic_var.get(),
+            'show_clusters': self.show_clusters_var.get(),
+            'show_diacritics': self.show_diacritics_var.get()
         }
         
-        # Tokenization
-        for word in results['words']:
-            if word.strip():
-                tokens = self.phoneme_converter.tokenize_sinhala_text(word)
-                results['tokens'].extend(tokens)
-        
-        # Phoneme conversion
-        results['phonemes'] = self.phoneme_converter.text_to_phonemes(text)
-        
-        # Find consonant clusters
-        for token in results['tokens']:
-            if len(token) > 2 and '්' in token:
-                results['clusters'].append(token)
-        
-        # Statistics
-        results['statistics'] = {
-            'total_characters': len(text),
-            'total_words': len(results['words']),
-            'total_phonemes': len(results['phonemes']),
-            'total_tokens': len(results['tokens']),
-            'consonant_clusters': len(results['clusters']),
-            'unique_phonemes': len(set(results['phonemes'])),
-            'character_frequency': self.calculate_frequency(results['characters']),
-            'phoneme_frequency': self.calculate_frequency(results['phonemes'])
-        }
+        def work(task):
+            analysis = self.analyze_text_comprehensive(text, task.progress, task.cancel_event)
+            task.check()
+            self.emit_analysis_text(task, 'phonemes', self.format_phoneme_analysis(analysis, options))
+            self.emit_analysis_text(task, 'tokens', self.format_tokenization_analysis(analysis, options))
+            self.emit_analysis_text(task, 'statistics', self.format_statistics_analysis(analysis))
+            return analysis
         
-        return results
+        self.start_analysis_task(work, "paragraphs")
 
-    def calculate_frequency(self, items):
-        """Calculate frequency of items"""
-        frequency = {}
-        for item in items:
-            if item.strip():
-                frequency[item] = frequency.get(item, 0) + 1
-        return dict(sorted(frequency.items(), key=lambda x: x[1], reverse=True))
+    def analyze_text_file(self):
+        """Show statistics of a text file too large to paste into the editor"""
+        filename = filedialog.askopenfilename(
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        
+        def work(task):
+            # The task already keeps this off the Tk thread; a process pool
+            # would relaunch the frozen app once per worker on Windows
+            statistics = analyze_files([filename], workers=1, progress=task.progress,
+                                       cancel=task.cancel_event)
+            task.check()
+            analysis = {'statistics': statistics.statistics()}
+            self.emit_analysis_text(task, 'statistics', self.format_statistics_analysis(analysis))
+            return analysis
+        
+        self.start_analysis_task(work, f"parts of {os.path.basename(filename)}")
 
-    def update_phoneme_analysis(self, analysis):
-        """Update the phoneme analysis tab"""
-        self.phoneme_result.config(state=tk.NORMAL)
-        self.phoneme_result.delete("1.0", tk.END)
+    def start_analysis_task(self, work, unit):
+        """Run an analysis task, filling each result tab as its text arrives"""
+        widgets = {'phonemes': self.phoneme_result, 'tokens': self.token_result,
+                   'statistics': self.stats_result}
+        cleared = set()
+        
+        def show_batch(chunks):
+            for name, chunk in chunks:
+                widget = widgets[name]
+                widget.config(state=tk.NORMAL)
+                if name not in cleared:
+                    # Old results stay visible until their replacement arrives
+                    cleared.add(name)
+                    widget.delete("1.0", tk.END)
+                widget.insert(tk.END, chunk)
+                widget.config(state=tk.DISABLED)
+        
+        def show_progress(done, total):
+            self.analysis_status.config(text=f"Analyzing... {done:,} of {total:,} {unit}")
+        
+        def finish(task):
+            if task.state == 'done':
+                self.current_analysis = task.result
+                words = task.result['statistics']['total_words']
+                self.analysis_status.config(text=f"Analyzed {words:,} words")
+            elif task.state == 'cancelled':
+                self.analysis_status.config(text="Analysis cancelled")
+            else:
+                self.analysis_status.config(text="")
+                messagebox.showerror("Analysis Error", f"Error during analysis: {task.error}")
         
+        self.analysis_status.config(text="Analyzing...")
+        self.run_task('analysis', work, on_batch=show_batch, on_progress=show_progress,
+                      on_finish=finish, batch_size=8)
+
+    @staticmethod
+    def emit_analysis_text(task, name, content, chunk_size=16384):
+        """Send a result tab's text to the UI thread in pieces"""
+        for start in range(0, len(content), chunk_size):
+            task.check()
+            task.emit((name, content[start:start + chunk_size]))
+
+    def analyze_text_comprehensive(self, text, progress=None, cancel=None):
+        """Perform comprehensive text analysis, reusing unchanged paragraphs.
+        
+        Safe to call from a worker thread. Returns None if cancel is set
+        before the analysis completes.
+        """
+        with self._analysis_lock:
+            if self.analysis_model.update(text, progress, cancel) is None:
+                return None
+            return self.analysis_model.results()
+
+    def format_phoneme_analysis(self, analysis, options):
+        """Text of the phoneme analysis tab"""
         content = "PHONEME BREAKDOWN ANALYSIS\n"
         content += "=" * 50 + "\n\n"
         
@@ -668,53 +810,32 @@ class EnhancedSinhalaTTS:
         content += "Phoneme String:\n"
         content += "".join(analysis['phonemes']) + "\n\n"
         
-        if self.show_phonetic_var.get():
+        if options['show_phonetic']:
             content += "Phoneme Frequency:\n"
-            for phoneme, count in list(analysis['statistics']['phoneme_frequency'].items())[:20]:
+            for phoneme, count in analysis['statistics']['phoneme_frequency'].most_common(20):
                 content += f"  {phoneme}: {count} times\n"
-        
-        self.phoneme_result.insert("1.0", content)
-        self.phoneme_result.config(state=tk.DISABLED)
+        return content
 
-    def update_tokenization_analysis(self, analysis):
-        """Update the tokenization analysis tab"""
-        self.token_result.config(state=tk.NORMAL)
-        self.token_result.delete("1.0", tk.END)
-        
-        content = "TOKENIZATION ANALYSIS\n"
-        content += "=" * 50 + "\n\n"
-        
-        content += "Word Breakdown:\n"
-        for i, word in enumerate(analysis['words']):
-            if word.strip():
-                tokens = self.phoneme_converter.tokenize_sinhala_text(word)
-                content += f"{i+1}. '{word}' → {tokens}\n"
-        
-        content += "\nAll Tokens:\n"
-        content += str(analysis['tokens']) + "\n\n"
-        
-        if self.show_clusters_var.get() and analysis['clusters']:
-            content += "Consonant Clusters Found:\n"
-            for cluster in analysis['clusters']:
-                content += f"  {cluster}\n"
-        
-        if self.show_diacritics_var.get():
-            content += "\nDiacritic Analysis:\n"
-            diacritics = [char for char in analysis['characters'] 
-                         if char in self.phoneme_converter.sinhala_diacritics]
-            if diacritics:
-                diacritic_freq = self.calculate_frequency(diacritics)
-                for diacritic, count in diacritic_freq.items():
-                    content += f"  {diacritic}: {count} times\n"
-        
-        self.token_result.insert("1.0", content)
-        self.token_result.config(state=tk.DISABLED)
-
-    def update_statistics_analysis(self, analysis):
-        """Update the statistics analysis tab"""
-        self.stats_result.config(state=tk.NORMAL)
-        self.stats_result.delete("1.0", tk.END)
-        
+    def format_tokenization_analysis(self, analysis, options):
+        """Text of the tokenization analysis tab"""
+        lines = ["TOKENIZATION ANALYSIS", "=" * 50, "", "Word Breakdown:"]
+        for i, (word, tokens) in enumerate(analysis['word_tokens']):
+            lines.append(f"{i+1}. '{word}' → {list(tokens)}")
+        
+        lines += ["", "All Tokens:", str(analysis['tokens']), ""]
+        
+        if options['show_clusters'] and analysis['clusters']:
+            lines.append("Consonant Clusters Found:")
+            lines += [f"  {cluster}" for cluster in analysis['clusters']]
+        
+        if options['show_diacritics']:
+            lines += ["", "Diacritic Analysis:"]
+            for diacritic, count in analysis['statistics']['diacritic_frequency'].most_common():
+                lines.append(f"  {diacritic}: {count} times")
+        return "\n".join(lines) + "\n"
+
+    def format_statistics_analysis(self, analysis):
+        """Text of the statistics analysis tab"""
         stats = analysis['statistics']
         
         content = "STATISTICAL ANALYSIS\n"
@@ -729,48 +850,111 @@ class EnhancedSinhalaTTS:
         content += f"  Unique Phonemes: {stats['unique_phonemes']}\n\n"
         
         content += "Character Frequency (Top 20):\n"
-        for char, count in list(stats['character_frequency'].items())[:20]:
-            if char.strip():
-                content += f"  '{char}': {count} times\n"
+        for char, count in stats['character_frequency'].most_common(20):
+            content += f"  '{char}': {count} times\n"
         
         content += "\nPhoneme Coverage Analysis:\n"
         # Check which phonemes are available as audio files
-        available_phonemes = self.get_available_phonemes()
-        used_phonemes = set(analysis['phonemes'])
+        used_phonemes = set(stats['phoneme_frequency'])
+        missing_phonemes = {phoneme for phoneme in used_phonemes if not self.engine.has_phoneme(phoneme)}
         
-        coverage = len(used_phonemes.intersection(available_phonemes)) / len(used_phonemes) * 100 if used_phonemes else 0
+        coverage = (len(used_phonemes) - len(missing_phonemes)) / len(used_phonemes) * 100 if used_phonemes else 0
         content += f"  Audio Coverage: {coverage:.1f}%\n"
         
-        missing_phonemes = used_phonemes - available_phonemes
         if missing_phonemes:
             content += f"  Missing Audio Files: {sorted(missing_phonemes)}\n"
-        
-        self.stats_result.insert("1.0", content)
-        self.stats_result.config(state=tk.DISABLED)
+        return content
+
+    # Background Tasks
+    def run_task(self, name, work, on_finish=None, **callbacks):
+        """Start work as a BackgroundTask, cancelling the running task of that name"""
+        self.cancel_task(name)
+        
+        def finish(task):
+            if self.tasks.get(name) is task:
+                del self.tasks[name]
+            if on_finish:
+                on_finish(task)
+        
+        task = BackgroundTask(work, self.root.after, on_finish=finish, **callbacks)
+        self.tasks[name] = task
+        return task.start()
+
+    def cancel_task(self, name):
+        """Cancel the running task of that name, if any"""
+        task = self.tasks.get(name)
+        if task is not None:
+            task.cancel()
 
     # Phoneme Explorer Methods
     def refresh_phoneme_list(self):
-        """Refresh the phoneme list in the explorer"""
-        # Clear existing items
-        for item in self.phoneme_tree.get_children():
-            self.phoneme_tree.delete(item)
-        
-        # Get available phoneme files
-        if os.path.exists(self.phonemes_dir):
-            files = [f for f in os.listdir(self.phonemes_dir) if f.endswith('.wav')]
-            
-            for filename in sorted(files):
-                phoneme = filename[:-4]  # Remove .wav extension
-                filepath = os.path.join(self.phonemes_dir, filename)
-                
-                # Check file size to determine status
-                try:
-                    size = os.path.getsize(filepath)
-                    status = "Available" if size > 0 else "Empty"
-                except:
+        """Refresh the phoneme list in the explorer from a background scan"""
+        self.phoneme_tree.delete(*self.phoneme_tree.get_children())
+        self._phoneme_rows = []
+        self._phoneme_rows_shown = 0
+        bank = self.engine.bank
+        
+        def work(task):
+            phonemes = bank.phonemes()
+            for i, phoneme in enumerate(phonemes):
+                if i % 200 == 0:
+                    task.check()
+                    task.progress(i, len(phonemes))
+                # Check clip size to determine status
+                size = bank.file_size(phoneme)
+                if size is None:
                     status = "Error"
-                
-                self.phoneme_tree.insert("", tk.END, values=(phoneme, filename, status))
+                else:
+                    status = "Available" if size > 0 else "Empty"
+                task.emit((phoneme, f"{phoneme}.wav", status))
+            task.progress(len(phonemes), len(phonemes))
+            return len(phonemes)
+        
+        def add_rows(rows):
+            self._phoneme_rows.extend(rows)
+            if self._phoneme_rows_shown < PHONEME_PAGE_ROWS:
+                self.show_more_phonemes()
+        
+        def finish(task):
+            self.finish_explorer_task(task, f"{len(self._phoneme_rows):,} phonemes")
+        
+        self.explorer_status.config(text="Scanning phonemes...")
+        self.run_task('explorer', work, on_batch=add_rows,
+                      on_progress=self.show_explorer_progress, on_finish=finish)
+
+    def show_more_phonemes(self):
+        """Insert the next page of scanned rows into the explorer"""
+        rows = self._phoneme_rows[self._phoneme_rows_shown:self._phoneme_rows_shown + PHONEME_PAGE_ROWS]
+        for row in rows:
+            self.phoneme_tree.insert("", tk.END, values=row)
+        self._phoneme_rows_shown += len(rows)
+
+    def on_phoneme_tree_scroll(self, first, last):
+        """Update the scrollbar; insert more rows as the end comes into view"""
+        self.phoneme_scrollbar.set(first, last)
+        if float(last) > 0.9 and self._phoneme_rows_shown < len(self._phoneme_rows):
+            # Inserting from the scroll callback itself would re-enter it
+            self.root.after_idle(self.show_more_phonemes)
+
+    def show_explorer_progress(self, done, total):
+        """Show a Phoneme Explorer task's progress"""
+        self.explorer_progress.config(maximum=max(total, 1), value=done)
+        self.explorer_status.config(text=f"{done:,} of {total:,} phonemes")
+
+    def finish_explorer_task(self, task, summary):
+        """Report how a Phoneme Explorer task ended"""
+        if task.state == 'done':
+            self.explorer_status.config(text=summary)
+        elif task.state == 'cancelled':
+            self.explorer_status.config(text="Cancelled")
+        else:
+            self.explorer_status.config(text="")
+            messagebox.showerror("Error", f"Error reading phonemes: {task.error}")
+
+    def cancel_explorer_tasks(self):
+        """Cancel the explorer's phoneme scan and report generation"""
+        self.cancel_task('explorer')
+        self.cancel_task('report')
 
     def play_selected_phoneme(self):
         """Play the selected phoneme"""
@@ -780,46 +964,79 @@ class EnhancedSinhalaTTS:
             return
         
         item = self.phoneme_tree.item(selection[0])
+        phoneme = str(item['values'][0])
         filename = item['values'][1]
-        filepath = os.path.join(self.phonemes_dir, filename)
+        clip = self.engine.bank.get(phoneme)
         
-        if os.path.exists(filepath):
+        if clip is not None:
             try:
-                pygame.mixer.music.load(filepath)
-                pygame.mixer.music.play()
+                # Clips keep their own format; the mixer expects its own
+                rate, _size, channels = pygame.mixer.get_init()
+                params = clip.params
+                samples = convert_pcm(clip.pcm, params.sampwidth, params.nchannels,
+                                      params.framerate, rate)
+                pygame.mixer.Sound(buffer=samples.repeat(channels).tobytes()).play()
             except Exception as e:
                 messagebox.showerror("Playback Error", f"Error playing {filename}: {e}")
         else:
             messagebox.showerror("File Error", f"File not found: {filename}")
 
     def generate_phoneme_report(self):
-        """Generate a comprehensive phoneme report"""
-        report_data = {
-            'total_phonemes': 0,
-            'available_phonemes': 0,
-            'missing_phonemes': [],
-            'file_sizes': {},
-            'status_summary': {}
-        }
-        
-        if os.path.exists(self.phonemes_dir):
-            files = [f for f in os.listdir(self.phonemes_dir) if f.endswith('.wav')]
-            report_data['total_phonemes'] = len(files)
+        """Generate a comprehensive phoneme report in the background"""
+        bank = self.engine.bank
+        
+        def work(task):
+            report_data = {
+                'total_phonemes': 0,
+                'available_phonemes': 0,
+                'missing_phonemes': [],
+                'file_sizes': {},
+                'status_summary': {}
+            }
             
-            for filename in files:
-                filepath = os.path.join(self.phonemes_dir, filename)
-                try:
-                    size = os.path.getsize(filepath)
-                    report_data['file_sizes'][filename] = size
-                    if size > 0:
-                        report_data['available_phonemes'] += 1
-                except:
+            phonemes = bank.phonemes()
+            report_data['total_phonemes'] = len(phonemes)
+            
+            for i, phoneme in enumerate(phonemes):
+                if i % 200 == 0:
+                    task.check()
+                    task.progress(i, len(phonemes))
+                filename = f"{phoneme}.wav"
+                size = bank.file_size(phoneme)
+                if size is None:
                     report_data['missing_phonemes'].append(filename)
+                    continue
+                report_data['file_sizes'][filename] = size
+                if size > 0:
+                    report_data['available_phonemes'] += 1
+            task.progress(len(phonemes), len(phonemes))
+            return self.format_phoneme_report(report_data)
+        
+        def finish(task):
+            self.finish_explorer_task(task, "Report ready")
+            if task.state == 'done':
+                # Show report in a new window
+                self.show_phoneme_report(task.result)
+        
+        self.explorer_status.config(text="Generating report...")
+        self.run_task('report', work, on_progress=self.show_explorer_progress, on_finish=finish)
+
+    def format_phoneme_report(self, report_data):
+        """Text of the phoneme report"""
+        lines = ["PHONEME SYSTEM REPORT", "=" * 40, "",
+                 f"Total Phoneme Files: {report_data['total_phonemes']}",
+                 f"Available Files: {report_data['available_phonemes']}",
+                 f"Missing/Empty Files: {len(report_data['missing_phonemes'])}", ""]
+        
+        if report_data['missing_phonemes']:
+            lines.append("Missing Files:")
+            lines += [f"  {filename}" for filename in report_data['missing_phonemes']]
         
-        # Show report in a new window
-        self.show_phoneme_report(report_data)
+        lines += ["", "File Sizes:"]
+        lines += [f"  {filename}: {size} bytes" for filename, size in sorted(report_data['file_sizes'].items())]
+        return "\n".join(lines) + "\n"
 
-    def show_phoneme_report(self, report_data):
+    def show_phoneme_report(self, content):
         """Show phoneme report in a new window"""
         report_window = tk.Toplevel(self.root)
         report_window.title("Phoneme Report")
@@ -828,34 +1045,13 @@ class EnhancedSinhalaTTS:
         report_text = scrolledtext.ScrolledText(report_window, font=("Consolas", 10))
         report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        content = "PHONEME SYSTEM REPORT\n"
-        content += "=" * 40 + "\n\n"
-        content += f"Total Phoneme Files: {report_data['total_phonemes']}\n"
-        content += f"Available Files: {report_data['available_phonemes']}\n"
-        content += f"Missing/Empty Files: {len(report_data['missing_phonemes'])}\n\n"
-        
-        if report_data['missing_phonemes']:
-            content += "Missing Files:\n"
-            for filename in report_data['missing_phonemes']:
-                content += f"  {filename}\n"
-        
-        content += "\nFile Sizes:\n"
-        for filename, size in sorted(report_data['file_sizes'].items()):
-            content += f"  {filename}: {size} bytes\n"
-        
         report_text.insert("1.0", content)
         report_text.config(state=tk.DISABLED)
 
     # Utility Methods
     def get_available_phonemes(self):
         """Get list of available phoneme audio files"""
-        available = set()
-        if os.path.exists(self.phonemes_dir):
-            files = [f for f in os.listdir(self.phonemes_dir) if f.endswith('.wav')]
-            for filename in files:
-                phoneme = filename[:-4]  # Remove .wav extension
-                available.add(phoneme)
-        return available
+        return set(self.engine.bank.phonemes())
 
     def check_phoneme_files(self):
         """Check if phoneme files exist and update UI accordingly"""
@@ -863,20 +1059,67 @@ class EnhancedSinhalaTTS:
             self.status_label.config(text="Phonemes directory not found!")
             return
         
-        files = [f for f in os.listdir(self.phonemes_dir) if f.endswith('.wav')]
-        if not files:
+        count = len(self.engine.bank)
+        if not count:
             self.status_label.config(text="No phoneme files found! Please generate phonemes first.")
         else:
-            self.status_label.config(text=f"Ready to speak... ({len(files)} phonemes loaded)")
+            self.status_label.config(text=f"Ready to speak... ({count} phonemes loaded)")
 
     # Settings Methods
     def browse_phoneme_dir(self):
         """Browse for phonemes directory"""
         directory = filedialog.askdirectory(initialdir=self.phonemes_dir)
         if directory:
+            self.cancel_task('clips')
             self.phoneme_dir_var.set(directory)
             self.phonemes_dir = directory
+            self.engine.set_bank(self.phonemes_dir)
+            self.check_phoneme_files()
+            self.refresh_phoneme_list()
+
+    def browse_phoneme_bank(self):
+        """Browse for a packed phoneme bank file"""
+        filename = filedialog.askopenfilename(
+            filetypes=[("Phoneme banks", f"*{PACKED_BANK_EXTENSION}"), ("All files", "*.*")]
+        )
+        if filename:
+            try:
+                bank = open_phoneme_bank(filename)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error opening phoneme bank: {e}")
+                return
+            self.cancel_task('clips')
+            self.phoneme_dir_var.set(filename)
+            self.phonemes_dir = filename
+            self.engine.set_bank(bank)
+            self.check_phoneme_files()
+            self.refresh_phoneme_list()
+
+    def analyze_phoneme_clips(self):
+        """Update the trim/loudness index of the phonemes directory in the background"""
+        phonemes_dir = self.phonemes_dir
+        if not os.path.isdir(phonemes_dir):
+            messagebox.showwarning("Warning", "Clip analysis needs a phonemes directory.")
+            return
+        
+        def work(task):
+            return build_phoneme_index(phonemes_dir, progress=task.progress, cancel=task.cancel_event)
+        
+        def show_progress(done, total):
+            self.status_label.config(text=f"Analyzing clips... {done:,} of {total:,}")
+        
+        def finish(task):
             self.check_phoneme_files()
+            if task.state == 'error':
+                messagebox.showerror("Error", f"Error analyzing clips: {task.error}")
+            elif task.state == 'done' and task.result is not None:
+                index, stats = task.result
+                self.engine.concat.index = index
+                messagebox.showinfo("Success", f"Indexed {len(index)} clips "
+                                    f"({stats['analyzed']} analyzed, {stats['reused']} unchanged).")
+        
+        self.status_label.config(text="Analyzing clips...")
+        self.run_task('clips', work, on_progress=show_progress, on_finish=finish)
 
     def save_settings(self):
         """Save settings to file"""
@@ -887,7 +1130,10 @@ class EnhancedSinhalaTTS:
             'phonemes_dir': self.phoneme_dir_var.get(),
             'show_clusters': self.show_clusters_var.get(),
             'show_diacritics': self.show_diacritics_var.get(),
-            'show_phonetic': self.show_phonetic_var.get()
+            'show_phonetic': self.show_phonetic_var.get(),
+            'streaming_playback': self.streaming_var.get(),
+            'crossfade_ms': self.crossfade_var.get(),
+            'trim_silence': self.trim_silence_var.get()
         }
         
         try:
@@ -906,6 +1152,9 @@ class EnhancedSinhalaTTS:
         self.show_clusters_var.set(True)
         self.show_diacritics_var.set(True)
         self.show_phonetic_var.set(True)
+        self.streaming_var.set(True)
+        self.crossfade_var.set(8)
+        self.trim_silence_var.set(True)
         messagebox.showinfo("Success", "Settings reset to defaults!")
 
     def copy_analysis(self):
@@ -960,6 +1209,9 @@ class EnhancedSinhalaTTS:
                 self.show_clusters_var.set(settings.get('show_clusters', True))
                 self.show_diacritics_var.set(settings.get('show_diacritics', True))
                 self.show_phonetic_var.set(settings.get('show_phonetic', True))
+                self.streaming_var.set(settings.get('streaming_playback', True))
+                self.crossfade_var.set(settings.get('crossfade_ms', 8))
+                self.trim_silence_var.set(settings.get('trim_silence', True))
         except:
             pass
         
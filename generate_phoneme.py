@@ -1,6 +1,38 @@
+#!/usr/bin/env python3
+"""
+Build the phonemes/ directory of <phoneme>.wav clips
+
+Phonemes are synthesized on a bounded pool of worker threads; failed
+requests are retried with exponential backoff. Completed phonemes are
+recorded in phonemes/.build_manifest.json as they finish, so an
+interrupted build resumes where it stopped. The synthesizer is
+pluggable: "google" uses Google Cloud Text-to-Speech, "tone" writes
+deterministic synthetic clips for offline builds and tests.
+
+Examples:
+    python generate_phoneme.py
+    python generate_phoneme.py --backend tone --workers 4 phonemes_test
+"""
+
+import io
 import os
-import re
-from google.cloud import texttospeech
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+from audio_concat import write_wav
+from atomic_file import atomic_write
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+from phoneme_profile import PhonemeProfile, load_phoneme_profile, profile_corpus
+from phoneme_inventory import phoneme_inventory
+
+BUILD_MANIFEST_NAME = '.build_manifest.json'
+BUILD_MANIFEST_VERSION = 1
 
 # 2) Set up Google Cloud credentials
 # The script will automatically look for the JSON key file in the current directory
@@ -200,110 +232,357 @@ class SinhalaPhonemeSystem:
         # For now, just return the comprehensive phoneme set
         return self.get_all_phonemes()
 
-# Initialize the phoneme system
-phoneme_system = SinhalaPhonemeSystem()
-
-# 4) Setup credentials and prepare output dir
-if not setup_google_credentials():
-    print("Exiting due to missing credentials...")
-    exit(1)
-
-output_dir = "phonemes"
-os.makedirs(output_dir, exist_ok=True)
-
-# 5) Init TTS client
-try:
-    client = texttospeech.TextToSpeechClient()
-    print("Google Cloud TTS client initialized successfully!")
-except Exception as e:
-    print(f"Error initializing TTS client: {e}")
-    print("Please check your Google Cloud credentials and billing setup.")
-    exit(1)
-
-# Check available voices
-print("Checking available voices...")
-voices = client.list_voices()
-print(f"Available voices: {len(voices.voices)}")
-
-# Look for Sinhala voices or English voices as fallback
-sinhala_voices = [v for v in voices.voices if 'si' in v.language_codes]
-english_voices = [v for v in voices.voices if 'en' in v.language_codes]
-
-print(f"Sinhala voices found: {len(sinhala_voices)}")
-for v in sinhala_voices[:3]:  # Show first 3
-    print(f"  - {v.name}, Language: {v.language_codes}, Gender: {v.ssml_gender}")
-
-if not sinhala_voices:
-    print("No Sinhala voices found. Using English voice as fallback.")
-    print(f"English voices available: {len(english_voices)}")
-    for v in english_voices[:3]:  # Show first 3
-        print(f"  - {v.name}, Language: {v.language_codes}, Gender: {v.ssml_gender}")
-
-# 6) Get comprehensive phoneme set
-print("Generating comprehensive phoneme set...")
-all_phonemes = phoneme_system.get_all_phonemes()
-print(f"Total phonemes to generate: {len(all_phonemes)}")
-
-# 7) Synthesize & write WAVs
-print("Starting phoneme synthesis...")
-success_count = 0
-error_count = 0
-
-for i, phon in enumerate(all_phonemes):
-    try:
-        # build request
-        synthesis_input = texttospeech.SynthesisInput(text=phon)
-        
-        # Use available voice
-        if sinhala_voices:
-            # Use first available Sinhala voice
-            selected_voice = sinhala_voices[0]
-            voice = texttospeech.VoiceSelectionParams(
-                name=selected_voice.name,
-                language_code=selected_voice.language_codes[0]
-            )
-        else:
-            # Fallback to English voice
-            selected_voice = english_voices[0] if english_voices else None
-            if selected_voice:
-                voice = texttospeech.VoiceSelectionParams(
-                    name=selected_voice.name,
-                    language_code=selected_voice.language_codes[0]
-                )
-            else:
-                # Last resort - try en-US
-                voice = texttospeech.VoiceSelectionParams(
-                    language_code="en-US",
-                    ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
-                )
-        
-        audio_config = texttospeech.AudioConfig(
+class GoogleCloudBackend:
+    """Google Cloud Text-to-Speech, with a Sinhala voice when one is available.
+
+    The client, voice and audio configuration are created once and shared
+    by every worker thread; the client is thread-safe.
+    """
+
+    name = 'google'
+
+    def __init__(self, sample_rate: int = 16000):
+        from google.cloud import texttospeech
+        if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
+            setup_google_credentials()
+        self.texttospeech = texttospeech
+        self.client = texttospeech.TextToSpeechClient()
+        self.voice = self._select_voice()
+        self.audio_config = texttospeech.AudioConfig(
             audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000
+            sample_rate_hertz=sample_rate
         )
+        self.description = f"google:{self.voice.name or self.voice.language_code}@{sample_rate}"
+
+    def _select_voice(self):
+        """Prefer a Sinhala voice, then an English one, then generic en-US"""
+        texttospeech = self.texttospeech
+        voices = self.client.list_voices().voices
+        print(f"Available voices: {len(voices)}")
+        for prefix in ('si', 'en'):
+            matches = [v for v in voices if any(code.startswith(prefix) for code in v.language_codes)]
+            if matches:
+                selected = matches[0]
+                print(f"Using voice {selected.name} ({selected.language_codes[0]})")
+                return texttospeech.VoiceSelectionParams(name=selected.name,
+                                                         language_code=selected.language_codes[0])
+            print(f"No '{prefix}' voices found.")
+        return texttospeech.VoiceSelectionParams(language_code="en-US",
+                                                 ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL)
 
-        # call API
-        response = client.synthesize_speech(
-            input=synthesis_input,
-            voice=voice,
-            audio_config=audio_config
+    def synthesize(self, phoneme: str) -> bytes:
+        """WAV bytes for one phoneme"""
+        response = self.client.synthesize_speech(
+            input=self.texttospeech.SynthesisInput(text=phoneme),
+            voice=self.voice,
+            audio_config=self.audio_config
         )
+        return response.audio_content
+
+class ToneBackend:
+    """Offline stand-in synthesizer producing deterministic vowel-like clips.
+
+    Each phoneme gets a pitch and two formants derived from a checksum of
+    its name, so every phoneme sounds distinct and rebuilding gives
+    byte-identical files.
+    """
+
+    name = 'tone'
+
+    def __init__(self, sample_rate: int = 16000, duration: float = 0.2, padding: float = 0.02):
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.padding = padding
+        self.description = f"tone@{sample_rate}"
+
+    def synthesize(self, phoneme: str) -> bytes:
+        """WAV bytes for one phoneme"""
+        seed = zlib.crc32(phoneme.encode('utf-8'))
+        f0 = 100 + seed % 120
+        formants = (300 + (seed >> 8) % 600, 900 + (seed >> 16) % 1500)
+
+        t = np.arange(int(self.duration * self.sample_rate)) / self.sample_rate
+        harmonics = np.arange(1, int(self.sample_rate / 2 / f0)) * f0
+        weights = sum(np.exp(-((harmonics - f) / 150.0) ** 2) for f in formants) + 0.02
+        voiced = (weights[:, None] * np.sin(2 * np.pi * harmonics[:, None] * t)).sum(axis=0)
+        voiced *= np.hanning(len(t))
+        voiced *= 12000 / max(np.abs(voiced).max(), 1e-9)
+
+        pad = np.zeros(int(self.padding * self.sample_rate), dtype=np.int16)
+        buffer = io.BytesIO()
+        write_wav(buffer, np.concatenate([pad, voiced.astype(np.int16), pad]), self.sample_rate)
+        return buffer.getvalue()
+
+BACKENDS = {'google': GoogleCloudBackend, 'tone': ToneBackend}
+
+def corpus_phonemes(paths: Iterable[str], converter: Optional[SinhalaTextToPhoneme] = None) -> List[str]:
+    """Phonemes the converter emits for UTF-8 text files, most frequent first.
+
+    Files are streamed (see phoneme_profile.py), so corpus size is not
+    limited by memory. Only phonemes usable as clip names (ASCII letters)
+    are returned; spaces, punctuation and unconverted characters are
+    dropped.
+    """
+    return profile_corpus(paths, converter).top()
+
+def prioritize_phonemes(phonemes: Iterable[str], profile: PhonemeProfile,
+                        top: Optional[int] = None) -> List[str]:
+    """Order phonemes most frequent first according to a corpus profile.
+
+    Phonemes the profile never saw follow in their original order. If top
+    is given only the first top phonemes are returned.
+    """
+    counts = profile.counts['phonemes']
+    ordered = sorted(dict.fromkeys(phonemes), key=lambda phoneme: -counts.get(phoneme, 0))
+    return ordered[:top] if top else ordered
 
-        # write .wav directly
-        wav_path = os.path.join(output_dir, f"{phon}.wav")
-        with open(wav_path, "wb") as out_f:
-            out_f.write(response.audio_content)
+def phoneme_inventory_diff(targets: Iterable[str], inventory: Iterable[str]) -> Dict:
+    """Compare a target phoneme set with an inventory such as get_all_phonemes()"""
+    targets, inventory = set(targets), set(inventory)
+    return {
+        'shared': sorted(targets & inventory),
+        'missing': sorted(targets - inventory),
+        'unused': sorted(inventory - targets)
+    }
 
-        success_count += 1
-        if i % 50 == 0:  # Progress update every 50 phonemes
-            print(f"Progress: {i+1}/{len(all_phonemes)} - Generated {phon}.wav")
+def print_inventory_diff(diff: Dict, label: str, limit: Optional[int] = 40):
+    """Print a phoneme_inventory_diff() result"""
+    size = len(diff['shared']) + len(diff['missing'])
+    default_size = len(diff['shared']) + len(diff['unused'])
+    print(f"{label}: {size} phonemes, {len(diff['shared'])} of them among the "
+          f"{default_size} of get_all_phonemes()")
+    if size > default_size:
+        print(f"Warning: {label.lower()} outnumber get_all_phonemes() {size / default_size:.1f} to 1; "
+              f"--corpus or --top builds only the phonemes real text uses")
+    for key, title in (('missing', "Reachable but not in get_all_phonemes()"),
+                       ('unused', "In get_all_phonemes() but never produced")):
+        names = diff[key] if limit is None else diff[key][:limit]
+        more = f" ... and {len(diff[key]) - len(names)} more" if len(names) < len(diff[key]) else ""
+        print(f"{title} ({len(diff[key])}): {' '.join(names)}{more}")
 
+def build_manifest_path(output_dir: str) -> str:
+    """Location of the build manifest for an output directory"""
+    return os.path.join(output_dir, BUILD_MANIFEST_NAME)
+
+def load_build_manifest(output_dir: str) -> Dict:
+    """Read the manifest, or return an empty one if it is missing or unreadable"""
+    try:
+        with open(build_manifest_path(output_dir), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == BUILD_MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': BUILD_MANIFEST_VERSION, 'completed': {}, 'failed': {}}
+
+def save_build_manifest(output_dir: str, manifest: Dict):
+    """Write the manifest atomically"""
+    atomic_write(build_manifest_path(output_dir),
+                  json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+def synthesize_with_retry(backend, phoneme: str, retries: int = 3, backoff: float = 0.5):
+    """Call backend.synthesize, retrying with jittered exponential backoff.
+
+    Returns (audio bytes, number of retries used); the last error is
+    raised once the retries are exhausted.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return backend.synthesize(phoneme), attempt
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+def build_phoneme_bank(phonemes: Iterable[str], output_dir: str = 'phonemes', backend=None,
+                       workers: int = 8, retries: int = 3, backoff: float = 0.5,
+                       force: bool = False, progress: Optional[Callable[[Dict], None]] = None,
+                       flush_interval: float = 2.0) -> Dict:
+    """Synthesize <phoneme>.wav for each phoneme into output_dir.
+
+    Phonemes are processed in the given order with at most 2 * workers
+    requests queued. Phonemes the manifest records as completed by the
+    same backend, whose file is still present with the recorded size,
+    are skipped unless force is set. The manifest is flushed every
+    flush_interval seconds and when the build ends, including on errors
+    and KeyboardInterrupt. progress, if given, is called with the stats
+    dict after every phoneme. Returns the final stats.
+    """
+    backend = backend or ToneBackend()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_build_manifest(output_dir)
+    completed, failed = manifest['completed'], manifest['failed']
+
+    todo = []
+    stats = {'total': 0, 'skipped': 0, 'generated': 0, 'failed': 0, 'retries': 0,
+             'done': 0, 'elapsed': 0.0, 'rate': 0.0}
+    # One directory scan instead of a stat per phoneme
+    inventory = phoneme_inventory(output_dir)
+    inventory.refresh(force=True)
+    for phoneme in dict.fromkeys(phonemes):
+        stats['total'] += 1
+        entry = completed.get(phoneme)
+        on_disk = inventory.stat(phoneme)
+        if (not force and entry and entry['backend'] == backend.description
+                and on_disk is not None and on_disk[0] == entry['size']):
+            stats['skipped'] += 1
+            stats['done'] += 1
+        else:
+            todo.append(phoneme)
+
+    def run(phoneme):
+        audio, used = synthesize_with_retry(backend, phoneme, retries, backoff)
+        atomic_write(os.path.join(output_dir, f"{phoneme}.wav"), audio)
+        return len(audio), used
+
+    started = last_flush = time.perf_counter()
+    pending = {}
+    queue = iter(todo)
+    executor = ThreadPoolExecutor(max(1, workers), thread_name_prefix='phoneme-build')
+    try:
+        while True:
+            while len(pending) < 2 * max(1, workers):
+                phoneme = next(queue, None)
+                if phoneme is None:
+                    break
+                pending[executor.submit(run, phoneme)] = phoneme
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                phoneme = pending.pop(future)
+                try:
+                    size, used = future.result()
+                except Exception as e:
+                    failed[phoneme] = f"{type(e).__name__}: {e}"
+                    completed.pop(phoneme, None)
+                    stats['failed'] += 1
+                else:
+                    completed[phoneme] = {'backend': backend.description, 'size': size}
+                    failed.pop(phoneme, None)
+                    stats['generated'] += 1
+                    stats['retries'] += used
+                stats['done'] += 1
+                stats['elapsed'] = time.perf_counter() - started
+                processed = stats['generated'] + stats['failed']
+                stats['rate'] = processed / stats['elapsed'] if stats['elapsed'] else 0.0
+                if progress:
+                    progress(dict(stats))
+            if time.perf_counter() - last_flush >= flush_interval:
+                save_build_manifest(output_dir, manifest)
+                last_flush = time.perf_counter()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        save_build_manifest(output_dir, manifest)
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+def format_duration(seconds: float) -> str:
+    """Compact h/m/s duration"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+class ProgressReporter:
+    """Progress callback printing one status line at most every interval seconds"""
+
+    def __init__(self, interval: float = 2.0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self._last = 0.0
+
+    def __call__(self, stats: Dict):
+        now = time.perf_counter()
+        if stats['done'] < stats['total'] and now - self._last < self.interval:
+            return
+        self._last = now
+        remaining = stats['total'] - stats['done']
+        eta = format_duration(remaining / stats['rate']) if stats['rate'] else '?'
+        width = len(str(stats['total']))
+        print(f"[{stats['done']:>{width}}/{stats['total']}] {100 * stats['done'] / stats['total']:5.1f}% | "
+              f"{stats['rate']:.1f} clips/s | ETA {eta} | "
+              f"{stats['failed']} failed, {stats['retries']} retries", file=self.stream, flush=True)
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Synthesize the Sinhala phoneme clip directory.")
+    parser.add_argument('output_dir', nargs='?', default='phonemes',
+                        help="directory to write <phoneme>.wav files to (default: phonemes)")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='google',
+                        help="synthesizer to use (default: google)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent requests (default: 8)")
+    parser.add_argument('--retries', type=int, default=3, help="retries per phoneme (default: 3)")
+    parser.add_argument('--backoff', type=float, default=0.5,
+                        help="initial retry delay in seconds, doubled per retry (default: 0.5)")
+    parser.add_argument('--sample-rate', type=int, default=16000, help="clip sample rate (default: 16000)")
+    parser.add_argument('--force', action='store_true', help="regenerate phonemes already built")
+    parser.add_argument('--inventory', choices=('all', 'reachable'), default='all',
+                        help="'all': the combinatorial get_all_phonemes() set; 'reachable': "
+                             "every phoneme the text converter can emit, a much larger set "
+                             "(default: all)")
+    parser.add_argument('--corpus', action='append', metavar='FILE',
+                        help="build only phonemes the converter emits for this UTF-8 text file, "
+                             "most frequent first (repeatable)")
+    parser.add_argument('--max-marks', type=int, default=1,
+                        help="vowel signs per consonant considered by --inventory reachable (default: 1)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="phoneme_profile.py output used to build the most frequent phonemes first "
+                             "(default: the output directory's .phoneme_profile.json, if any)")
+    parser.add_argument('--top', type=int, help="build only the N most frequent phonemes")
+    parser.add_argument('--analyze', action='store_true',
+                        help="print the difference from get_all_phonemes() and exit without building")
+    args = parser.parse_args(argv)
+
+    all_phonemes = SinhalaPhonemeSystem().get_all_phonemes()
+    if args.corpus:
+        targets, label = corpus_phonemes(args.corpus), "Phonemes in corpus"
+    elif args.inventory == 'reachable':
+        targets, label = SinhalaTextToPhoneme().reachable_phonemes(args.max_marks), "Reachable phonemes"
+    else:
+        targets, label = all_phonemes, None
+    profile = None if args.corpus else load_phoneme_profile(args.profile or args.output_dir)
+    if profile:
+        print(f"Ordering by frequency in a profile of {profile.words:,} words")
+        targets = prioritize_phonemes(targets, profile)
+    elif args.top and not args.corpus:
+        parser.error("--top needs a phoneme profile or --corpus")
+    if args.top:
+        targets = targets[:args.top]
+        label = label or f"Top {args.top} of get_all_phonemes()"
+    if args.analyze:
+        print_inventory_diff(phoneme_inventory_diff(targets, all_phonemes), label or "get_all_phonemes()",
+                             limit=None)
+        return 0
+    if label:
+        print_inventory_diff(phoneme_inventory_diff(targets, all_phonemes), label)
+
+    try:
+        backend = BACKENDS[args.backend](sample_rate=args.sample_rate)
     except Exception as e:
-        error_count += 1
-        print(f"Error generating {phon}: {e}")
-        continue
-
-print(f"\nPhoneme generation complete!")
-print(f"Successfully generated: {success_count} phonemes")
-print(f"Errors: {error_count} phonemes")
-print(f"Total files in {output_dir}: {len(os.listdir(output_dir)) if os.path.exists(output_dir) else 0}")
\ No newline at end of file
+        print(f"Error initializing {args.backend} backend: {e}")
+        if args.backend == 'google':
+            print("Please check your Google Cloud credentials and billing setup.")
+        return 1
+
+    print(f"Total phonemes: {len(targets)}")
+    try:
+        stats = build_phoneme_bank(targets, args.output_dir, backend, workers=args.workers,
+                                   retries=args.retries, backoff=args.backoff, force=args.force,
+                                   progress=ProgressReporter())
+    except KeyboardInterrupt:
+        print("\nInterrupted; completed phonemes are recorded and will be skipped next run.")
+        return 130
+
+    print(f"\nPhoneme generation complete in {format_duration(stats['elapsed'])}")
+    print(f"Generated: {stats['generated']}, already built: {stats['skipped']}, "
+          f"failed: {stats['failed']} ({stats['rate']:.1f} clips/s)")
+    if stats['failed']:
+        print(f"Failed phonemes are listed in {build_manifest_path(args.output_dir)} "
+              f"and will be retried next run.")
+    return 0 if stats['failed'] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import hashlib
+import mmap
+import time
+import wave
+import struct
+import argparse
+import itertools
+import threading
+from collections import namedtuple
+from typing import List, Optional, Tuple
+from phoneme_inventory import phoneme_inventory
+from atomic_file import atomic_write
+
+# PCM of one phoneme clip plus the wave parameters needed to interpret it
+PhonemeClip = namedtuple('PhonemeClip', ['phoneme', 'pcm', 'params'])
+
+# Same fields as wave.Wave_read.getparams(), usable with Wave_write.setparams()
+WaveParams = namedtuple('WaveParams', ['nchannels', 'sampwidth', 'framerate',
+                                       'nframes', 'comptype', 'compname'])
+
+# Packed bank layout: header, JSON index, then contiguous PCM.
+# The index maps phoneme -> [offset, length, sample_rate, sample_width,
+# channels] with offsets relative to the start of the PCM section.
+PACKED_BANK_MAGIC = b'SPHB'
+PACKED_BANK_VERSION = 1
+PACKED_BANK_HEADER = struct.Struct('<4sHHQQ')  # magic, version, flags, index length, PCM offset
+PACKED_BANK_EXTENSION = '.phbank'
+
+class PhonemeAudioBank:
+    """In-memory bank of phoneme PCM loaded from a directory of WAV files.
+
+    Each clip is decoded once, on first use or by load_all(), and then
+    served as a read-only memoryview so concatenation never copies or
+    re-reads it. The file listing comes from the directory's shared
+    PhonemeInventory, revalidated at most every refresh_interval seconds
+    (never if it is None); clips whose size or mtime changed are reloaded
+    and removed files are dropped.
+    """
+
+    # Loaded clips are held in process memory
+    resident = True
+
+    def __init__(self, phonemes_dir: str, refresh_interval: float = 2.0):
+        self.phonemes_dir = phonemes_dir
+        self.refresh_interval = refresh_interval
+        self.inventory = phoneme_inventory(phonemes_dir)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._files = {}
+        self._clips = {}
+        self._fingerprint = None
+        self._last_scan = 0.0
+        self.refresh(force=True)
+
+    def _refresh_due(self) -> bool:
+        return (self.refresh_interval is not None and
+                time.monotonic() - self._last_scan >= self.refresh_interval)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Revalidate the directory listing if due; return True if the bank changed"""
+        if not force and not self._refresh_due():
+            return False
+        with self._lock:
+            self._last_scan = time.monotonic()
+            self.inventory.refresh(force)
+            files = self.inventory.files()
+            if files is self._files or files == self._files:
+                return False
+
+            for phoneme in list(self._clips):
+                if files.get(phoneme) != self._files.get(phoneme):
+                    del self._clips[phoneme]
+            self._files = files
+            self.version += 1
+            return True
+
+    def _load(self, phoneme: str) -> Optional[PhonemeClip]:
+        path = self._files[phoneme][0]
+        try:
+            with wave.open(path, 'rb') as w:
+                params = w.getparams()
+                pcm = w.readframes(w.getnframes())
+        except (OSError, EOFError, wave.Error) as e:
+            print(f"Error reading {path}: {e}")
+            return None
+        clip = PhonemeClip(phoneme, memoryview(pcm), params)
+        self._clips[phoneme] = clip
+        return clip
+
+    def get(self, phoneme: str) -> Optional[PhonemeClip]:
+        """Return the clip for phoneme, or None if it is not in the bank"""
+        self.refresh()
+        clip = self._clips.get(phoneme)
+        if clip is not None:
+            return clip
+        with self._lock:
+            if phoneme not in self._files:
+                return None
+            return self._clips.get(phoneme) or self._load(phoneme)
+
+    def load_all(self) -> int:
+        """Decode every clip now; return the number loaded"""
+        with self._lock:
+            self.refresh()
+            for phoneme in self._files:
+                if phoneme not in self._clips:
+                    self._load(phoneme)
+            return len(self._clips)
+
+    def __contains__(self, phoneme: str) -> bool:
+        self.refresh()
+        return phoneme in self._files
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._files)
+
+    def phonemes(self) -> List[str]:
+        """Sorted names of the phonemes in the bank"""
+        self.refresh()
+        return sorted(self._files)
+
+    def file_size(self, phoneme: str) -> Optional[int]:
+        """Size on disk of the phoneme's WAV file"""
+        entry = self._files.get(phoneme)
+        return entry[1] if entry else None
+
+    def file_stat(self, phoneme: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime_ns) of the phoneme's WAV file as of the last scan"""
+        entry = self._files.get(phoneme)
+        return entry[1:] if entry else None
+
+    def memory_size(self) -> int:
+        """Bytes of PCM currently held in memory"""
+        return sum(clip.pcm.nbytes for clip in list(self._clips.values()))
+
+    def fingerprint(self) -> str:
+        """Digest of every clip's name, size and mtime.
+
+        Unlike version, which counts changes within one process, the
+        fingerprint is the same in every process that sees the same files.
+        """
+        with self._lock:
+            self.refresh()
+            if self._fingerprint is None or self._fingerprint[0] != self.version:
+                digest = hashlib.sha1()
+                for phoneme, (_path, size, mtime) in sorted(self._files.items()):
+                    digest.update(f"{phoneme}\0{size}\0{mtime}\n".encode('utf-8'))
+                self._fingerprint = (self.version, digest.hexdigest())
+            return self._fingerprint[1]
+
+
+class PackedPhonemeBank:
+    """Memory-mapped reader for a packed phoneme bank file.
+
+    Offers the same interface as PhonemeAudioBank. Clip PCM is returned
+    as memoryview slices of the mapping, so nothing is copied or decoded
+    and the OS pages data in on demand. The file is reopened if its size
+    or mtime changes.
+    """
+
+    # Clips are pages of the mapping, read from disk when first touched
+    resident = False
+
+    def __init__(self, path: str, refresh_interval: float = 2.0):
+        self.path = path
+        self.phonemes_dir = path
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._lock = threading.RLock()
+        self._stat = None
+        self._mmap = None
+        self._view = None
+        self._index = {}
+        self._last_check = 0.0
+        self.refresh(force=True)
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(PACKED_BANK_HEADER.size)
+            if len(header) < PACKED_BANK_HEADER.size:
+                raise ValueError(f"{self.path} is not a packed phoneme bank")
+            magic, version, _flags, index_length, pcm_offset = PACKED_BANK_HEADER.unpack(header)
+            if magic != PACKED_BANK_MAGIC:
+                raise ValueError(f"{self.path} is not a packed phoneme bank")
+            if version > PACKED_BANK_VERSION:
+                raise ValueError(f"Unsupported phoneme bank version {version}")
+            index = json.loads(f.read(index_length).decode('utf-8'))
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._close()
+        self._mmap = mapping
+        self._view = memoryview(mapping)
+        self._index = {phoneme: (pcm_offset + entry[0],) + tuple(entry[1:])
+                       for phoneme, entry in index['phonemes'].items()}
+
+    def _close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Clips handed out earlier still reference the old mapping
+                pass
+            self._mmap = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reopen the file if it changed; return True if the bank changed"""
+        if (not force and (self.refresh_interval is None or
+                           time.monotonic() - self._last_check < self.refresh_interval)):
+            return False
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                stat = None
+            key = (stat.st_size, stat.st_mtime_ns) if stat else None
+            if key == self._stat:
+                return False
+            self._stat = key
+            if key is None:
+                self._close()
+                self._index = {}
+            else:
+                self._open()
+            self.version += 1
+            return True
+
+    def get(self, phoneme: str) -> Optional[PhonemeClip]:
+        """Return the clip for phoneme, or None if it is not in the bank"""
+        self.refresh()
+        entry = self._index.get(phoneme)
+        if entry is None:
+            return None
+        offset, length, sample_rate, sample_width, channels = entry
+        params = WaveParams(channels, sample_width, sample_rate,
+                            length // (sample_width * channels), 'NONE', 'not compressed')
+        return PhonemeClip(phoneme, self._view[offset:offset + length], params)
+
+    def load_all(self) -> int:
+        """Clips are mapped, not loaded; return the number available"""
+        return len(self)
+
+    def __contains__(self, phoneme: str) -> bool:
+        self.refresh()
+        return phoneme in self._index
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._index)
+
+    def phonemes(self) -> List[str]:
+        """Sorted names of the phonemes in the bank"""
+        self.refresh()
+        return sorted(self._index)
+
+    def file_size(self, phoneme: str) -> Optional[int]:
+        """Size of the phoneme's PCM in the packed file"""
+        entry = self._index.get(phoneme)
+        return entry[1] if entry else None
+
+    def file_stat(self, phoneme: str) -> Optional[Tuple[int, int]]:
+        """Packed clips have no file of their own"""
+        return None
+
+    def memory_size(self) -> int:
+        """Bytes of PCM mapped into memory (paged in by the OS on use)"""
+        return sum(entry[1] for entry in self._index.values())
+
+    def fingerprint(self) -> str:
+        """Identifies the bank file contents across processes"""
+        self.refresh()
+        return f"{os.path.abspath(self.path)}:{self._stat}"
+
+    def close(self):
+        """Release the memory mapping"""
+        with self._lock:
+            self._close()
+            self._index = {}
+            self._stat = None
+
+def pack_phoneme_dir(phonemes_dir: str, out_path: str) -> int:
+    """Pack every <phoneme>.wav in phonemes_dir into one bank file.
+
+    The file is written next to out_path and renamed into place, so
+    readers never see a partial bank. Returns the number of clips packed.
+    """
+    clips = []
+    inventory = phoneme_inventory(phonemes_dir)
+    inventory.refresh(force=True)
+    for phoneme, (path, _size, _mtime) in sorted(inventory.files().items()):
+        try:
+            with wave.open(path, 'rb') as w:
+                clips.append((phoneme, w.getparams(), w.readframes(w.getnframes())))
+        except (OSError, EOFError, wave.Error) as e:
+            print(f"Skipping {path}: {e}")
+
+    index = {}
+    offset = 0
+    for phoneme, params, pcm in clips:
+        index[phoneme] = [offset, len(pcm), params.framerate, params.sampwidth, params.nchannels]
+        offset += len(pcm)
+    index_bytes = json.dumps({'phonemes': index}, ensure_ascii=False).encode('utf-8')
+    pcm_offset = PACKED_BANK_HEADER.size + len(index_bytes)
+
+    header = PACKED_BANK_HEADER.pack(PACKED_BANK_MAGIC, PACKED_BANK_VERSION, 0,
+                                     len(index_bytes), pcm_offset)
+    atomic_write(out_path, itertools.chain([header, index_bytes], (pcm for _phoneme, _params, pcm in clips)))
+    return len(clips)
+
+def open_phoneme_bank(path: str, **kwargs):
+    """Open a packed bank file or a directory of WAV files"""
+    if os.path.isfile(path):
+        return PackedPhonemeBank(path, **kwargs)
+    return PhonemeAudioBank(path, **kwargs)
+
+def main(argv=None):
+    """Convert a phonemes/ directory into a packed bank file"""
+    parser = argparse.ArgumentParser(description="Pack phoneme WAV files into one bank file.")
+    parser.add_argument('phonemes_dir', nargs='?', default='phonemes',
+                        help="directory of <phoneme>.wav files (default: phonemes)")
+    parser.add_argument('output', nargs='?', default='phonemes' + PACKED_BANK_EXTENSION,
+                        help="packed bank to write (default: phonemes.phbank)")
+    args = parser.parse_args(argv)
+
+    count = pack_phoneme_dir(args.phonemes_dir, args.output)
+    print(f"Packed {count} phonemes into {args.output} "
+          f"({os.path.getsize(args.output)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
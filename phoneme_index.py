@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import wave
+import argparse
+import threading
+from collections import namedtuple
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from audio_concat import convert_pcm, find_trim_bounds
+from phoneme_inventory import phoneme_inventory
+from atomic_file import atomic_write
+
+# Trim offsets (in source frames), trimmed duration and loudness of one clip.
+# gain scales the trimmed clip to the index's target RMS without clipping.
+ClipAnalysis = namedtuple('ClipAnalysis', ['start', 'end', 'duration', 'rms', 'peak', 'gain'])
+
+PHONEME_INDEX_NAME = '.phoneme_index.json'
+PHONEME_INDEX_VERSION = 1
+DEFAULT_ANALYSIS_SETTINGS = {
+    'silence_threshold': 256,
+    'trim_padding_ms': 5.0,
+    'target_rms': 3000.0,
+    'peak_limit': 32000
+}
+
+def analyze_clip(pcm, sample_width: int, channels: int, sample_rate: int,
+                 settings: Optional[Dict] = None) -> ClipAnalysis:
+    """Measure trim offsets and loudness of one clip's PCM"""
+    settings = dict(DEFAULT_ANALYSIS_SETTINGS, **(settings or {}))
+    samples = convert_pcm(pcm, sample_width, channels, sample_rate, sample_rate)
+    padding = int(sample_rate * settings['trim_padding_ms'] / 1000)
+    start, end = find_trim_bounds(samples, settings['silence_threshold'], padding)
+
+    trimmed = samples[start:end].astype(np.float64)
+    rms = float(np.sqrt(np.mean(trimmed * trimmed))) if len(trimmed) else 0.0
+    peak = int(np.abs(trimmed).max()) if len(trimmed) else 0
+    gain = 1.0
+    if rms > 0:
+        gain = settings['target_rms'] / rms
+        if peak:
+            gain = min(gain, settings['peak_limit'] / peak)
+    return ClipAnalysis(start, end, (end - start) / sample_rate, round(rms, 2), peak, round(gain, 4))
+
+class PhonemeIndex:
+    """Sidecar index of per-clip trim and loudness analysis.
+
+    Entries are keyed by phoneme and stamped with the WAV file's size and
+    mtime; lookup() only returns an entry whose stamp still matches, so a
+    stale index is never applied to a rewritten clip. The sidecar is
+    re-read by refresh() when it changes on disk, bumping version.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = 0
+        self.settings = dict(DEFAULT_ANALYSIS_SETTINGS)
+        self._entries = {}
+        self._stat = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Reload the sidecar if it changed; return True if it was reloaded"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                key = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                key = None
+            if key == self._stat:
+                return False
+            self._stat = key
+            self._entries = {}
+            self.version += 1
+            if key is None:
+                return True
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading {self.path}: {e}")
+                return True
+            if data.get('version') != PHONEME_INDEX_VERSION:
+                return True
+            self.settings = dict(DEFAULT_ANALYSIS_SETTINGS, **data.get('settings', {}))
+            self._entries = data.get('clips', {})
+            return True
+
+    def lookup(self, phoneme: str, size: int, mtime_ns: int) -> Optional[ClipAnalysis]:
+        """Analysis for phoneme if it was made from a file with this size and mtime"""
+        entry = self._entries.get(phoneme)
+        if entry is None or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+            return None
+        return ClipAnalysis(*(entry[field] for field in ClipAnalysis._fields))
+
+    def fingerprint(self) -> str:
+        """Identifies the sidecar contents across processes"""
+        return str(self._stat)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def phoneme_index_path(phonemes_dir: str) -> str:
+    """Location of the sidecar index for a phonemes directory"""
+    return os.path.join(phonemes_dir, PHONEME_INDEX_NAME)
+
+def load_phoneme_index(phonemes_dir: str) -> PhonemeIndex:
+    """Open the sidecar index of phonemes_dir (empty if not built yet)"""
+    return PhonemeIndex(phoneme_index_path(phonemes_dir))
+
+def build_phoneme_index(phonemes_dir: str, settings: Optional[Dict] = None,
+                        force: bool = False,
+                        progress: Optional[Callable[[int, int], None]] = None,
+                        cancel=None) -> Optional[Tuple[PhonemeIndex, Dict[str, int]]]:
+    """Analyze new and changed clips in phonemes_dir and update the sidecar.
+
+    Files whose size and mtime match their existing entry are not re-read
+    unless force is set or the analysis settings changed. The sidecar is
+    written to a temporary file and renamed into place. Returns the index
+    and counts of analyzed, reused and removed entries. progress(done,
+    total) is called every 100 clips. If cancel (a threading.Event) is
+    set, the sidecar is left unchanged and None is returned.
+    """
+    settings = dict(DEFAULT_ANALYSIS_SETTINGS, **(settings or {}))
+    path = phoneme_index_path(phonemes_dir)
+    index = PhonemeIndex(path)
+    previous = {} if force or index.settings != settings else index._entries
+
+    clips = {}
+    stats = {'analyzed': 0, 'reused': 0, 'removed': 0, 'failed': 0}
+    if not os.path.isdir(phonemes_dir):
+        raise FileNotFoundError(f"No such directory: {phonemes_dir}")
+    inventory = phoneme_inventory(phonemes_dir)
+    inventory.refresh(force=True)
+
+    files = sorted(inventory.files().items())
+    for done, (phoneme, (file_path, size, mtime_ns)) in enumerate(files):
+        if done % 100 == 0:
+            if cancel is not None and cancel.is_set():
+                return None
+            if progress is not None:
+                progress(done, len(files))
+        old = previous.get(phoneme)
+        if old and old['size'] == size and old['mtime_ns'] == mtime_ns:
+            clips[phoneme] = old
+            stats['reused'] += 1
+            continue
+        try:
+            with wave.open(file_path, 'rb') as w:
+                params = w.getparams()
+                pcm = w.readframes(w.getnframes())
+        except (OSError, EOFError, wave.Error) as e:
+            print(f"Skipping {file_path}: {e}")
+            stats['failed'] += 1
+            continue
+        analysis = analyze_clip(pcm, params.sampwidth, params.nchannels, params.framerate, settings)
+        clips[phoneme] = dict(analysis._asdict(), size=size, mtime_ns=mtime_ns)
+        stats['analyzed'] += 1
+    stats['removed'] = len(set(index._entries) - set(clips))
+    if progress is not None:
+        progress(len(files), len(files))
+
+    data = {'version': PHONEME_INDEX_VERSION, 'settings': settings, 'clips': clips}
+    atomic_write(path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    index.refresh()
+    return index, stats
+
+def main(argv=None):
+    """Build or update the trim/loudness index of a phonemes directory"""
+    parser = argparse.ArgumentParser(description="Analyze phoneme clips for trimming and loudness.")
+    parser.add_argument('phonemes_dir', nargs='?', default='phonemes',
+                        help="directory of <phoneme>.wav files (default: phonemes)")
+    parser.add_argument('--threshold', type=int, default=DEFAULT_ANALYSIS_SETTINGS['silence_threshold'],
+                        help="amplitude below which edges count as silence")
+    parser.add_argument('--padding-ms', type=float, default=DEFAULT_ANALYSIS_SETTINGS['trim_padding_ms'],
+                        help="silence kept around the trimmed clip")
+    parser.add_argument('--target-rms', type=float, default=DEFAULT_ANALYSIS_SETTINGS['target_rms'],
+                        help="RMS level clips are normalized to")
+    parser.add_argument('--force', action='store_true', help="re-analyze every clip")
+    args = parser.parse_args(argv)
+
+    settings = {'silence_threshold': args.threshold, 'trim_padding_ms': args.padding_ms,
+                'target_rms': args.target_rms}
+    index, stats = build_phoneme_index(args.phonemes_dir, settings, force=args.force)
+    print(f"Indexed {len(index)} clips: {stats['analyzed']} analyzed, {stats['reused']} unchanged, "
+          f"{stats['removed']} removed, {stats['failed']} failed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+# A directory whose mtime is this close to the time it was scanned may
+# change again within the same timestamp tick, so it is not trusted
+RACY_WINDOW_NS = 2 * 10**9
+
+class PhonemeInventory:
+    """Cached listing of the WAV clips in a phonemes directory.
+
+    The directory is scanned once with os.scandir, keeping each clip's
+    path, size and mtime. refresh() then costs a single stat of the
+    directory: adding, removing or renaming a file (including the atomic
+    replace used to write clips) changes the directory's mtime, and only
+    then is it rescanned. Files rewritten in place leave the directory
+    unchanged, so a full rescan also runs every rescan_interval seconds
+    (never if None) and whenever the directory mtime is too recent to
+    rule out a change in the same timestamp tick.
+    """
+
+    def __init__(self, directory: str, suffix: str = '.wav', rescan_interval: Optional[float] = 30.0):
+        self.directory = directory
+        self.suffix = suffix
+        self.rescan_interval = rescan_interval
+        self.version = 0
+        self.scans = 0
+        self._lock = threading.Lock()
+        self._files = {}
+        self._directory_key = None
+        self._racy = True
+        self._last_scan = 0.0
+
+    def _directory_stat(self):
+        try:
+            stat = os.stat(self.directory)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _scan(self) -> Dict[str, Tuple[str, int, int]]:
+        files = {}
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return files
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files[entry.name[:-len(self.suffix)]] = (entry.path, stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _rescan_due(self, directory_key) -> bool:
+        return (directory_key is None or directory_key != self._directory_key or self._racy or
+                (self.rescan_interval is not None and
+                 time.monotonic() - self._last_scan >= self.rescan_interval))
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan if the directory may have changed; return True if the listing did"""
+        directory_key = self._directory_stat()
+        if not force and not self._rescan_due(directory_key):
+            return False
+        with self._lock:
+            started_ns = time.time_ns()
+            files = self._scan()
+            self.scans += 1
+            self._last_scan = time.monotonic()
+            self._directory_key = directory_key
+            self._racy = directory_key is None or directory_key[1] >= started_ns - RACY_WINDOW_NS
+            if files == self._files:
+                return False
+            self._files = files
+            self.version += 1
+            return True
+
+    def files(self) -> Dict[str, Tuple[str, int, int]]:
+        """Map name -> (path, size, mtime_ns) as of the last scan.
+
+        The dict is replaced, never modified, when the listing changes.
+        """
+        return self._files
+
+    def names(self) -> List[str]:
+        """Sorted clip names"""
+        return sorted(self._files)
+
+    def stat(self, name: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime_ns) of a clip as of the last scan"""
+        entry = self._files.get(name)
+        return entry[1:] if entry else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+_inventories = weakref.WeakValueDictionary()
+_inventories_lock = threading.Lock()
+
+def phoneme_inventory(directory: str) -> PhonemeInventory:
+    """The inventory of a directory, shared by everything that has it open"""
+    key = os.path.realpath(directory)
+    with _inventories_lock:
+        inventory = _inventories.get(key)
+        if inventory is None:
+            inventory = PhonemeInventory(directory)
+            _inventories[key] = inventory
+        return inventory
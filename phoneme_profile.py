@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Corpus frequency profile of Sinhala phonemes, tokens and clusters
+
+Streams UTF-8 text files through SinhalaTextToPhoneme and counts how
+often each phoneme, tokenizer token and consonant cluster occurs. The
+table is saved as JSON (by default phonemes/.phoneme_profile.json, where
+SynthesisEngine finds it and keeps the hottest clips in memory) and can
+order a generate_phoneme.py build so the most used phonemes come first.
+
+Examples:
+    python phoneme_profile.py corpus.txt
+    python phoneme_profile.py more_text.txt --update --top 50
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Callable, Dict, Iterable, List, Optional
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme, iter_words
+from word_counter import WordCounter, consonant_cluster
+from atomic_file import atomic_write
+
+PHONEME_PROFILE_NAME = '.phoneme_profile.json'
+PHONEME_PROFILE_VERSION = 1
+PROFILE_KINDS = ('phonemes', 'tokens', 'clusters')
+
+def is_clip_name(phoneme: str) -> bool:
+    """True for phonemes that can name a clip (spaces and punctuation cannot)"""
+    return phoneme.isascii() and phoneme.isalpha()
+
+class PhonemeProfile(WordCounter):
+    """Occurrence counts of phonemes, tokens and consonant clusters.
+
+    Only phonemes that can name a clip and tokens that start with a
+    Sinhala letter are counted. Profiles of different corpora, or of
+    parts of one corpus, can be combined with merge().
+    """
+
+    kinds = PROFILE_KINDS
+
+    def __init__(self, batch_words: int = 100000):
+        super().__init__(batch_words)
+        self.sources = []
+
+    def add_text(self, text_stream, converter: Optional[SinhalaTextToPhoneme] = None):
+        """Profile a string, iterable of text chunks or text file object"""
+        self.add_words(iter_words(text_stream), converter or SinhalaTextToPhoneme())
+
+    def count_word(self, word: str, count: int, converter: SinhalaTextToPhoneme):
+        phonemes, tokens, clusters = (self.counts[kind] for kind in PROFILE_KINDS)
+        consonants = converter.sinhala_consonants
+        self.words += count
+        for phoneme in converter.word_to_phonemes(word):
+            if is_clip_name(phoneme):
+                phonemes[phoneme] += count
+        for token in converter.tokenize_sinhala_text(word):
+            if token[0] in consonants or token[0] in converter.sinhala_vowels:
+                tokens[token] += count
+                cluster = consonant_cluster(token, consonants)
+                if cluster:
+                    clusters[cluster] += count
+
+    def merge(self, other: 'PhonemeProfile', sign: int = 1) -> 'PhonemeProfile':
+        """Add another profile's counts to this one"""
+        super().merge(other, sign)
+        self.sources.extend(source for source in other.sources if source not in self.sources)
+        return self
+
+    def top(self, n: Optional[int] = None, kind: str = 'phonemes') -> List[str]:
+        """The n most frequent entries of a kind, most frequent first (ties by name)"""
+        ranked = sorted(self.counts[kind].items(), key=lambda item: (-item[1], item[0]))
+        return [name for name, _count in ranked[:n]]
+
+    def coverage(self, n: int, kind: str = 'phonemes') -> float:
+        """Fraction of all occurrences covered by the n most frequent entries"""
+        total = sum(self.counts[kind].values())
+        if not total:
+            return 0.0
+        return sum(self.counts[kind][name] for name in self.top(n, kind)) / total
+
+    def to_dict(self) -> Dict:
+        return dict({kind: dict(self.counts[kind]) for kind in PROFILE_KINDS},
+                    version=PHONEME_PROFILE_VERSION, words=self.words, sources=self.sources)
+
+    def save(self, path: str):
+        """Write the profile atomically"""
+        atomic_write(path, json.dumps(self.to_dict(), ensure_ascii=False).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path: str) -> 'PhonemeProfile':
+        """Read a saved profile; raises ValueError for other formats"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != PHONEME_PROFILE_VERSION:
+            raise ValueError(f"{path} is not a version {PHONEME_PROFILE_VERSION} phoneme profile")
+        profile = cls()
+        for kind in PROFILE_KINDS:
+            profile.counts[kind].update(data.get(kind, {}))
+        profile.words = data.get('words', 0)
+        profile.sources = list(data.get('sources', []))
+        return profile
+
+def phoneme_profile_path(phonemes_dir: str) -> str:
+    """Default location of the profile for a phonemes directory"""
+    return os.path.join(phonemes_dir, PHONEME_PROFILE_NAME)
+
+def load_phoneme_profile(path: str) -> Optional[PhonemeProfile]:
+    """Load a profile file, or the default profile of a phonemes directory.
+
+    Returns None if there is no readable profile.
+    """
+    if os.path.isdir(path):
+        path = phoneme_profile_path(path)
+    try:
+        return PhonemeProfile.load(path)
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            print(f"Error reading {path}: {e}")
+        return None
+
+def profile_corpus(paths: Iterable[str], converter: Optional[SinhalaTextToPhoneme] = None,
+                   profile: Optional[PhonemeProfile] = None,
+                   progress: Optional[Callable[[str, PhonemeProfile], None]] = None) -> PhonemeProfile:
+    """Stream UTF-8 text files into a profile (a new one unless given).
+
+    progress, if given, is called with the path and profile after each file.
+    """
+    converter = converter or SinhalaTextToPhoneme(word_cache_size=4096)
+    profile = profile or PhonemeProfile()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            profile.add_words(iter_words(f), converter)
+        source = os.path.abspath(path)
+        if source not in profile.sources:
+            profile.sources.append(source)
+        if progress:
+            progress(path, profile)
+    return profile
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Profile phoneme, token and cluster frequencies of a corpus.")
+    parser.add_argument('corpus', nargs='+', help="UTF-8 text files")
+    parser.add_argument('-o', '--output', default=phoneme_profile_path('phonemes'),
+                        help=f"profile file to write (default: phonemes/{PHONEME_PROFILE_NAME})")
+    parser.add_argument('--update', action='store_true', help="add to the counts already in the output file")
+    parser.add_argument('--top', type=int, default=20, help="entries to list per table (default: 20)")
+    args = parser.parse_args(argv)
+
+    profile = (load_phoneme_profile(args.output) if args.update else None) or PhonemeProfile()
+    started = time.perf_counter()
+
+    def report(path, profile):
+        elapsed = time.perf_counter() - started
+        print(f"{path}: {profile.words:,} words so far ({profile.words / max(elapsed, 1e-9):,.0f} words/s)")
+
+    profile_corpus(args.corpus, profile=profile, progress=report)
+    profile.save(args.output)
+    print(f"Saved profile of {profile.words:,} words to {args.output}")
+
+    for kind in PROFILE_KINDS:
+        counts = profile.counts[kind]
+        print(f"\nTop {kind} ({len(counts)} distinct, top {args.top} cover "
+              f"{100 * profile.coverage(args.top, kind):.1f}%):")
+        for name in profile.top(args.top, kind):
+            print(f"  {name:<12} {counts[name]:>12,}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, Iterable, Tuple
+
+class PhonemeResolver:
+    """Map phoneme strings to the clips that will voice them.
+
+    A phoneme with its own clip resolves to itself. A missing phoneme is
+    split into the fewest pieces that all have clips, found by dynamic
+    programming over the bank inventory ("thraa" -> "thr" + "aa" rather
+    than five single letters); among equally short splits the one with
+    the longest leading pieces wins. If no split covers every character,
+    as few characters as possible are left out. Results are memoized per
+    phoneme string and the table is rebuilt when the bank's version
+    changes, so after the first use resolving is a dictionary lookup.
+    """
+
+    def __init__(self, bank):
+        self.bank = bank
+        self._lock = threading.Lock()
+        self._key = None
+        self._inventory = frozenset()
+        self._max_length = 0
+        self._table = {}
+
+    def _current_table(self) -> Dict[str, Tuple[str, ...]]:
+        """Memo table for the bank's current contents"""
+        self.bank.refresh()
+        key = (id(self.bank), self.bank.version)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    inventory = frozenset(self.bank.phonemes())
+                    self._inventory = inventory
+                    self._max_length = max(map(len, inventory), default=0)
+                    self._table = {}
+                    self._key = key
+        return self._table
+
+    def resolve(self, phoneme: str) -> Tuple[str, ...]:
+        """Clip names for phoneme, in order; empty if nothing in the bank fits"""
+        table = self._current_table()
+        units = table.get(phoneme)
+        if units is None:
+            units = self._decompose(phoneme)
+            table[phoneme] = units
+        return units
+
+    def precompute(self, phonemes: Iterable[str]) -> int:
+        """Resolve phonemes ahead of use; return how many need a fallback"""
+        return sum(1 for phoneme in phonemes if self.resolve(phoneme) != (phoneme,))
+
+    def _decompose(self, phoneme: str) -> Tuple[str, ...]:
+        inventory = self._inventory
+        if phoneme in inventory:
+            return (phoneme,)
+        length = len(phoneme)
+        # best[i] = (characters dropped, pieces used, previous position, piece)
+        # for the cheapest cover of phoneme[:i]
+        best = [None] * (length + 1)
+        best[0] = (0, 0, 0, None)
+        for start in range(length):
+            if best[start] is None:
+                continue
+            dropped, pieces = best[start][:2]
+            candidates = [(dropped + 1, pieces, start, None, start + 1)]
+            for end in range(min(length, start + self._max_length), start, -1):
+                piece = phoneme[start:end]
+                if piece in inventory:
+                    candidates.append((dropped, pieces + 1, start, piece, end))
+            for dropped_after, pieces_after, previous, piece, end in candidates:
+                current = best[end]
+                # Later split points win ties, keeping leading pieces long
+                if current is None or (dropped_after, pieces_after) <= current[:2]:
+                    best[end] = (dropped_after, pieces_after, previous, piece)
+
+        units = []
+        position = length
+        while position:
+            _dropped, _pieces, previous, piece = best[position]
+            if piece is not None:
+                units.append(piece)
+            position = previous
+        return tuple(reversed(units))
+
+    def info(self) -> Dict[str, int]:
+        """Inventory and memo table sizes"""
+        table = self._table
+        return {
+            'inventory': len(self._inventory),
+            'resolved': len(table),
+            'fallbacks': sum(1 for phoneme, units in table.items() if units != (phoneme,))
+        }
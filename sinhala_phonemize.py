@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Headless bulk phonemizer for Sinhala text
+
+Reads records from files or stdin as plain lines, TSV or JSONL, converts
+them with SinhalaTextToPhoneme and streams the phoneme strings back out.
+Throughput (words/s, MB/s) is reported on stderr. Only the standard
+library and the rule-based converter are used, so it runs without a
+display server or audio device.
+
+Examples:
+    python sinhala_phonemize.py corpus.txt > phonemes.txt
+    python sinhala_phonemize.py --format jsonl --field text news.jsonl
+    cat subtitles.tsv | python sinhala_phonemize.py --format tsv --column 2
+"""
+
+import argparse
+import json
+import sys
+import time
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+
+FORMATS = ('lines', 'tsv', 'jsonl')
+
+class ThroughputReporter:
+    """Track records, words and bytes processed and report rates on stderr"""
+
+    def __init__(self, stream=sys.stderr, interval=5.0, enabled=True):
+        self.stream = stream
+        self.interval = interval
+        self.enabled = enabled
+        self.records = 0
+        self.words = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+        self._last_report = self.start
+
+    def add(self, text, size):
+        self.records += 1
+        self.words += len(text.split())
+        self.bytes += size
+        if self.enabled and self.interval:
+            now = time.perf_counter()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                self.report("progress")
+
+    def report(self, label="done"):
+        if not self.enabled:
+            return
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(f"[{label}] {self.records} records, {self.words} words, "
+              f"{self.bytes / 1e6:.2f} MB in {elapsed:.2f}s | "
+              f"{self.words / elapsed:.0f} words/s, "
+              f"{self.bytes / 1e6 / elapsed:.2f} MB/s",
+              file=self.stream, flush=True)
+
+def open_inputs(paths):
+    """Yield binary streams for the given paths ('-' is stdin)"""
+    for path in paths or ['-']:
+        if path == '-':
+            yield sys.stdin.buffer
+        else:
+            with open(path, 'rb') as f:
+                yield f
+
+class RecordError(ValueError):
+    """An input record that cannot be read, with its file and line"""
+
+def read_records(paths, input_format, column, field, reporter):
+    """Yield (text, record) pairs from the input files.
+
+    A JSONL line that is not a JSON object raises RecordError naming the
+    file and line.
+    """
+    for stream in open_inputs(paths):
+        for number, raw in enumerate(stream, 1):
+            line = raw.decode('utf-8').rstrip('\r\n')
+
+            if input_format == 'lines':
+                text, record = line, line
+            elif input_format == 'tsv':
+                record = line.split('\t')
+                text = record[column] if column < len(record) else ''
+            else:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise RecordError(f"{stream.name}, line {number}: invalid JSON: {e}")
+                if not isinstance(record, dict):
+                    raise RecordError(f"{stream.name}, line {number}: expected a JSON object, "
+                                     f"got {type(record).__name__}")
+                text = record.get(field) or ''
+
+            reporter.add(text, len(raw))
+            yield text, record
+
+def format_record(text, record, phonemes, input_format, output_format, field, output_field):
+    """Render one output line"""
+    if output_format == 'lines':
+        return phonemes
+    if output_format == 'tsv':
+        fields = record if input_format == 'tsv' else [text]
+        return '\t'.join(fields + [phonemes])
+    obj = dict(record) if input_format == 'jsonl' else {field: text}
+    obj[output_field] = phonemes
+    return json.dumps(obj, ensure_ascii=False)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert Sinhala text to phoneme strings in bulk.")
+    parser.add_argument('inputs', nargs='*',
+                        help="input files (default: stdin, '-' also means stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file (default: stdout)")
+    parser.add_argument('--format', choices=FORMATS, default='lines',
+                        help="input format (default: lines)")
+    parser.add_argument('--output-format', choices=FORMATS,
+                        help="output format (default: same as input)")
+    parser.add_argument('--column', type=int, default=0,
+                        help="TSV column holding the text (default: 0)")
+    parser.add_argument('--field', default='text',
+                        help="JSONL field holding the text (default: text)")
+    parser.add_argument('--output-field', default='phonemes',
+                        help="JSONL field for the result (default: phonemes)")
+    parser.add_argument('--separator', default='',
+                        help="string placed between phonemes (default: none)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for conversion (default: 1)")
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help="records sent to a worker at a time (default: 64)")
+    parser.add_argument('--cache-size', type=int, default=65536,
+                        help="word cache entries per converter (default: 65536)")
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help="seconds between progress reports (0 = final only)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="do not report throughput on stderr")
+    return parser
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    output_format = args.output_format or args.format
+
+    converter = SinhalaTextToPhoneme(word_cache_size=args.cache_size)
+    reporter = ThroughputReporter(interval=args.report_interval, enabled=not args.quiet)
+
+    # Each record travels through the workers alongside its text, so only
+    # the records in flight are held in memory
+    records = (((text, record), text) for text, record in
+               read_records(args.inputs, args.format, args.column, args.field, reporter))
+
+    out = (open(args.output, 'w', encoding='utf-8', newline='\n')
+           if args.output != '-' else
+           open(sys.stdout.fileno(), 'w', encoding='utf-8', newline='\n', closefd=False))
+    try:
+        results = converter.convert_batch(records, workers=args.workers,
+                                          chunksize=args.chunksize, keyed=True)
+        for (text, record), phonemes in results:
+            phoneme_string = args.separator.join(phonemes)
+            out.write(format_record(text, record, phoneme_string, args.format,
+                                    output_format, args.field, args.output_field) + '\n')
+    except BrokenPipeError:
+        return 1
+    except RecordError as e:
+        parser.error(str(e))
+    finally:
+        out.close()
+
+    reporter.report()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,162 @@
 import re
 import os
-from typing import List, Tuple, Dict
+import queue
+import itertools
+import multiprocessing
+from collections import OrderedDict, deque
+from typing import List, Tuple, Dict, Optional, Iterable, Iterator, Union, IO
+
+# Chunks each convert_batch worker may have queued ahead of the caller
+BATCH_READ_AHEAD = 2
+
+class _TrackedDict(dict):
+    """Dictionary that reports every mutation to its owner"""
+    
+    def __init__(self, data, on_change):
+        super().__init__()
+        self._on_change = on_change
+        for key, value in dict(data).items():
+            dict.__setitem__(self, key, _track(value, on_change))
+    
+    def _changed(self):
+        on_change = getattr(self, '_on_change', None)
+        if on_change:
+            on_change()
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, _track(value, getattr(self, '_on_change', None)))
+        self._changed()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, _track(value, getattr(self, '_on_change', None)))
+        self._changed()
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._changed()
+        return value
+    
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+    
+    def clear(self):
+        super().clear()
+        self._changed()
+    
+    def __reduce__(self):
+        # Pickle and copy as a plain dict; the owner re-wraps on assignment
+        return (dict, (dict(self),))
+
+def _track(value, on_change):
+    """Wrap nested dictionaries so their mutations are reported too"""
+    if isinstance(value, dict) and on_change is not None:
+        if isinstance(value, _TrackedDict) and value._on_change is on_change:
+            return value
+        return _TrackedDict(value, on_change)
+    return value
+
+class _ClusterIndex:
+    """Prefix index over consonant cluster rules.
+    
+    Rules are bucketed by their first KEY_LENGTH code points, so a lookup
+    only inspects the few rules sharing the token's prefix instead of the
+    whole table. When several rules match, the one defined first wins,
+    exactly as with a linear scan over the rule dictionary.
+    """
+    
+    KEY_LENGTH = 3
+    
+    def __init__(self, clusters: Dict[str, str]):
+        self._buckets = {}
+        key_lengths = set()
+        for order, (cluster, phoneme) in enumerate(clusters.items()):
+            key = cluster[:self.KEY_LENGTH]
+            key_lengths.add(len(key))
+            self._buckets.setdefault(key, []).append((order, cluster, phoneme))
+        # Longest keys first; shorter keys only exist for short rules
+        self._key_lengths = sorted(key_lengths, reverse=True)
+    
+    def match(self, token: str) -> Optional[Tuple[str, str]]:
+        """Return (cluster, phoneme) for the first rule that prefixes token"""
+        best = None
+        for length in self._key_lengths:
+            if length > len(token):
+                continue
+            bucket = self._buckets.get(token[:length])
+            if not bucket:
+                continue
+            for order, cluster, phoneme in bucket:
+                if best is not None and order >= best[0]:
+                    break
+                if token.startswith(cluster):
+                    best = (order, cluster, phoneme)
+                    break
+        return best[1:] if best else None
+
+class _WordCache:
+    """Bounded least-recently-used word -> phonemes cache with counters"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, word: str) -> Optional[Tuple[str, ...]]:
+        phonemes = self._entries.get(word)
+        if phonemes is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(word)
+        self.hits += 1
+        return phonemes
+    
+    def put(self, word: str, phonemes: Tuple[str, ...]):
+        self._entries[word] = phonemes
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def info(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
 
 class SinhalaTextToPhoneme:
-    def __init__(self):
+    def __init__(self, word_cache_size: int = 0):
+        """Create a converter.
+        
+        word_cache_size enables a per-instance LRU cache of up to that many
+        word -> phonemes results (0 disables it). The cache is cleared
+        whenever phoneme_system or pronunciation_rules are modified.
+        """
+        self._rules_version = 0
+        self._word_cache = _WordCache(word_cache_size) if word_cache_size > 0 else None
+        
         # Import the phoneme system from the main file
         self.phoneme_system = self._init_phoneme_system()
         
@@ -13,9 +166,58 @@ class SinhalaTextToPhoneme:
         self.sinhala_diacritics = set('ාැෑිීුූෘෲෟෳේෛෙොෝෞ')
         self.sinhala_special = set('ංඃ්')
         
-        # Contextual pronunciation rules
+        # Contextual pronunciation rules (mutations rebuild derived indexes)
+        self._cluster_index = None
+        self._cluster_index_version = -1
         self.pronunciation_rules = self._load_pronunciation_rules()
         
+        # Precompiled tokenizer built from the character inventories
+        self.compile_tokenizer()
+        
+    @property
+    def phoneme_system(self):
+        """Character -> phoneme mappings"""
+        return self._phoneme_system
+    
+    @phoneme_system.setter
+    def phoneme_system(self, mapping):
+        self._phoneme_system = _TrackedDict(mapping, self._rules_changed)
+        self._rules_changed()
+    
+    @property
+    def pronunciation_rules(self):
+        """Contextual pronunciation rule tables"""
+        return self._pronunciation_rules
+    
+    @pronunciation_rules.setter
+    def pronunciation_rules(self, rules):
+        self._pronunciation_rules = _TrackedDict(rules, self._rules_changed)
+        self._rules_changed()
+    
+    def _rules_changed(self):
+        """Invalidate everything derived from the phoneme and rule tables"""
+        self._rules_version += 1
+        if self._word_cache is not None:
+            self._word_cache.clear()
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Return word cache hit/miss/eviction counters and occupancy"""
+        if self._word_cache is None:
+            return {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 0}
+        return self._word_cache.info()
+    
+    def clear_word_cache(self):
+        """Drop all cached word conversions"""
+        if self._word_cache is not None:
+            self._word_cache.clear()
+    
+    def _get_cluster_index(self) -> _ClusterIndex:
+        """Return the cluster index, rebuilding it if the rules changed"""
+        if self._cluster_index_version != self._rules_version:
+            self._cluster_index = _ClusterIndex(self.pronunciation_rules['consonant_clusters'])
+            self._cluster_index_version = self._rules_version
+        return self._cluster_index
+    
     def _init_phoneme_system(self):
         """Initialize the phoneme system with comprehensive mappings"""
         return {
@@ -85,54 +287,37 @@ class SinhalaTextToPhoneme:
             }
         }
     
-    def tokenize_sinhala_text(self, text: str) -> List[str]:
-        """Tokenize Sinhala text into characters and character clusters"""
-        tokens = []
-        i = 0
+    def compile_tokenizer(self):
+        """Build the token state machine from the character inventories.
         
-        while i < len(text):
-            char = text[i]
-            
-            # Skip whitespace and punctuation
-            if char.isspace() or char in '.,!?;:':
-                tokens.append(char)
-                i += 1
-                continue
-            
-            # Check for consonant clusters (consonant + hal kirima + consonant)
-            if (i + 2 < len(text) and 
-                char in self.sinhala_consonants and 
-                text[i + 1] == '්' and 
-                text[i + 2] in self.sinhala_consonants):
-                
-                # Look for additional diacritics after the cluster
-                cluster = text[i:i+3]
-                j = i + 3
-                while (j < len(text) and 
-                       text[j] in self.sinhala_diacritics):
-                    cluster += text[j]
-                    j += 1
-                tokens.append(cluster)
-                i = j
-                continue
-            
-            # Check for consonant + diacritics
-            if char in self.sinhala_consonants:
-                consonant_group = char
-                j = i + 1
-                while (j < len(text) and 
-                       text[j] in self.sinhala_diacritics.union({'්'})):
-                    consonant_group += text[j]
-                    j += 1
-                tokens.append(consonant_group)
-                i = j
-                continue
-            
-            # Single character (vowel, special character, etc.)
-            tokens.append(char)
-            i += 1
+        Call this again after changing sinhala_consonants or
+        sinhala_diacritics so the tokenizer picks up the new inventory.
+        """
+        consonants = ''.join(re.escape(c) for c in sorted(self.sinhala_consonants))
+        diacritics = ''.join(re.escape(c) for c in sorted(self.sinhala_diacritics))
+        hal = re.escape('්')
         
-        return tokens
+        alternatives = []
+        if consonants:
+            # Consonant cluster (consonant + hal kirima + consonant) + diacritics
+            alternatives.append(f'[{consonants}]{hal}[{consonants}]' +
+                                (f'[{diacritics}]*' if diacritics else ''))
+            # Consonant + diacritics (including hal kirima)
+            alternatives.append(f'[{consonants}][{diacritics}{hal}]*')
+        # Anything else is a single character token
+        alternatives.append('.')
+        
+        self._token_pattern = re.compile('|'.join(alternatives), re.DOTALL)
+        # Words cached under the old inventory would tokenize differently now
+        self._rules_changed()
+    
+    def tokenize_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return (start, end) offsets of the tokens in text"""
+        return [match.span() for match in self._token_pattern.finditer(text)]
+    
+    def tokenize_sinhala_text(self, text: str) -> List[str]:
+        """Tokenize Sinhala text into characters and character clusters"""
+        return self._token_pattern.findall(text)
     
     def convert_token_to_phoneme(self, token: str, context: Dict = None) -> str:
         """Convert a single token to its phonetic representation"""
@@ -143,24 +328,25 @@ class SinhalaTextToPhoneme:
             return token
         
         # Handle consonant clusters first
-        for cluster, phoneme in self.pronunciation_rules['consonant_clusters'].items():
-            if token.startswith(cluster):
-                remaining = token[len(cluster):]
-                cluster_phoneme = phoneme
-                
-                # Handle any additional diacritics
-                if remaining:
-                    for diacritic in remaining:
-                        if diacritic in self.phoneme_system:
-                            # Modify the cluster based on the diacritic
-                            if cluster_phoneme.endswith('a') and diacritic != 'ා':
-                                cluster_phoneme = cluster_phoneme[:-1] + self.phoneme_system[diacritic]
-                            elif diacritic == 'ා':
-                                cluster_phoneme = cluster_phoneme[:-1] + 'aa'
-                            else:
-                                cluster_phoneme += self.phoneme_system[diacritic]
-                
-                return cluster_phoneme
+        cluster_match = self._get_cluster_index().match(token)
+        if cluster_match:
+            cluster, phoneme = cluster_match
+            remaining = token[len(cluster):]
+            cluster_phoneme = phoneme
+            
+            # Handle any additional diacritics
+            if remaining:
+                for diacritic in remaining:
+                    if diacritic in self.phoneme_system:
+                        # Modify the cluster based on the diacritic
+                        if cluster_phoneme.endswith('a') and diacritic != 'ා':
+                            cluster_phoneme = cluster_phoneme[:-1] + self.phoneme_system[diacritic]
+                        elif diacritic == 'ා':
+                            cluster_phoneme = cluster_phoneme[:-1] + 'aa'
+                        else:
+                            cluster_phoneme += self.phoneme_system[diacritic]
+            
+            return cluster_phoneme
         
         # Handle single vowels
         if token in self.sinhala_vowels:
@@ -232,6 +418,36 @@ class SinhalaTextToPhoneme:
         
         return modified_phonemes
     
+    def word_to_phonemes(self, word: str) -> Tuple[str, ...]:
+        """Convert a single whitespace-free word to phonemes"""
+        cache = self._word_cache
+        if cache is None:
+            return tuple(self._convert_word(word))
+        
+        phonemes = cache.get(word)
+        if phonemes is None:
+            phonemes = tuple(self._convert_word(word))
+            cache.put(word, phonemes)
+        return phonemes
+    
+    def _convert_word(self, word: str) -> List[str]:
+        """Tokenize a word, convert its tokens and apply contextual rules"""
+        tokens = self.tokenize_sinhala_text(word)
+        word_phonemes = []
+        
+        for i, token in enumerate(tokens):
+            context = {
+                'position': 'initial' if i == 0 else 'medial' if i < len(tokens) - 1 else 'final',
+                'word_length': len(tokens)
+            }
+            
+            phoneme = self.convert_token_to_phoneme(token, context)
+            if phoneme:
+                word_phonemes.append(phoneme)
+        
+        # Apply contextual rules
+        return self.apply_contextual_rules(word_phonemes, 'word_final')
+    
     def text_to_phonemes(self, text: str) -> List[str]:
         """Convert Sinhala text to phonemes"""
         words = text.split()
@@ -242,22 +458,7 @@ class SinhalaTextToPhoneme:
                 all_phonemes.append(' ')
                 continue
             
-            tokens = self.tokenize_sinhala_text(word)
-            word_phonemes = []
-            
-            for i, token in enumerate(tokens):
-                context = {
-                    'position': 'initial' if i == 0 else 'medial' if i < len(tokens) - 1 else 'final',
-                    'word_length': len(tokens)
-                }
-                
-                phoneme = self.convert_token_to_phoneme(token, context)
-                if phoneme:
-                    word_phonemes.append(phoneme)
-            
-            # Apply contextual rules
-            word_phonemes = self.apply_contextual_rules(word_phonemes, 'word_final')
-            all_phonemes.extend(word_phonemes)
+            all_phonemes.extend(self.word_to_phonemes(word))
             all_phonemes.append(' ')  # Space between words
         
         # Remove trailing space
@@ -266,10 +467,224 @@ class SinhalaTextToPhoneme:
         
         return all_phonemes
     
+    def iter_phonemes(self, text_stream: Union[str, Iterable[str], IO[str]],
+                      per_word: bool = False,
+                      chunk_size: int = 65536) -> Iterator:
+        """Convert a stream of text to phonemes incrementally.
+        
+        text_stream may be a string, any iterable of text chunks or a text
+        file object (read chunk_size characters at a time). Words split
+        across chunk boundaries are joined before conversion, so memory is
+        bounded by the chunk size plus the longest word.
+        
+        Yields the same phonemes as text_to_phonemes, including the ' '
+        between words, or one tuple of phonemes per word if per_word is set.
+        """
+        first = True
+        for word in iter_words(text_stream, chunk_size):
+            phonemes = self.word_to_phonemes(word)
+            if per_word:
+                yield phonemes
+                continue
+            if not first:
+                yield ' '
+            first = False
+            yield from phonemes
+    
+    def convert_batch(self, texts: Iterable, workers: Optional[int] = None,
+                      chunksize: int = 1, ordered: bool = True, keyed: bool = False) -> Iterator:
+        """Convert many documents across a pool of worker processes.
+        
+        Each worker builds its converter once, from a snapshot of this
+        instance's tables, and reuses it for every document it receives.
+        workers defaults to the CPU count; 0 or 1 converts in this process.
+        The input is read lazily: at most BATCH_READ_AHEAD chunks of
+        chunksize documents per worker are in flight at a time, so memory
+        stays bounded however long the input is.
+        
+        Yields phoneme lists in input order, or (index, phonemes) pairs in
+        completion order if ordered is False. If keyed is set, texts holds
+        (key, text) pairs and (key, phonemes) pairs are yielded instead;
+        keys travel to the workers and back with their texts.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        items = iter(texts) if keyed else enumerate(texts)
+        
+        if workers <= 1:
+            for key, text in items:
+                phonemes = self.text_to_phonemes(text)
+                yield (key, phonemes) if keyed or not ordered else phonemes
+            return
+        
+        cache_size = self._word_cache.maxsize if self._word_cache is not None else 0
+        window = workers * BATCH_READ_AHEAD
+        with multiprocessing.Pool(workers, initializer=_init_batch_worker,
+                                  initargs=(self._snapshot_tables(), cache_size)) as pool:
+            finished = queue.Queue()
+            pending = deque()
+            
+            def submit():
+                chunk = list(itertools.islice(items, max(1, chunksize)))
+                if not chunk:
+                    return False
+                if ordered:
+                    pending.append(pool.apply_async(_convert_batch_chunk, (chunk,)))
+                else:
+                    pending.append(None)
+                    pool.apply_async(_convert_batch_chunk, (chunk,), callback=finished.put,
+                                     error_callback=finished.put)
+                return True
+            
+            while len(pending) < window and submit():
+                pass
+            while pending:
+                if ordered:
+                    results = pending.popleft().get()
+                else:
+                    pending.popleft()
+                    results = finished.get()
+                    if isinstance(results, BaseException):
+                        raise results
+                # Refill the window before handing results to the caller
+                submit()
+                for key, phonemes in results:
+                    yield (key, phonemes) if keyed or not ordered else phonemes
+    
+    def _snapshot_tables(self) -> Dict:
+        """Plain copies of the tables needed to rebuild this converter"""
+        return {
+            'phoneme_system': dict(self.phoneme_system),
+            'pronunciation_rules': {key: dict(value) if isinstance(value, dict) else value
+                                    for key, value in self.pronunciation_rules.items()},
+            'sinhala_vowels': set(self.sinhala_vowels),
+            'sinhala_consonants': set(self.sinhala_consonants),
+            'sinhala_diacritics': set(self.sinhala_diacritics),
+            'sinhala_special': set(self.sinhala_special)
+        }
+    
+    @classmethod
+    def _from_tables(cls, tables: Dict, word_cache_size: int = 0):
+        """Rebuild a converter from a _snapshot_tables() result"""
+        converter = cls(word_cache_size=word_cache_size)
+        for name, value in tables.items():
+            setattr(converter, name, value)
+        converter.compile_tokenizer()
+        return converter
+    
     def text_to_phoneme_string(self, text: str) -> str:
         """Convert text to a single phoneme string"""
         phonemes = self.text_to_phonemes(text)
         return ''.join(phonemes)
+    
+    def reachable_phonemes(self, max_marks: int = 1) -> List[str]:
+        """Phonemes text_to_phonemes can emit for Sinhala text, up to max_marks.
+        
+        Enumerates the tokens the tokenizer can produce from the character
+        inventories: single characters, a consonant followed by up to
+        max_marks vowel signs or hal kirima, and a two-consonant cluster
+        followed by up to max_marks vowel signs. Each token is converted
+        with convert_token_to_phoneme and the result is closed under
+        apply_contextual_rules. Tokens with more marks than max_marks are
+        left out, as are spaces, punctuation and the pass-through phonemes
+        of non-Sinhala characters. Most of the result never occurs in real
+        text (about ten times the size of get_all_phonemes() at the
+        default); corpus phonemes are the practical build list.
+        """
+        consonants = sorted(self.sinhala_consonants)
+        signs = sorted(self.sinhala_diacritics)
+        
+        def with_marks(stems, marks):
+            level = list(stems)
+            for _ in range(max_marks + 1):
+                yield from level
+                level = [stem + mark for stem in level for mark in marks]
+        
+        tokens = sorted(self.sinhala_vowels | self.sinhala_special)
+        tokens.extend(with_marks(consonants, signs + ['්']))
+        tokens.extend(with_marks([c + '්' + d for c in consonants for d in consonants], signs))
+        
+        phonemes = set()
+        for token in tokens:
+            if self.tokenize_sinhala_text(token) == [token]:
+                phonemes.add(self.convert_token_to_phoneme(token))
+        phonemes = {p for p in phonemes if p and p.strip() and p not in '.,!?;:'}
+        
+        # Contextual rules only look at a phoneme, the first character of
+        # the next one and the word end, so one follower per initial suffices
+        followers = {}
+        for phoneme in sorted(phonemes):
+            followers.setdefault(phoneme[0], phoneme)
+        for phoneme in list(phonemes):
+            phonemes.update(self.apply_contextual_rules([phoneme], 'word_final'))
+            for follower in followers.values():
+                phonemes.update(self.apply_contextual_rules([phoneme, follower], 'word_final'))
+        return sorted(p for p in phonemes if p and p.strip())
+
+# Converter owned by each convert_batch worker process
+_batch_converter = None
+
+def _init_batch_worker(tables: Dict, word_cache_size: int):
+    """Build the worker's converter once when the pool starts it"""
+    global _batch_converter
+    _batch_converter = SinhalaTextToPhoneme._from_tables(tables, word_cache_size)
+
+def _convert_batch_chunk(chunk: List[Tuple]) -> List[Tuple]:
+    """Convert a chunk of (key, text) pairs in a worker process"""
+    return [(key, _batch_converter.text_to_phonemes(text)) for key, text in chunk]
+
+def _iter_chunks(text_stream, chunk_size: int) -> Iterator[str]:
+    """Yield text chunks from a string, file object or iterable of strings"""
+    if isinstance(text_stream, str):
+        yield text_stream
+        return
+    
+    read = getattr(text_stream, 'read', None)
+    if read is not None:
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        return
+    
+    yield from text_stream
+
+def iter_words(text_stream: Union[str, Iterable[str], IO[str]],
+               chunk_size: int = 65536) -> Iterator[str]:
+    """Yield whitespace-separated words from a stream of text chunks"""
+    pending = ''
+    for chunk in _iter_chunks(text_stream, chunk_size):
+        if not chunk:
+            continue
+        text = pending + chunk
+        words = text.split()
+        # A word touching the end of the chunk may continue in the next one
+        if words and not text[-1].isspace():
+            pending = words.pop()
+        else:
+            pending = ''
+        yield from words
+    
+    if pending:
+        yield pending
+
+def iter_text_chunks(text_stream: Union[str, Iterable[str], IO[str]],
+                     max_words: int = 12) -> Iterator[str]:
+    """Group words into sentence-sized chunks for incremental synthesis.
+    
+    A chunk ends after a word ending in sentence punctuation or once it
+    holds max_words words, so the first chunk of a long document is short.
+    """
+    chunk = []
+    for word in iter_words(text_stream):
+        chunk.append(word)
+        if word[-1] in '.!?;' or len(chunk) >= max_words:
+            yield ' '.join(chunk)
+            chunk = []
+    
+    if chunk:
+        yield ' '.join(chunk)
 
 def demonstrate_conversion():
     """Demonstrate the text-to-phoneme conversion"""
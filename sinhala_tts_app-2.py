@@ -16,6 +16,13 @@ try:
 except ImportError:
     GTTS_AVAILABLE = False
 
+# Optional, offline Sinhala voice built from recorded phoneme clips
+try:
+    from synthesis_engine import SynthesisEngine
+    PHONEME_ENGINE_AVAILABLE = True
+except ImportError:
+    PHONEME_ENGINE_AVAILABLE = False
+
 class SinhalaTTSApp:
     def __init__(self, root):
         self.root = root
@@ -38,6 +45,9 @@ class SinhalaTTSApp:
         # Use gTTS if available for more realistic Sinhala speech
         self.use_gtts = GTTS_AVAILABLE
         
+        # Phoneme-bank synthesizer for saving WAV files offline
+        self.phoneme_engine = self.load_phoneme_engine()
+        
     def setup_tts_engine(self):
         """Configure the TTS engine with appropriate settings"""
         try:
@@ -53,6 +63,17 @@ class SinhalaTTSApp:
         except Exception as e:
             print(f"TTS Engine setup error: {e}")
     
+    def load_phoneme_engine(self, phonemes_path="phonemes"):
+        """Create the headless phoneme-bank synthesizer if a bank is present"""
+        if not PHONEME_ENGINE_AVAILABLE or not os.path.exists(phonemes_path):
+            return None
+        try:
+            engine = SynthesisEngine(phonemes_path)
+        except Exception as e:
+            print(f"Phoneme engine setup error: {e}")
+            return None
+        return engine if len(engine.bank) else None
+    
     def load_sinhala_phonemes(self):
         """Load Sinhala character to phoneme mappings in a structured way."""
         self.phoneme_map = {
@@ -412,6 +433,8 @@ class SinhalaTTSApp:
                 if self.use_gtts:
                     tts = gTTS(text=sinhala_text, lang='si')
                     tts.save(file_path)
+                elif self.phoneme_engine:
+                    self.phoneme_engine.write_wav(sinhala_text, file_path)
                 else:
                     self.tts_engine.setProperty('rate', self.speed_var.get())
                     self.tts_engine.setProperty('volume', self.volume_var.get())
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+from typing import Callable, Dict, Optional
+from atomic_file import atomic_write
+
+DEFAULT_CACHE_DIR = 'synthesis_cache'
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+RESYNC_WRITES = 16  # writes between re-measuring the directory size
+
+def normalize_text(text: str) -> str:
+    """Canonical form of input text for cache keys: NFC, single spaces, stripped"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+class SynthesisCache:
+    """Content-addressed on-disk cache of rendered WAV files.
+
+    Files are named by the SHA-256 of the normalized text and every
+    setting that affects the audio, so a key never needs invalidating:
+    changing the bank or a setting simply produces a different key.
+    Entries are written to a temporary file and renamed into place, and a
+    hit refreshes the file's mtime, which serves as the LRU timestamp.
+    When the directory grows past max_bytes the least recently used files
+    are removed.
+
+    Several processes can share one directory: writes are atomic,
+    concurrent writers of the same key produce identical files, and
+    eviction tolerates files that another process already removed. Each
+    instance tracks the directory size from its own writes and re-measures
+    it every RESYNC_WRITES writes, so with several writers the cap can be
+    overshot by a few entries per process. Counters in info() are per
+    instance.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None  # estimated bytes on disk, measured on first write
+
+    @staticmethod
+    def make_key(text: str, sample_rate: int, word_pause: float, sentence_pause: float,
+                 speed: float, bank_version: str, extra: Optional[Dict] = None) -> str:
+        """Cache key for rendering text with the given settings"""
+        fields = {
+            'text': normalize_text(text),
+            'sample_rate': int(sample_rate),
+            'word_pause': round(float(word_pause), 4),
+            'sentence_pause': round(float(sentence_pause), 4),
+            'speed': round(float(speed), 4),
+            'bank': str(bank_version),
+            'extra': extra or {}
+        }
+        data = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.wav')
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached WAV bytes for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, wav: bytes):
+        """Store WAV bytes under key, evicting old entries if over the cap"""
+        atomic_write(self._path(key), wav)
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None or self.writes % RESYNC_WRITES == 0:
+                self._size = self.disk_size()
+            else:
+                self._size += len(wav)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """Return the cached WAV for key, rendering and storing it on a miss"""
+        wav = self.get(key)
+        if wav is None:
+            wav = render()
+            self.put(key, wav)
+        return wav
+
+    def _entries(self):
+        """(mtime, size, path) of every cached file"""
+        entries = []
+        try:
+            shards = [entry.path for entry in os.scandir(self.cache_dir) if entry.is_dir()]
+        except OSError:
+            return entries
+        for shard in shards:
+            try:
+                with os.scandir(shard) as files:
+                    for entry in files:
+                        if not entry.name.endswith('.wav'):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            except OSError:
+                continue
+        return entries
+
+    def disk_size(self) -> int:
+        """Bytes of cached WAV files currently on disk"""
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used files until under max_bytes; return count"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for _mtime, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # another process evicted it first
+            except OSError:
+                continue  # e.g. open by a reader on Windows; keep counting it
+            total -= size
+        with self._lock:
+            self.evictions += removed
+            self._size = total
+        return removed
+
+    def clear(self) -> int:
+        """Remove every cached file; return the number removed"""
+        return self.evict(0)
+
+    def info(self) -> Dict[str, float]:
+        """Hit/miss/write/eviction counters and the hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'writes': self.writes,
+                    'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,229 @@
+import io
+import os
+import math
+import wave
+import threading
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme, iter_text_chunks
+from phoneme_bank import open_phoneme_bank
+from phoneme_index import load_phoneme_index
+from phoneme_profile import load_phoneme_profile
+from phoneme_resolver import PhonemeResolver
+from audio_concat import ConcatenationEngine, write_wav
+from time_stretch import WSOLAStretcher, time_stretch
+from synthesis_cache import SynthesisCache
+
+# Per-request settings and their defaults; anything else is an engine setting
+SYNTHESIS_DEFAULTS = {
+    'sample_rate': 16000,
+    'word_pause': 0.3,
+    'sentence_pause': 0.6,
+    'speed': 1.0
+}
+
+class SynthesisEngine:
+    """Sinhala text to speech audio from a phoneme bank, without a GUI.
+
+    Wraps the phoneme converter, the audio bank and the concatenation
+    engine behind plain settings (sample_rate, word_pause, sentence_pause,
+    speed) and returns int16 arrays, PCM bytes or WAV data. Nothing here
+    imports tkinter or opens an audio device, so the engine can run on a
+    server or in worker processes.
+
+    One engine is meant to be created once and reused: clips are decoded
+    on first use and the converter keeps a word cache. Synthesis methods
+    may be called from several threads. When a SynthesisCache is given,
+    WAV renders are looked up and stored there.
+
+    If a phoneme profile is available (profile, or the
+    .phoneme_profile.json of a phonemes directory), its pin_clips most
+    frequent phonemes are loaded when the bank is opened and kept ready.
+    """
+
+    def __init__(self, phonemes_path: str = 'phonemes', cache=None,
+                 crossfade_ms: float = 8.0, trim_silence: bool = True,
+                 normalize_loudness: bool = True, word_cache_size: int = 4096,
+                 refresh_interval: Optional[float] = 2.0,
+                 converter: Optional[SinhalaTextToPhoneme] = None,
+                 profile: Optional[str] = None, pin_clips: int = 256, **defaults):
+        unknown = set(defaults) - set(SYNTHESIS_DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown synthesis settings: {', '.join(sorted(unknown))}")
+        self.defaults = dict(SYNTHESIS_DEFAULTS, **defaults)
+        self.refresh_interval = refresh_interval
+        self.cache = cache
+        self.converter = converter or SinhalaTextToPhoneme(word_cache_size=word_cache_size)
+        self.concat = ConcatenationEngine(None, self.defaults['sample_rate'], crossfade_ms,
+                                          trim_silence, normalize_loudness=normalize_loudness)
+        self.bank = None
+        self.profile_path = profile
+        self.profile = None
+        self.pin_clips = pin_clips
+        self.last_stats = {}
+        self._convert_lock = threading.Lock()
+        self.set_bank(phonemes_path)
+
+    def set_bank(self, bank):
+        """Use another phoneme bank: an open bank, a directory or a packed file"""
+        if isinstance(bank, str):
+            bank = open_phoneme_bank(bank, refresh_interval=self.refresh_interval)
+        index = None
+        if os.path.isdir(bank.phonemes_dir):
+            index = load_phoneme_index(bank.phonemes_dir)
+        self.bank = bank
+        self.resolver = PhonemeResolver(bank)
+        self.concat.bank = bank
+        self.concat.index = index
+
+        source = self.profile_path or (bank.phonemes_dir if index is not None else None)
+        self.profile = load_phoneme_profile(source) if source else None
+        hot = self.profile.top(self.pin_clips) if self.profile and self.pin_clips > 0 else []
+        self.concat.pin(hot)
+        if self.profile:
+            # Fill the fallback table for every phoneme the corpus uses
+            self.resolver.precompute(self.profile.top())
+
+    def settings(self, **overrides) -> Dict:
+        """Engine defaults with per-request overrides applied"""
+        unknown = set(overrides) - set(SYNTHESIS_DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown synthesis settings: {', '.join(sorted(unknown))}")
+        settings = dict(self.defaults)
+        settings.update((name, value) for name, value in overrides.items() if value is not None)
+        for name in SYNTHESIS_DEFAULTS:
+            if not math.isfinite(settings[name]):
+                raise ValueError(f"{name} must be a finite number")
+        if settings['speed'] <= 0:
+            raise ValueError("speed must be positive")
+        settings['sample_rate'] = int(settings['sample_rate'])
+        if settings['sample_rate'] <= 0:
+            raise ValueError("sample_rate must be positive")
+        if settings['word_pause'] < 0 or settings['sentence_pause'] < 0:
+            raise ValueError("word_pause and sentence_pause must not be negative")
+        return settings
+
+    # Text and phoneme sequences
+
+    def text_to_phonemes(self, text: str) -> List[str]:
+        """Phoneme list for text (the converter's word cache is shared)"""
+        with self._convert_lock:
+            return self.converter.text_to_phonemes(text)
+
+    def has_phoneme(self, phoneme: str) -> bool:
+        """True if the bank has a clip for phoneme"""
+        return bool(phoneme) and phoneme in self.bank
+
+    def phoneme_sequence(self, phonemes: Iterable[str], word_pause: float,
+                         sentence_pause: float) -> List[Tuple[str, Optional[float]]]:
+        """Map phonemes to (audio file, None) and ('pause', seconds) items"""
+        sequence = []
+        for phoneme in phonemes:
+            if phoneme == ' ':
+                sequence.append(('pause', word_pause))
+            elif phoneme in '.,!?;:\n':
+                sequence.append(('pause', sentence_pause))
+            else:
+                # The phoneme's own clip, or the fewest clips that spell it
+                sequence.extend((f"{unit}.wav", None) for unit in self.resolver.resolve(phoneme))
+        return sequence
+
+    # Rendering
+
+    def cache_key(self, text: str, **overrides) -> str:
+        """SynthesisCache key for text with these settings and the current bank"""
+        settings = self.settings(**overrides)
+        return SynthesisCache.make_key(text, settings['sample_rate'], settings['word_pause'],
+                                       settings['sentence_pause'], settings['speed'],
+                                       self.bank.fingerprint(), self.concat.settings_key())
+
+    def is_cached(self, text: str, **overrides) -> bool:
+        """True if a render of text with these settings is in the cache"""
+        return self.cache is not None and self.cache_key(text, **overrides) in self.cache
+
+    def _render(self, text: str, settings: Dict) -> np.ndarray:
+        sequence = self.phoneme_sequence(self.text_to_phonemes(text), settings['word_pause'],
+                                         settings['sentence_pause'])
+        samples = self.concat.render(sequence, settings['sample_rate'])
+        self.last_stats = dict(self.concat.last_stats, cached=False)
+        if settings['speed'] != 1.0:
+            samples = time_stretch(samples, settings['speed'], settings['sample_rate'])
+        return samples
+
+    def synthesize(self, text: str, **overrides) -> np.ndarray:
+        """Render text to mono int16 samples at the requested sample rate"""
+        if self.cache is not None:
+            with wave.open(io.BytesIO(self.synthesize_wav(text, **overrides)), 'rb') as w:
+                return np.frombuffer(w.readframes(w.getnframes()), dtype='<i2')
+        return self._render(text, self.settings(**overrides))
+
+    def synthesize_pcm(self, text: str, **overrides) -> bytes:
+        """Render text to raw little-endian 16-bit mono PCM"""
+        return np.ascontiguousarray(self.synthesize(text, **overrides), dtype='<i2').tobytes()
+
+    def synthesize_wav(self, text: str, **overrides) -> bytes:
+        """Render text to the bytes of a WAV file, using the cache if there is one"""
+        settings = self.settings(**overrides)
+
+        def render():
+            buffer = io.BytesIO()
+            write_wav(buffer, self._render(text, settings), settings['sample_rate'])
+            return buffer.getvalue()
+
+        if self.cache is None:
+            return render()
+        key = self.cache_key(text, **settings)
+        wav = self.cache.get(key)
+        if wav is not None:
+            self.last_stats = {'cached': True}
+            return wav
+        wav = render()
+        try:
+            self.cache.put(key, wav)
+        except OSError as e:
+            print(f"Synthesis cache error: {e}")
+        return wav
+
+    def write_wav(self, text: str, out_path: Union[str, IO[bytes]], **overrides) -> int:
+        """Write text as a WAV file or to a binary file object; return bytes written"""
+        wav = self.synthesize_wav(text, **overrides)
+        if isinstance(out_path, str):
+            with open(out_path, 'wb') as f:
+                f.write(wav)
+        else:
+            out_path.write(wav)
+        return len(wav)
+
+    def iter_chunks(self, text_stream: Union[str, Iterable[str], IO[str]],
+                    max_words: int = 12, **overrides) -> Iterator[np.ndarray]:
+        """Render text incrementally, yielding int16 blocks as they are ready.
+
+        Text is split into sentence-sized chunks (see iter_text_chunks), so
+        the first block arrives after the first sentence rather than the
+        whole text. Speed changes are applied by one streaming stretcher,
+        so the joined blocks match a single synthesize() call in length.
+        """
+        settings = self.settings(**overrides)
+        rendered = (self.render_chunk(chunk, settings, index > 0)
+                    for index, chunk in enumerate(iter_text_chunks(text_stream, max_words)))
+        return self.stretch_blocks(rendered, settings)
+
+    def render_chunk(self, chunk: str, settings: Dict, follows: bool = False) -> np.ndarray:
+        """One chunk of iter_chunks at normal speed; follows adds the pause before it"""
+        sequence = self.phoneme_sequence(self.text_to_phonemes(chunk), settings['word_pause'],
+                                         settings['sentence_pause'])
+        if follows:
+            sequence.insert(0, ('pause', settings['word_pause']))
+        return self.concat.render(sequence, settings['sample_rate'])
+
+    @staticmethod
+    def stretch_blocks(rendered: Iterable[np.ndarray], settings: Dict) -> Iterator[np.ndarray]:
+        """Apply settings['speed'] to consecutive rendered chunks with one stretcher"""
+        stretcher = WSOLAStretcher(settings['speed'], settings['sample_rate'])
+        for samples in rendered:
+            samples = stretcher.process(samples)
+            if len(samples):
+                yield samples
+        samples = stretcher.flush()
+        if len(samples):
+            yield samples
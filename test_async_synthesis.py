@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio synthesis API
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+from async_synthesis import AsyncSynthesizer
+from synthesis_engine import SynthesisEngine
+from synthesis_cache import SynthesisCache
+from test_synthesis_engine import make_bank, TEXT
+
+def test_async_results_match_engine():
+    """Async synthesis returns the same WAV as the synchronous engine"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        engine = SynthesisEngine(tmp, cache=SynthesisCache(os.path.join(tmp, 'cache')),
+                                 sample_rate=8000)
+        expected = SynthesisEngine(tmp, sample_rate=8000).synthesize_wav(TEXT, speed=1.3)
+
+        async def run():
+            async with AsyncSynthesizer(engine) as synthesizer:
+                assert await synthesizer.phonemize("ගම") == ['ga', 'ma']
+                assert await synthesizer.synthesize(TEXT, speed=1.3) == expected
+                assert engine.is_cached(TEXT, speed=1.3)
+                assert await synthesizer.synthesize(TEXT, speed=1.3) == expected
+
+                # Many concurrent requests on one loop
+                results = await asyncio.gather(*(synthesizer.synthesize(TEXT, word_pause=0.1 + i / 1000)
+                                                 for i in range(100)))
+                assert len(set(results)) == 100
+
+                blocks = [block async for block in synthesizer.iter_chunks(TEXT, max_words=1)]
+                assert len(blocks) == 3
+        asyncio.run(run())
+
+        # An unwritable cache directory does not fail synthesis
+        blocked = os.path.join(tmp, 'blocked')
+        open(blocked, 'w').close()
+        engine = SynthesisEngine(tmp, cache=SynthesisCache(blocked), sample_rate=8000)
+
+        async def run_blocked():
+            async with AsyncSynthesizer(engine) as synthesizer:
+                assert await synthesizer.synthesize(TEXT, speed=1.3) == expected
+        asyncio.run(run_blocked())
+
+def test_cancellation_stops_within_one_chunk():
+    """Cancelling a synthesis task stops rendering after the current chunk"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        engine = SynthesisEngine(tmp, sample_rate=8000)
+        rendered = []
+        render = engine.concat.render
+
+        def slow_render(sequence, sample_rate=None):
+            rendered.append(time.monotonic())
+            time.sleep(0.02)
+            return render(sequence, sample_rate)
+        engine.concat.render = slow_render
+
+        async def run():
+            synthesizer = AsyncSynthesizer(engine)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            ticking = asyncio.ensure_future(ticker())
+            task = asyncio.ensure_future(synthesizer.synthesize(' '.join(['ගම'] * 100)))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            try:
+                await task
+                assert False, "the task should have been cancelled"
+            except asyncio.CancelledError:
+                pass
+            cancelled_at = time.monotonic()
+            await asyncio.sleep(0.2)
+            ticking.cancel()
+            synthesizer.close()
+
+            # At most the chunk already running started before cancellation
+            assert 0 < len(rendered) < 9  # 100 words make 9 chunks
+            assert [t for t in rendered if t > cancelled_at] == []
+            # The event loop kept running while chunks rendered
+            assert ticks >= 20
+        asyncio.run(run())
+
+def main():
+    """Run all async synthesis tests"""
+    test_async_results_match_engine()
+    test_cancellation_stops_within_one_chunk()
+    print("All async synthesis tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the NumPy concatenation engine
+"""
+
+import io
+import os
+import tempfile
+import wave
+import numpy as np
+from phoneme_bank import PhonemeAudioBank
+from audio_concat import ConcatenationEngine, convert_pcm, find_trim_bounds
+from test_phoneme_bank import write_wav
+
+def test_render_preallocates_clips_and_pauses():
+    """Clips and pauses land at the right offsets in one buffer"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), np.array([1, 2, 3], '<i2').tobytes(), 1000)
+        write_wav(os.path.join(tmp, 'ma.wav'), np.array([4], '<i2').tobytes(), 1000)
+        engine = ConcatenationEngine(PhonemeAudioBank(tmp, refresh_interval=None), 1000,
+                                     crossfade_ms=0, trim_silence=False)
+
+        sequence = [('ka.wav', None), ('pause', 0.002), ('missing.wav', None), ('ma.wav', None)]
+        samples = engine.render(sequence)
+        assert samples.dtype == np.int16
+        assert samples.tolist() == [1, 2, 3, 0, 0, 4]
+
+        out = io.BytesIO()
+        assert engine.write_wav(sequence, out) == 6
+        out.seek(0)
+        with wave.open(out, 'rb') as w:
+            assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, 1000)
+            assert np.frombuffer(w.readframes(6), '<i2').tolist() == [1, 2, 3, 0, 0, 4]
+
+def test_crossfade_overlaps_adjacent_clips():
+    """Adjacent clips overlap by the crossfade and edges are ramped"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), np.full(10, 1000, '<i2').tobytes(), 1000)
+        write_wav(os.path.join(tmp, 'ma.wav'), np.full(10, 1000, '<i2').tobytes(), 1000)
+        engine = ConcatenationEngine(PhonemeAudioBank(tmp, refresh_interval=None), 1000,
+                                     crossfade_ms=4, trim_silence=False)
+
+        samples = engine.render([('ka.wav', None), ('ma.wav', None), ('pause', 0.003), ('ma.wav', None)])
+        assert len(samples) == 10 + 10 - 4 + 3 + 10
+        # Equal-level clips crossfade without a dip or a bump
+        assert samples[6:10].tolist() == [1000] * 4
+        assert samples[0] < samples[3] < 1000 and samples[15] < samples[12] < 1000
+        assert samples[16:19].tolist() == [0, 0, 0]
+        assert samples[19] < 1000 and samples[-1] < 1000
+        assert engine.last_stats['clips'] == 3 and engine.last_stats['joins'] == 5
+
+def test_trim_removes_leading_and_trailing_silence():
+    """Quiet edges are cut once per clip, keeping the padding"""
+    samples = np.array([0, 5, 0, 900, -700, 20, 0, 0], '<i2')
+    assert find_trim_bounds(samples, 100) == (3, 5)
+    assert find_trim_bounds(samples, 100, padding=2) == (1, 7)
+    assert find_trim_bounds(np.zeros(4, '<i2'), 100) == (0, 4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), samples.tobytes(), 1000)
+        engine = ConcatenationEngine(PhonemeAudioBank(tmp, refresh_interval=None), 1000,
+                                     crossfade_ms=0, silence_threshold=100, trim_padding_ms=0)
+        assert engine.render([('ka.wav', None)]).tolist() == [900, -700]
+
+def test_convert_pcm_formats():
+    """Mismatched widths, channels and rates convert to mono int16"""
+    assert convert_pcm(bytes([128, 255, 0]), 1, 1, 8000, 8000).tolist() == [0, 127 << 8, -128 << 8]
+    assert convert_pcm(b'\x00\x01\x00\x00\x00\xff', 3, 1, 8000, 8000).tolist() == [1, -256]
+    assert convert_pcm(np.array([1 << 16, -(1 << 20)], '<i4').tobytes(), 4, 1, 8000, 8000).tolist() == [1, -16]
+    assert convert_pcm(np.array([10, 30, -10, -30], '<i2').tobytes(), 2, 2, 8000, 8000).tolist() == [20, -20]
+
+    upsampled = convert_pcm(np.array([0, 100], '<i2').tobytes(), 2, 1, 8000, 16000)
+    assert upsampled.tolist() == [0, 50, 100, 100]
+    downsampled = convert_pcm(np.arange(8, dtype='<i2').tobytes(), 2, 1, 16000, 8000)
+    assert downsampled.tolist() == [0, 2, 4, 6]
+
+def main():
+    """Run all concatenation engine tests"""
+    test_render_preallocates_clips_and_pauses()
+    test_crossfade_overlaps_adjacent_clips()
+    test_trim_removes_leading_and_trailing_silence()
+    test_convert_pcm_formats()
+    print("All concatenation tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for background tasks that deliver results to a UI thread
+"""
+
+import time
+import threading
+from background_task import BackgroundTask
+
+def run_loop(task, timeout=5.0):
+    """Start a task and run its scheduled callbacks like a Tk event loop would"""
+    pending = []
+    task.schedule = lambda delay, callback: pending.append(callback)
+    main_thread = threading.get_ident()
+    task.start()
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.001)
+        pending.pop(0)()
+        assert threading.get_ident() == main_thread
+    assert not pending, "the task did not finish"
+
+def test_batches_progress_and_result():
+    """Emitted items arrive in order, in bounded batches, followed by on_finish"""
+    batches, progress, finished = [], [], []
+
+    def work(task):
+        for i in range(1234):
+            task.emit(i)
+            task.progress(i + 1, 1234)
+        return 'result'
+
+    task = BackgroundTask(work, None, on_batch=batches.append,
+                          on_progress=lambda done, total: progress.append(done),
+                          on_finish=finished.append, batch_size=100, interval_ms=1)
+    run_loop(task)
+    assert [item for batch in batches for item in batch] == list(range(1234))
+    assert max(map(len, batches)) <= 100
+    assert progress == sorted(progress) and progress[-1] == 1234
+    assert finished == [task] and task.state == 'done' and task.result == 'result'
+
+    failing = BackgroundTask(lambda task: 1 / 0, None, on_finish=finished.append)
+    run_loop(failing)
+    assert failing.state == 'error' and isinstance(failing.error, ZeroDivisionError)
+
+def test_cancel_stops_work_and_batches():
+    """After cancel() the worker stops at its next check and no batches follow"""
+    batches, finished = [], []
+    started = threading.Event()
+    steps = []
+
+    def work(task):
+        started.set()
+        while True:
+            task.check()
+            steps.append(1)
+            task.emit(len(steps))
+            time.sleep(0.001)
+
+    task = BackgroundTask(work, None, on_batch=batches.append, on_finish=finished.append,
+                          interval_ms=1)
+    canceller = threading.Thread(target=lambda: (started.wait(), time.sleep(0.05), task.cancel()))
+    canceller.start()
+    run_loop(task)
+    canceller.join()
+    assert task.wait(1.0)
+    assert finished == [task] and task.state == 'cancelled'
+    delivered = len(steps)
+    time.sleep(0.02)
+    assert len(steps) == delivered
+    assert sum(map(len, batches)) <= delivered
+
+def main():
+    """Run all background task tests"""
+    test_batches_progress_and_result()
+    test_cancel_stops_work_and_batches()
+    print("All background task tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel phoneme-bank builder
+"""
+
+import os
+import tempfile
+import threading
+from generate_phoneme import (ToneBackend, build_phoneme_bank, load_build_manifest,
+                              SinhalaPhonemeSystem, corpus_phonemes, phoneme_inventory_diff,
+                              prioritize_phonemes)
+from phoneme_profile import PhonemeProfile
+from phoneme_bank import PhonemeAudioBank
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+
+class CountingBackend(ToneBackend):
+    """Tone backend that records calls and fails on request"""
+
+    def __init__(self, failures=None):
+        super().__init__(sample_rate=8000, duration=0.05)
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def synthesize(self, phoneme):
+        with self.lock:
+            self.calls.append(phoneme)
+            if self.failures.get(phoneme, 0) > 0:
+                self.failures[phoneme] -= 1
+                raise ConnectionError(f"transient failure for {phoneme}")
+        return super().synthesize(phoneme)
+
+def test_tone_backend_builds_a_loadable_bank():
+    """The offline backend writes deterministic clips the bank can load"""
+    phonemes = SinhalaPhonemeSystem().get_all_phonemes()[:40]
+    with tempfile.TemporaryDirectory() as tmp:
+        progress = []
+        stats = build_phoneme_bank(phonemes, tmp, ToneBackend(8000), workers=4, progress=progress.append)
+        assert stats['generated'] == 40 and stats['failed'] == 0
+        assert [s['done'] for s in progress] == list(range(1, 41)) and progress[-1]['rate'] > 0
+        bank = PhonemeAudioBank(tmp)
+        assert sorted(bank.phonemes()) == sorted(phonemes)
+        assert bank.get(phonemes[0]).pcm != bank.get(phonemes[1]).pcm
+        assert ToneBackend(8000).synthesize('ka') == ToneBackend(8000).synthesize('ka')
+        assert not [name for name in os.listdir(tmp) if name.endswith('.tmp')]
+
+def test_rerun_skips_completed_phonemes():
+    """A second build only synthesizes what is missing or was removed"""
+    phonemes = ['a', 'ka', 'ga', 'ma', 'na']
+    with tempfile.TemporaryDirectory() as tmp:
+        build_phoneme_bank(phonemes[:3], tmp, CountingBackend(), workers=2)
+        os.remove(os.path.join(tmp, 'ka.wav'))
+
+        backend = CountingBackend()
+        stats = build_phoneme_bank(phonemes, tmp, backend, workers=2)
+        assert sorted(backend.calls) == ['ka', 'ma', 'na']
+        assert stats['skipped'] == 2 and stats['generated'] == 3
+        assert sorted(load_build_manifest(tmp)['completed']) == sorted(phonemes)
+
+        backend = CountingBackend()
+        build_phoneme_bank(phonemes, tmp, backend, force=True)
+        assert sorted(backend.calls) == sorted(phonemes)
+
+def test_retries_and_failures_are_recorded():
+    """Transient errors are retried; exhausted phonemes are retried next run"""
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = CountingBackend({'ka': 2, 'ga': 5})
+        stats = build_phoneme_bank(['a', 'ka', 'ga'], tmp, backend, workers=3, retries=2, backoff=0)
+        assert stats['generated'] == 2 and stats['failed'] == 1 and stats['retries'] == 2
+        assert backend.calls.count('ka') == 3 and backend.calls.count('ga') == 3
+        manifest = load_build_manifest(tmp)
+        assert 'ConnectionError' in manifest['failed']['ga'] and 'ga' not in manifest['completed']
+        assert not os.path.exists(os.path.join(tmp, 'ga.wav'))
+
+        stats = build_phoneme_bank(['a', 'ka', 'ga'], tmp, backend, retries=2, backoff=0)
+        assert stats['generated'] == 1 and stats['skipped'] == 2
+        assert load_build_manifest(tmp)['failed'] == {}
+
+def test_corpus_phonemes_and_inventory_diff():
+    """Corpus phonemes come most frequent first and are diffed against the inventory"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("ගම ගම කතා.\nඅම්මා, ගම! 2024\n")
+        phonemes = corpus_phonemes([path])
+        assert phonemes[:2] == ['ga', 'ma'] and set(phonemes) == {'ga', 'ma', 'ka', 'thaa', 'a', 'mmaaa'}
+        assert set(phonemes) <= set(SinhalaTextToPhoneme().reachable_phonemes())
+
+        diff = phoneme_inventory_diff(phonemes, SinhalaPhonemeSystem().get_all_phonemes())
+        assert diff['missing'] == ['mmaaa'] and len(diff['shared']) == 5
+        assert 'ga' not in diff['unused'] and 'kra' in diff['unused']
+
+def test_profile_orders_the_build():
+    """The most frequent phonemes are synthesized first"""
+    profile = PhonemeProfile()
+    profile.add_text("කතා කතා කතා ගම ගම")
+    assert prioritize_phonemes(['a', 'ga', 'ma', 'ka', 'thaa', 'i'], profile) == ['ka', 'thaa', 'ga', 'ma', 'a', 'i']
+    assert prioritize_phonemes(['a', 'ga', 'ka'], profile, top=2) == ['ka', 'ga']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = CountingBackend()
+        build_phoneme_bank(prioritize_phonemes(['a', 'ga', 'ka'], profile), tmp, backend, workers=1)
+        assert backend.calls == ['ka', 'ga', 'a']
+
+def main():
+    """Run all phoneme builder tests"""
+    test_tone_backend_builds_a_loadable_bank()
+    test_rerun_skips_completed_phonemes()
+    test_retries_and_failures_are_recorded()
+    test_corpus_phonemes_and_inventory_diff()
+    test_profile_orders_the_build()
+    print("All phoneme builder tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
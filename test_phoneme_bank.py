@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the directory and packed phoneme audio banks
+"""
+
+import os
+import tempfile
+import wave
+from phoneme_bank import (PhonemeAudioBank, PackedPhonemeBank, pack_phoneme_dir,
+                          open_phoneme_bank)
+
+def write_wav(path, pcm, sample_rate=16000, sample_width=2, channels=1):
+    """Write raw PCM bytes as a WAV file"""
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+
+def test_bank_serves_clips_from_memory():
+    """Clips are decoded once and returned as shared memoryviews"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), b'\x01\x00\x02\x00')
+        write_wav(os.path.join(tmp, 'ma.wav'), b'\x03\x00')
+        bank = PhonemeAudioBank(tmp, refresh_interval=None)
+
+        assert bank.phonemes() == ['ka', 'ma'] and 'ka' in bank and 'ga' not in bank
+        assert bank.memory_size() == 0
+
+        clip = bank.get('ka')
+        assert isinstance(clip.pcm, memoryview) and bytes(clip.pcm) == b'\x01\x00\x02\x00'
+        assert clip.params.framerate == 16000
+        assert bank.get('ka').pcm is clip.pcm
+        assert bank.get('ga') is None
+
+        assert bank.load_all() == 2
+        assert bank.memory_size() == 6
+
+def test_bank_refreshes_changed_files():
+    """Rewritten, added and removed files are picked up on refresh"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ka.wav')
+        write_wav(path, b'\x01\x00')
+        bank = PhonemeAudioBank(tmp, refresh_interval=0)
+        assert bytes(bank.get('ka').pcm) == b'\x01\x00'
+        version = bank.version
+
+        write_wav(path, b'\x05\x00\x06\x00')
+        os.utime(path, ns=(1, 1))
+        write_wav(os.path.join(tmp, 'ga.wav'), b'\x07\x00')
+        assert bytes(bank.get('ka').pcm) == b'\x05\x00\x06\x00'
+        assert 'ga' in bank and bank.version > version
+
+        os.remove(path)
+        assert bank.get('ka') is None and bank.phonemes() == ['ga']
+
+def test_packed_bank_round_trip():
+    """A packed bank serves the same clips as the directory it came from"""
+    with tempfile.TemporaryDirectory() as tmp:
+        phonemes_dir = os.path.join(tmp, 'phonemes')
+        os.makedirs(phonemes_dir)
+        write_wav(os.path.join(phonemes_dir, 'ka.wav'), b'\x01\x00\x02\x00')
+        write_wav(os.path.join(phonemes_dir, 'අ.wav'), b'\x03\x00\x04\x00', sample_rate=8000)
+        write_wav(os.path.join(phonemes_dir, 'st.wav'), b'\x05\x06', sample_width=1, channels=2)
+
+        bank_path = os.path.join(tmp, 'phonemes.phbank')
+        assert pack_phoneme_dir(phonemes_dir, bank_path) == 3
+
+        directory = open_phoneme_bank(phonemes_dir)
+        packed = open_phoneme_bank(bank_path)
+        assert isinstance(directory, PhonemeAudioBank)
+        assert isinstance(packed, PackedPhonemeBank)
+        assert packed.phonemes() == directory.phonemes() and len(packed) == 3
+
+        for phoneme in directory.phonemes():
+            expected = directory.get(phoneme)
+            clip = packed.get(phoneme)
+            assert bytes(clip.pcm) == bytes(expected.pcm)
+            assert tuple(clip.params)[:4] == tuple(expected.params)[:4]
+        assert packed.get('ga') is None and 'ga' not in packed
+        packed.close()
+
+def main():
+    """Run all phoneme bank tests"""
+    test_bank_serves_clips_from_memory()
+    test_bank_refreshes_changed_files()
+    test_packed_bank_round_trip()
+    print("All phoneme bank tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the phoneme trim/loudness sidecar index
+"""
+
+import os
+import tempfile
+import threading
+import numpy as np
+from phoneme_bank import PhonemeAudioBank
+from phoneme_index import analyze_clip, build_phoneme_index, load_phoneme_index
+from audio_concat import ConcatenationEngine
+from test_phoneme_bank import write_wav
+
+SETTINGS = {'silence_threshold': 100, 'trim_padding_ms': 0, 'target_rms': 2000}
+
+def test_analyze_clip_measures_trim_and_gain():
+    """Trim offsets, loudness and gain come from the non-silent part"""
+    pcm = np.array([0, 10, 1000, -1000, 1000, 0], '<i2').tobytes()
+    analysis = analyze_clip(pcm, 2, 1, 1000, SETTINGS)
+    assert (analysis.start, analysis.end, analysis.peak) == (2, 5, 1000)
+    assert analysis.rms == 1000 and analysis.gain == 2.0
+    assert analysis.duration == 0.003
+
+    # Gain never pushes the peak past the limit
+    loud = analyze_clip(np.array([30000, 100], '<i2').tobytes(), 2, 1, 1000, SETTINGS)
+    assert loud.gain * loud.peak <= 32000
+
+def test_index_is_incremental():
+    """Only new or changed files are analyzed again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), np.array([0, 500, 0], '<i2').tobytes(), 1000)
+        write_wav(os.path.join(tmp, 'ma.wav'), np.array([900, 0], '<i2').tobytes(), 1000)
+        _index, stats = build_phoneme_index(tmp, SETTINGS)
+        assert (stats['analyzed'], stats['reused'], stats['removed']) == (2, 0, 0)
+
+        ka = os.path.join(tmp, 'ka.wav')
+        write_wav(ka, np.array([0, 0, 700, 0], '<i2').tobytes(), 1000)
+        os.utime(ka, ns=(1, 1))
+        os.remove(os.path.join(tmp, 'ma.wav'))
+        write_wav(os.path.join(tmp, 'ga.wav'), np.array([300], '<i2').tobytes(), 1000)
+        index, stats = build_phoneme_index(tmp, SETTINGS)
+        assert (stats['analyzed'], stats['reused'], stats['removed']) == (2, 0, 1)
+
+        _index, stats = build_phoneme_index(tmp, SETTINGS)
+        assert (stats['analyzed'], stats['reused']) == (0, 2)
+        _index, stats = build_phoneme_index(tmp, dict(SETTINGS, target_rms=1000))
+        assert stats['analyzed'] == 2
+
+        # A cancelled build leaves the sidecar as it was
+        progress, cancel = [], threading.Event()
+        cancel.set()
+        assert build_phoneme_index(tmp, SETTINGS, cancel=cancel) is None
+        assert load_phoneme_index(tmp).settings['target_rms'] == 1000
+        build_phoneme_index(tmp, SETTINGS, progress=lambda done, total: progress.append((done, total)))
+        assert progress == [(0, 2), (2, 2)]
+
+        stat = os.stat(ka)
+        assert index.lookup('ka', stat.st_size, stat.st_mtime_ns).start == 2
+        assert index.lookup('ka', stat.st_size, stat.st_mtime_ns + 1) is None
+
+def test_engine_applies_index():
+    """The engine slices and scales clips using up-to-date index entries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ka.wav')
+        write_wav(path, np.array([0, 0, 1000, -1000, 0], '<i2').tobytes(), 1000)
+        bank = PhonemeAudioBank(tmp, refresh_interval=0)
+        engine = ConcatenationEngine(bank, 1000, crossfade_ms=0, silence_threshold=100,
+                                     trim_padding_ms=0, index=load_phoneme_index(tmp))
+        # Without an index entry the engine trims at render time
+        assert engine.render([('ka.wav', None)]).tolist() == [1000, -1000]
+
+        build_phoneme_index(tmp, SETTINGS)
+        assert engine.render([('ka.wav', None)]).tolist() == [2000, -2000]
+        engine.normalize_loudness = False
+        assert engine.render([('ka.wav', None)]).tolist() == [1000, -1000]
+
+        # A rewritten clip is not scaled by its stale entry
+        engine.normalize_loudness = True
+        write_wav(path, np.array([500, 0], '<i2').tobytes(), 1000)
+        os.utime(path, ns=(1, 1))
+        assert engine.render([('ka.wav', None)]).tolist() == [500]
+
+def main():
+    """Run all phoneme index tests"""
+    test_analyze_clip_measures_trim_and_gain()
+    test_index_is_incremental()
+    test_engine_applies_index()
+    print("All phoneme index tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached phoneme directory inventory
+"""
+
+import os
+import tempfile
+from phoneme_inventory import PhonemeInventory, phoneme_inventory
+from phoneme_bank import PhonemeAudioBank
+from test_phoneme_bank import write_wav
+
+def age_directory(path):
+    """Move the directory mtime out of the racy window, as for a bank made long ago"""
+    os.utime(path, ns=(10**18, 10**18))
+
+def test_unchanged_directory_is_not_rescanned():
+    """Refreshing costs one directory stat until the directory changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(50):
+            write_wav(os.path.join(tmp, f"p{i}.wav"), b'\x01\x00' * (i + 1))
+        age_directory(tmp)
+        inventory = PhonemeInventory(tmp, rescan_interval=None)
+        assert inventory.refresh() and len(inventory) == 50 and inventory.scans == 1
+        assert inventory.stat('p3') == (os.path.getsize(os.path.join(tmp, 'p3.wav')),
+                                        os.stat(os.path.join(tmp, 'p3.wav')).st_mtime_ns)
+
+        for _ in range(100):
+            assert not inventory.refresh()
+        assert inventory.scans == 1
+
+        # Adding and removing files changes the directory mtime
+        write_wav(os.path.join(tmp, 'ka.wav'), b'\x01\x00')
+        os.remove(os.path.join(tmp, 'p0.wav'))
+        assert inventory.refresh() and 'ka' in inventory and 'p0' not in inventory
+        age_directory(tmp)
+        inventory.refresh()
+        scans = inventory.scans
+        assert not inventory.refresh() and inventory.scans == scans
+
+        # An in-place rewrite is found by a forced or periodic rescan
+        write_wav(os.path.join(tmp, 'ka.wav'), b'\x01\x00\x02\x00')
+        assert not inventory.refresh()
+        inventory.rescan_interval = 0
+        assert inventory.refresh() and inventory.stat('ka')[0] == os.path.getsize(os.path.join(tmp, 'ka.wav'))
+
+def test_banks_share_the_directory_inventory():
+    """Banks of one directory share a scan, and refreshing them does not re-stat clips"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_wav(os.path.join(tmp, 'ka.wav'), b'\x01\x00')
+        write_wav(os.path.join(tmp, 'ma.wav'), b'\x02\x00')
+        age_directory(tmp)
+        first = PhonemeAudioBank(tmp, refresh_interval=0)
+        second = PhonemeAudioBank(os.path.join(tmp, '.'), refresh_interval=0)
+        assert first.inventory is second.inventory is phoneme_inventory(tmp)
+
+        scans = first.inventory.scans
+        for _ in range(100):
+            assert len(first) == 2 and second.phonemes() == ['ka', 'ma']
+            assert first.file_size('ka') == os.path.getsize(os.path.join(tmp, 'ka.wav'))
+        assert first.inventory.scans == scans
+
+        write_wav(os.path.join(tmp, 'ga.wav'), b'\x03\x00')
+        assert 'ga' in first and 'ga' in second and bytes(second.get('ga').pcm) == b'\x03\x00'
+
+def main():
+    """Run all phoneme inventory tests"""
+    test_unchanged_directory_is_not_rescanned()
+    test_banks_share_the_directory_inventory()
+    print("All phoneme inventory tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the corpus phoneme profile and clip pinning
+"""
+
+import os
+import io
+import tempfile
+from collections import Counter
+from phoneme_profile import PhonemeProfile, profile_corpus, phoneme_profile_path, load_phoneme_profile
+from phoneme_bank import pack_phoneme_dir
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+from synthesis_engine import SynthesisEngine
+from test_synthesis_engine import make_bank
+from test_phoneme_bank import write_wav
+
+CORPUS = "අම්මා ගම ගිය. ගම කතා!\nඅම්මා ගෙදර ගම " * 3
+
+def test_profile_counts_match_conversion():
+    """Batched, streamed counting equals converting the text directly"""
+    converter = SinhalaTextToPhoneme()
+    expected = Counter(p for p in converter.text_to_phonemes(CORPUS) if p.isalpha())
+
+    profile = PhonemeProfile(batch_words=2)
+    profile.add_text(io.StringIO(CORPUS), converter)
+    assert profile.counts['phonemes'] == expected and profile.words == len(CORPUS.split())
+    assert profile.top(2) == ['ga', 'ma'] and profile.coverage(len(expected)) == 1.0
+    assert profile.counts['clusters'] == Counter({'ම්ම': 6})
+    assert profile.counts['tokens']['ම්මා'] == 6 and '.' not in profile.counts['tokens']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for number, part in enumerate(CORPUS.split('\n')):
+            paths.append(os.path.join(tmp, f"part{number}.txt"))
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                f.write(part)
+        first, second = profile_corpus(paths[:2]), profile_corpus(paths[2:])
+        merged = first.merge(second)
+        assert merged.counts == profile.counts and merged.words == profile.words
+
+        merged.save(phoneme_profile_path(tmp))
+        loaded = load_phoneme_profile(tmp)
+        assert loaded.counts == profile.counts and len(loaded.sources) == len(paths)
+        assert load_phoneme_profile(os.path.join(tmp, 'missing')) is None
+
+def test_engine_pins_hottest_clips():
+    """The engine prepares profiled clips up front and again after bank changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        profile = PhonemeProfile()
+        profile.add_text("ගම ගම කතා")
+        profile.save(phoneme_profile_path(tmp))
+
+        engine = SynthesisEngine(tmp, sample_rate=8000, pin_clips=2, refresh_interval=0)
+        cached = lambda: {key[0] for key in engine.concat._converted}
+        assert engine.concat.pinned == ['ga', 'ma'] and cached() == {'ga', 'ma'}
+
+        write_wav(os.path.join(tmp, 'ga.wav'), b'\x10\x00' * 300, 8000)
+        engine.synthesize("කතා")
+        assert cached() == {'ga', 'ma', 'ka', 'thaa'}
+        assert len(engine.concat._clip_samples('ga', 8000)) < 400
+
+        # Pinned clips from a memory-mapped bank are copied into memory
+        packed = os.path.join(tmp, 'bank.phbank')
+        pack_phoneme_dir(tmp, packed)
+        engine = SynthesisEngine(packed, sample_rate=8000, profile=phoneme_profile_path(tmp))
+        assert engine.concat.pinned == ['ga', 'ma', 'ka', 'thaa']
+        assert all(samples.flags.owndata for samples in engine.concat._converted.values())
+        assert SynthesisEngine(packed, sample_rate=8000).concat.pinned == []
+
+def main():
+    """Run all phoneme profile tests"""
+    test_profile_counts_match_conversion()
+    test_engine_pins_hottest_clips()
+    print("All phoneme profile tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the missing-phoneme fallback resolver
+"""
+
+import os
+import random
+import tempfile
+from phoneme_resolver import PhonemeResolver
+from phoneme_bank import PhonemeAudioBank
+from synthesis_engine import SynthesisEngine
+from test_synthesis_engine import make_bank
+from test_phoneme_bank import write_wav
+
+class ListBank:
+    """Minimal bank exposing only an inventory and a version"""
+
+    def __init__(self, phonemes):
+        self._phonemes = sorted(phonemes)
+        self.version = 0
+
+    def refresh(self):
+        return False
+
+    def phonemes(self):
+        return self._phonemes
+
+def best_cover(phoneme, inventory):
+    """(characters dropped, pieces) of the cheapest cover, by exhaustive search"""
+    if not phoneme:
+        return (0, 0)
+    options = [(best_cover(phoneme[1:], inventory)[0] + 1, best_cover(phoneme[1:], inventory)[1])]
+    for end in range(1, len(phoneme) + 1):
+        if phoneme[:end] in inventory:
+            dropped, pieces = best_cover(phoneme[end:], inventory)
+            options.append((dropped, pieces + 1))
+    return min(options)
+
+def test_decomposition_is_minimal():
+    """Resolved pieces are in the bank, in order, and as few as possible"""
+    resolver = PhonemeResolver(ListBank(['th', 'thr', 'r', 'aa', 'a', 'k', 'ka']))
+    assert resolver.resolve('thraa') == ('thr', 'aa')
+    assert resolver.resolve('kaa') == ('ka', 'a')
+    assert resolver.resolve('ka') == ('ka',)
+    assert resolver.resolve('xkz') == ('k',) and resolver.resolve('zz') == ()
+
+    rng = random.Random(0)
+    for _ in range(200):
+        inventory = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 3))) for _ in range(4)}
+        resolver = PhonemeResolver(ListBank(inventory))
+        phoneme = ''.join(rng.choice('abcd') for _ in range(rng.randint(1, 8)))
+        units = resolver.resolve(phoneme)
+        assert all(unit in inventory for unit in units)
+        remaining = phoneme
+        for unit in units:  # pieces appear in order in the phoneme
+            remaining = remaining[remaining.index(unit) + len(unit):]
+        assert (len(phoneme) - sum(map(len, units)), len(units)) == best_cover(phoneme, inventory)
+
+def test_table_rebuilt_when_bank_changes():
+    """Results are memoized until a clip is added or removed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        resolver = PhonemeResolver(PhonemeAudioBank(tmp, refresh_interval=0))
+        assert resolver.resolve('gamaka') == ('ga', 'ma', 'ka')
+        decompose = resolver._decompose
+        resolver._decompose = None  # a memoized lookup must not decompose again
+        assert resolver.resolve('gamaka') == ('ga', 'ma', 'ka')
+        resolver._decompose = decompose
+
+        write_wav(os.path.join(tmp, 'gama.wav'), b'\x00\x10' * 100, 8000)
+        assert resolver.resolve('gamaka') == ('gama', 'ka')
+        os.remove(os.path.join(tmp, 'gama.wav'))
+        assert resolver.resolve('gamaka') == ('ga', 'ma', 'ka')
+        assert resolver.info() == {'inventory': 4, 'resolved': 1, 'fallbacks': 1}
+
+def test_engine_spells_missing_phonemes():
+    """The engine voices a missing phoneme with the clips that spell it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        engine = SynthesisEngine(tmp, sample_rate=8000)
+        assert engine.phoneme_sequence(['gama', ' ', 'ka', 'xyz'], 0.2, 0.5) == [
+            ('ga.wav', None), ('ma.wav', None), ('pause', 0.2), ('ka.wav', None)]
+
+def main():
+    """Run all resolver tests"""
+    test_decomposition_is_minimal()
+    test_table_rebuilt_when_bank_changes()
+    test_engine_spells_missing_phonemes()
+    print("All phoneme resolver tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless bulk phonemizer
+"""
+
+import io
+import json
+import os
+import contextlib
+import subprocess
+import sys
+import tempfile
+import sinhala_phonemize
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+
+def run_cli(args, content):
+    """Run the CLI on content written to a temporary file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'input')
+        output_path = os.path.join(tmp, 'output')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        assert sinhala_phonemize.main(args + ['-q', '-o', output_path, input_path]) == 0
+        with open(output_path, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+def test_lines_format():
+    """Each input line becomes one phoneme string, blank lines included"""
+    converter = SinhalaTextToPhoneme()
+    lines = run_cli([], "ගම කතා\n\nප්‍රේම\n")
+    assert lines == [converter.text_to_phoneme_string("ගම කතා"), "",
+                     converter.text_to_phoneme_string("ප්‍රේම")]
+
+def test_tsv_and_jsonl_formats():
+    """TSV gains a phoneme column and JSONL records gain a phoneme field"""
+    assert run_cli(['--format', 'tsv', '--column', '1'], "7\tගම\n") == ["7\tගම\tgama"]
+
+    lines = run_cli(['--format', 'jsonl', '--separator', ' '],
+                    json.dumps({'id': 3, 'text': "මගේ නම"}, ensure_ascii=False) + "\n")
+    assert json.loads(lines[0]) == {'id': 3, 'text': "මගේ නම", 'phonemes': "ma gee   na ma"}
+
+    # With several workers, records come back with their own results, in order
+    records = [{'id': i, 'text': ["ගම කතා", "මගේ නම", ""][i % 3]} for i in range(300)]
+    content = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    lines = run_cli(['--format', 'jsonl', '--workers', '2', '--chunksize', '7'], content)
+    converter = SinhalaTextToPhoneme()
+    assert [json.loads(line) for line in lines] == [
+        dict(record, phonemes=converter.text_to_phoneme_string(record['text'])) for record in records]
+
+def test_jsonl_records_must_be_objects():
+    """A JSONL line that is not an object is a usage error naming the line"""
+    for bad in ('"text"', '[1]', '{"text": '):
+        stderr = io.StringIO()
+        try:
+            with contextlib.redirect_stderr(stderr):
+                run_cli(['--format', 'jsonl'], '{"text": "ගම"}\n' + bad + '\n')
+            assert False, "expected a usage error"
+        except SystemExit as e:
+            assert e.code == 2 and 'line 2:' in stderr.getvalue()
+
+def test_no_gui_imports():
+    """The CLI never pulls in tkinter or pygame"""
+    code = ("import sys, sinhala_phonemize; "
+            "print(any(m in sys.modules for m in ('tkinter', 'pygame')))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == 'False', result.stderr
+
+def main():
+    """Run all CLI tests"""
+    test_lines_format()
+    test_tsv_and_jsonl_formats()
+    test_jsonl_records_must_be_objects()
+    test_no_gui_imports()
+    print("All phonemizer CLI tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk synthesis result cache
+"""
+
+import os
+import tempfile
+import multiprocessing
+from synthesis_cache import SynthesisCache, RESYNC_WRITES
+
+def make_key(text, **overrides):
+    settings = dict(sample_rate=16000, word_pause=0.3, sentence_pause=0.6,
+                    speed=1.0, bank_version='bank-1')
+    settings.update(overrides)
+    return SynthesisCache.make_key(text, **settings)
+
+def test_keys_normalize_text_and_include_settings():
+    """Whitespace and Unicode form do not matter; every setting does"""
+    key = make_key("ආයුබෝවන් ලෝකය")
+    assert make_key("  ආයුබෝවන්\n ලෝකය ") == key
+    assert make_key("ආයුබෝවන් ලෝකය", sample_rate=22050) != key
+    assert make_key("ආයුබෝවන් ලෝකය", word_pause=0.4) != key
+    assert make_key("ආයුබෝවන් ලෝකය", sentence_pause=0.7) != key
+    assert make_key("ආයුබෝවන් ලෝකය", speed=1.5) != key
+    assert make_key("ආයුබෝවන් ලෝකය", bank_version='bank-2') != key
+    assert make_key("ආයුබෝවන් ලෝකය", extra={'crossfade_ms': 4}) != key
+
+def test_hits_misses_and_lru_eviction():
+    """Least recently used entries are evicted once over the size cap"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SynthesisCache(tmp, max_bytes=250)
+        assert cache.get(make_key('a')) is None
+        for index, text in enumerate(['a', 'b']):
+            cache.put(make_key(text), bytes([index]) * 100)
+            os.utime(cache._path(make_key(text)), ns=(index, index))
+        assert cache.get(make_key('a')) == b'\x00' * 100  # refreshes 'a'
+
+        cache.put(make_key('c'), b'\x02' * 100)
+        assert cache.get(make_key('b')) is None
+        assert cache.get(make_key('a')) is not None and cache.get(make_key('c')) is not None
+        assert cache.disk_size() == 200
+
+        info = cache.info()
+        assert (info['hits'], info['misses'], info['writes'], info['evictions']) == (3, 2, 3, 1)
+        assert info['hit_rate'] == 0.6
+
+        rendered = []
+        assert cache.get_or_render(make_key('d'), lambda: rendered.append(1) or b'd') == b'd'
+        assert cache.get_or_render(make_key('d'), lambda: rendered.append(1) or b'x') == b'd'
+        assert rendered == [1]
+
+def _write_entries(args):
+    cache_dir, worker = args
+    cache = SynthesisCache(cache_dir, max_bytes=5000)
+    for index in range(50):
+        # Every worker writes the shared keys; half the keys are its own
+        text = f"shared {index}" if index % 2 else f"worker {worker} {index}"
+        cache.put(make_key(text), text.encode('utf-8') * 20)
+        cache.get(make_key(f"shared {index - 1}"))
+    return cache.info()['writes']
+
+def test_shared_directory_across_processes():
+    """Concurrent writers and evictors never leave partial entries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with multiprocessing.Pool(4) as pool:
+            assert pool.map(_write_entries, [(tmp, worker) for worker in range(4)]) == [50] * 4
+
+        cache = SynthesisCache(tmp)
+        for mtime, size, path in cache._entries():
+            with open(path, 'rb') as f:
+                data = f.read()
+            assert len(data) == size and data == data[:len(data) // 20] * 20
+        assert not [name for _root, _dirs, files in os.walk(tmp)
+                    for name in files if name.endswith('.tmp')]
+        # Each process may overshoot by the writes since its last re-measure
+        assert cache.disk_size() <= 5000 + 4 * RESYNC_WRITES * len("worker 0 00") * 20
+
+def main():
+    """Run all synthesis cache tests"""
+    test_keys_normalize_text_and_include_settings()
+    test_hits_misses_and_lru_eviction()
+    test_shared_directory_across_processes()
+    print("All synthesis cache tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
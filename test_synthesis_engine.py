@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless synthesis engine
+"""
+
+import io
+import os
+import sys
+import wave
+import tempfile
+import subprocess
+import numpy as np
+from synthesis_engine import SynthesisEngine
+from synthesis_cache import SynthesisCache
+from test_phoneme_bank import write_wav
+
+TEXT = "ගම කතා ගම"
+
+def make_bank(directory):
+    """Write a short tone clip for each phoneme in TEXT"""
+    for index, phoneme in enumerate(['ga', 'ma', 'ka', 'thaa']):
+        tone = 3000 * np.sin(np.arange(400) * (0.05 + 0.02 * index))
+        write_wav(os.path.join(directory, f"{phoneme}.wav"), tone.astype('<i2').tobytes(), 8000)
+
+def test_engine_has_no_gui_imports():
+    """The engine can be imported without tkinter or pygame"""
+    code = ("import sys, synthesis_engine; "
+            "sys.exit(any(m in sys.modules for m in ('tkinter', 'pygame')))")
+    assert subprocess.run([sys.executable, '-c', code],
+                          cwd=os.path.dirname(os.path.abspath(__file__))).returncode == 0
+
+def test_synthesize_outputs_agree():
+    """Arrays, PCM bytes and WAV data hold the same audio"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        engine = SynthesisEngine(tmp, sample_rate=8000, word_pause=0.1)
+        samples = engine.synthesize(TEXT)
+        assert samples.dtype == np.int16 and len(samples) > 0
+        assert engine.synthesize_pcm(TEXT) == samples.astype('<i2').tobytes()
+
+        with wave.open(io.BytesIO(engine.synthesize_wav(TEXT)), 'rb') as w:
+            assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, 8000)
+            assert w.readframes(w.getnframes()) == samples.astype('<i2').tobytes()
+
+        # Per-call settings override the engine defaults
+        slower = engine.synthesize(TEXT, word_pause=0.3)
+        assert len(slower) == len(samples) + 2 * int(8000 * 0.2)
+        assert len(engine.synthesize(TEXT, sample_rate=16000)) > 1.9 * len(samples)
+        assert abs(len(engine.synthesize(TEXT, speed=2.0)) - len(samples) / 2) <= 1
+
+        try:
+            engine.synthesize(TEXT, pitch=1.0)
+            assert False, "unknown settings must be rejected"
+        except TypeError:
+            pass
+
+        for bad in ({'sample_rate': 0}, {'sample_rate': 0.5}, {'speed': float('inf')},
+                    {'speed': float('nan')}, {'word_pause': -0.1}, {'sentence_pause': -1}):
+            try:
+                engine.synthesize(TEXT, **bad)
+                assert False, f"{bad} must be rejected"
+            except ValueError:
+                pass
+
+def test_chunks_and_cache_match_full_render():
+    """Streaming chunks and cached renders reproduce synthesize()"""
+    with tempfile.TemporaryDirectory() as tmp:
+        phonemes_dir = os.path.join(tmp, 'phonemes')
+        os.makedirs(phonemes_dir)
+        make_bank(phonemes_dir)
+        cache = SynthesisCache(os.path.join(tmp, 'cache'))
+        engine = SynthesisEngine(phonemes_dir, sample_rate=8000)
+        expected = engine.synthesize(TEXT)
+
+        streamed = np.concatenate(list(engine.iter_chunks(TEXT, max_words=1)))
+        assert streamed.tolist() == expected.tolist()
+
+        cached_engine = SynthesisEngine(phonemes_dir, cache=cache, sample_rate=8000)
+        assert not cached_engine.is_cached(TEXT)
+        assert cached_engine.synthesize(TEXT).tolist() == expected.tolist()
+        assert cached_engine.is_cached(TEXT) and not cached_engine.is_cached(TEXT, speed=1.5)
+        assert cached_engine.synthesize(TEXT).tolist() == expected.tolist()
+        assert cached_engine.last_stats['cached'] and cache.info()['hits'] == 1
+
+def main():
+    """Run all synthesis engine tests"""
+    test_engine_has_no_gui_imports()
+    test_synthesize_outputs_agree()
+    test_chunks_and_cache_match_full_render()
+    print("All synthesis engine tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental linguistic analysis model
+"""
+
+import os
+import random
+import tempfile
+import threading
+from collections import Counter
+from text_analysis import IncrementalAnalysis, TextStatistics, analyze_files, file_ranges
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+from word_counter import consonant_cluster
+from phoneme_profile import PhonemeProfile
+
+PARAGRAPHS = ["ශ්‍රී ලංකාව ලස්සන රටකි.", "අම්මා ගෙදර ගියා!", "", "පොත් කියවන්න, ගම කතා",
+              "සංදර්ශන කාර්ය වාර්ත", "  මගේ   නම  "]
+
+def full_statistics(text, converter):
+    """Statistics computed from scratch over the whole text"""
+    model = IncrementalAnalysis(converter)
+    model.update(text)
+    return model.statistics()
+
+def test_matches_whole_text_analysis():
+    """Paragraph results add up to the analysis of the whole text"""
+    converter = SinhalaTextToPhoneme()
+    text = "\n".join(PARAGRAPHS)
+    model = IncrementalAnalysis(converter)
+    model.update(text)
+    results = model.results()
+
+    assert results['phonemes'] == converter.text_to_phonemes(text)
+    assert results['words'] == text.split()
+    tokens = [token for word in text.split() for token in converter.tokenize_sinhala_text(word)]
+    assert results['tokens'] == tokens
+    clusters = [consonant_cluster(token, converter.sinhala_consonants) for token in tokens]
+    assert results['clusters'] == [cluster for cluster in clusters if cluster] != []
+
+    stats = results['statistics']
+    assert stats['total_characters'] == len(text) and stats['total_words'] == len(text.split())
+    assert stats['total_phonemes'] == len(results['phonemes'])
+    assert stats['character_frequency'] == Counter(char for char in text if not char.isspace())
+    assert stats['phoneme_frequency'] == Counter(p for p in results['phonemes'] if p.strip())
+    assert stats['diacritic_frequency']['ා'] == text.count('ා')
+
+    # A cancelled update leaves the model as it was
+    cancel = threading.Event()
+    cancel.set()
+    assert model.update(text + "\nගම කතා", cancel=cancel) is None
+    assert model.results() == results
+
+def test_edits_only_reanalyze_changed_paragraphs():
+    """Random edits keep the counters exact while redoing only touched lines"""
+    converter = SinhalaTextToPhoneme()
+    model = IncrementalAnalysis(converter)
+    rng = random.Random(0)
+    lines = [rng.choice(PARAGRAPHS) + f" {i}" for i in range(200)]
+    assert model.update("\n".join(lines))['analyzed'] == 200
+
+    for _ in range(100):
+        position = rng.randrange(len(lines))
+        edit = rng.choice(['change', 'insert', 'delete', 'move'])
+        if edit == 'change':
+            lines[position] = rng.choice(PARAGRAPHS) + f" {rng.random()}"
+        elif edit == 'insert':
+            lines.insert(position, rng.choice(PARAGRAPHS))
+        elif edit == 'delete' and len(lines) > 1:
+            del lines[position]
+        elif edit == 'move':
+            lines.insert(rng.randrange(len(lines)), lines.pop(position))
+        update = model.update("\n".join(lines))
+        assert update['analyzed'] <= 1
+        assert model.statistics() == full_statistics("\n".join(lines), converter)
+        assert model.phonemes() == converter.text_to_phonemes("\n".join(lines))
+
+def test_file_ranges_merge_to_whole_text():
+    """Worker ranges of a file merge to the same counts as one pass over it"""
+    converter = SinhalaTextToPhoneme()
+    rng = random.Random(1)
+    text = "\n".join(rng.choice(PARAGRAPHS) + f" {i}" for i in range(300)) + "\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        data = text.encode('utf-8')
+        ranges = file_ranges(path, 7)
+        assert len(ranges) == 7 and ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert all(data[end - 1:end] == b'\n' for _start, end in ranges)
+
+        single = TextStatistics(batch_words=10)
+        single.add_text(text, converter)
+        parallel = analyze_files([path], workers=3)
+        assert parallel.statistics() == single.statistics()
+        assert single.statistics() == full_statistics(text, converter)
+        assert single.top('phonemes', 5) == single.counts['phonemes'].most_common(5)
+
+        # The corpus profile counts clusters the same way
+        profile = PhonemeProfile()
+        profile.add_text(text, converter)
+        assert profile.counts['clusters'] == single.counts['clusters'] and profile.words == single.words
+
+def main():
+    """Run all text analysis tests"""
+    test_matches_whole_text_analysis()
+    test_edits_only_reanalyze_changed_paragraphs()
+    test_file_ranges_merge_to_whole_text()
+    print("All text analysis tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the SinhalaTextToPhoneme conversion engine
+"""
+
+import io
+import random
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme, iter_text_chunks
+
+SAMPLE_TEXT = ("ප්‍රේම ක්‍රීඩා ස්කූල සිංහල ශ්‍රී ලංකා අම්මා ගෙදර පොත් "
+               "සංදර්ශන කාර්ය. මගේ නම, ඔබේ ගම! ත්‍රෙන් න්ද්‍ර")
+
+def linear_cluster_scan(converter, token):
+    """Reference cluster lookup over every rule in definition order"""
+    for cluster, phoneme in converter.pronunciation_rules['consonant_clusters'].items():
+        if token.startswith(cluster):
+            return cluster, phoneme
+    return None
+
+def test_cluster_index_matches_linear_scan():
+    """Indexed cluster lookup agrees with a scan of the rule table"""
+    converter = SinhalaTextToPhoneme()
+    # Overlapping and short rules exercise first-defined-wins ordering
+    converter.pronunciation_rules['consonant_clusters'].update({
+        'ක්රී': 'krii', 'ක්': 'k-short', 'ස': 's-short'
+    })
+    index = converter._get_cluster_index()
+    for token in converter.tokenize_sinhala_text(SAMPLE_TEXT + " ක්රීම ක් ස්ත"):
+        assert index.match(token) == linear_cluster_scan(converter, token), token
+
+def test_cluster_index_follows_rule_mutations():
+    """Changing the cluster rules is reflected in the next conversion"""
+    converter = SinhalaTextToPhoneme()
+    assert converter.convert_token_to_phoneme('ක්ර') == 'kra'
+
+    converter.pronunciation_rules['consonant_clusters']['ක්ර'] = 'kru'
+    assert converter.convert_token_to_phoneme('ක්ර') == 'kru'
+
+    assert converter.convert_token_to_phoneme('ක්රා') == 'kraa'
+    del converter.pronunciation_rules['consonant_clusters']['ක්ර']
+    assert converter.convert_token_to_phoneme('ක්රා') == 'kraaa'
+
+    converter.pronunciation_rules = {**converter.pronunciation_rules,
+                                     'consonant_clusters': {'ක්ර': 'qra'}}
+    assert converter.convert_token_to_phoneme('ක්ර') == 'qra'
+
+def test_word_cache_preserves_output():
+    """Cached conversion returns the same phonemes as uncached"""
+    plain = SinhalaTextToPhoneme()
+    cached = SinhalaTextToPhoneme(word_cache_size=4)
+    for _ in range(3):
+        assert cached.text_to_phonemes(SAMPLE_TEXT) == plain.text_to_phonemes(SAMPLE_TEXT)
+
+    info = cached.cache_info()
+    assert info['maxsize'] == 4 and info['size'] == 4
+    assert info['misses'] > 0 and info['evictions'] > 0
+
+def test_word_cache_lru_counters():
+    """Hits refresh recency so the least recently used word is evicted"""
+    converter = SinhalaTextToPhoneme(word_cache_size=2)
+    converter.text_to_phonemes("ගම කතා")
+    converter.text_to_phonemes("ගම")
+    converter.text_to_phonemes("පොත")
+    converter.text_to_phonemes("ගම")
+    assert converter.cache_info() == {'hits': 2, 'misses': 3, 'evictions': 1,
+                                      'size': 2, 'maxsize': 2}
+
+def test_word_cache_invalidated_by_mutation():
+    """Editing the rule tables or recompiling the tokenizer drops cached words"""
+    converter = SinhalaTextToPhoneme(word_cache_size=16)
+    assert converter.text_to_phoneme_string("ගම") == "gama"
+
+    converter.phoneme_system['ග'] = 'ka'
+    assert converter.cache_info()['size'] == 0
+    assert converter.text_to_phoneme_string("ගම") == "kama"
+
+    assert converter.text_to_phoneme_string("ප්රේ") == "pree"
+    converter.pronunciation_rules['consonant_clusters']['ප්ර'] = 'fra'
+    assert converter.text_to_phoneme_string("ප්රේ") == "free"
+
+    # Rebuilding the tokenizer for a new character inventory does too
+    assert converter.text_to_phonemes("ක්ර") == ['kra']
+    converter.sinhala_consonants.discard('ර')
+    converter.compile_tokenizer()
+    fresh = SinhalaTextToPhoneme()
+    fresh.sinhala_consonants.discard('ර')
+    fresh.compile_tokenizer()
+    assert converter.text_to_phonemes("ක්ර") == fresh.text_to_phonemes("ක්ර") != ['kra']
+
+def random_chunks(text, seed):
+    """Split text into random pieces, often cutting through words"""
+    rng = random.Random(seed)
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(0, 7)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+def test_iter_phonemes_matches_text_to_phonemes():
+    """Streaming conversion equals whole-text conversion for any chunking"""
+    converter = SinhalaTextToPhoneme()
+    text = "  " + SAMPLE_TEXT + "\n\nසුභ   උදෑසන\tඅපි යමු  "
+    expected = converter.text_to_phonemes(text)
+    for seed in range(50):
+        assert list(converter.iter_phonemes(random_chunks(text, seed))) == expected
+    assert list(converter.iter_phonemes(text)) == expected
+    assert list(converter.iter_phonemes(io.StringIO(text), chunk_size=3)) == expected
+    assert list(converter.iter_phonemes([])) == []
+
+def test_iter_phonemes_per_word():
+    """Per-word mode yields one phoneme tuple per word"""
+    converter = SinhalaTextToPhoneme()
+    words = list(converter.iter_phonemes(["මගේ න", "ම ගම"], per_word=True))
+    assert words == [converter.word_to_phonemes("මගේ"),
+                     converter.word_to_phonemes("නම"),
+                     converter.word_to_phonemes("ගම")]
+
+def test_convert_batch_parallel_matches_serial():
+    """Process-pool batch conversion returns the serial results"""
+    converter = SinhalaTextToPhoneme(word_cache_size=64)
+    converter.pronunciation_rules['consonant_clusters']['ප්ර'] = 'fra'
+    texts = [SAMPLE_TEXT, "", "ප්රේම", "ගම කතා"] * 5
+    expected = [converter.text_to_phonemes(text) for text in texts]
+
+    assert list(converter.convert_batch(texts, workers=2, chunksize=3)) == expected
+    assert list(converter.convert_batch(texts, workers=1)) == expected
+
+    unordered = list(converter.convert_batch(texts, workers=2, ordered=False))
+    assert sorted(index for index, _ in unordered) == list(range(len(texts)))
+    assert all(expected[index] == phonemes for index, phonemes in unordered)
+
+    # The input is read only a bounded distance ahead of the results
+    consumed = 0
+    def generate():
+        nonlocal consumed
+        for i in range(100000):
+            consumed += 1
+            yield texts[i % len(texts)]
+    for ordered in (True, False):
+        consumed = 0
+        results = converter.convert_batch(generate(), workers=2, chunksize=4, ordered=ordered)
+        first = next(results)
+        assert first == expected[0] or first[1] in expected
+        assert consumed <= 2 * 4 * 2 + 4
+        results.close()
+
+    keyed = list(converter.convert_batch([(('a', 1), "ගම"), (('b', 2), "කතා")], workers=2, keyed=True))
+    assert keyed == [(('a', 1), converter.text_to_phonemes("ගම")), (('b', 2), converter.text_to_phonemes("කතා"))]
+
+def test_iter_text_chunks_splits_sentences():
+    """Chunks end at sentence punctuation or after max_words words"""
+    text = "මම පොතක් කියවන්න යනවා. අපි යමු! " + "ගම " * 5
+    assert list(iter_text_chunks(text, max_words=3)) == [
+        "මම පොතක් කියවන්න", "යනවා.", "අපි යමු!", "ගම ගම ගම", "ගම ගම"]
+    assert " ".join(iter_text_chunks(SAMPLE_TEXT)) == " ".join(SAMPLE_TEXT.split())
+
+def test_reachable_phonemes_cover_converter_output():
+    """Random well-formed words only produce phonemes in the reachable set"""
+    converter = SinhalaTextToPhoneme()
+    converter.pronunciation_rules['consonant_clusters']['ක්ක'] = 'qqa'
+    reachable = set(converter.reachable_phonemes())
+    assert {'qqa', 'qqi', 'k', 'g'} <= reachable and 'kra' in reachable
+
+    rng = random.Random(0)
+    consonants = sorted(converter.sinhala_consonants)
+    marks = sorted(converter.sinhala_diacritics) + ['්', '']
+    vowels = sorted(converter.sinhala_vowels)
+    for _ in range(2000):
+        word = rng.choice(vowels + [''])
+        for _ in range(rng.randint(1, 4)):
+            word += rng.choice(consonants) + rng.choice(marks)
+        for phoneme in converter.text_to_phonemes(word):
+            assert phoneme in reachable, (word, phoneme)
+
+def main():
+    """Run all conversion engine tests"""
+    test_cluster_index_matches_linear_scan()
+    test_cluster_index_follows_rule_mutations()
+    test_word_cache_preserves_output()
+    test_word_cache_lru_counters()
+    test_word_cache_invalidated_by_mutation()
+    test_iter_phonemes_matches_text_to_phonemes()
+    test_iter_phonemes_per_word()
+    test_convert_batch_parallel_matches_serial()
+    test_iter_text_chunks_splits_sentences()
+    test_reachable_phonemes_cover_converter_output()
+    print("All text-to-phoneme tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
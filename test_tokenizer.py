@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the precompiled Sinhala tokenizer
+"""
+
+import random
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme
+
+def reference_tokenize(converter, text):
+    """Character-by-character tokenizer the compiled engine must reproduce"""
+    tokens = []
+    i = 0
+
+    while i < len(text):
+        char = text[i]
+
+        if char.isspace() or char in '.,!?;:':
+            tokens.append(char)
+            i += 1
+            continue
+
+        if (i + 2 < len(text) and
+            char in converter.sinhala_consonants and
+            text[i + 1] == '්' and
+            text[i + 2] in converter.sinhala_consonants):
+            cluster = text[i:i+3]
+            j = i + 3
+            while (j < len(text) and
+                   text[j] in converter.sinhala_diacritics):
+                cluster += text[j]
+                j += 1
+            tokens.append(cluster)
+            i = j
+            continue
+
+        if char in converter.sinhala_consonants:
+            consonant_group = char
+            j = i + 1
+            while (j < len(text) and
+                   text[j] in converter.sinhala_diacritics.union({'්'})):
+                consonant_group += text[j]
+                j += 1
+            tokens.append(consonant_group)
+            i = j
+            continue
+
+        tokens.append(char)
+        i += 1
+
+    return tokens
+
+def generate_corpus(converter, size, seed=1234):
+    """Generate random text weighted towards tricky Sinhala sequences"""
+    rng = random.Random(seed)
+    alphabet = (sorted(converter.sinhala_vowels) +
+                sorted(converter.sinhala_consonants) * 3 +
+                sorted(converter.sinhala_diacritics) * 2 +
+                sorted(converter.sinhala_special) * 4 +
+                list('‍‌ .,!?;:\n\tabcXYZ019'))
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            for _ in range(size)]
+
+def test_tokenizer_parity_on_generated_corpus():
+    """Compiled tokenizer produces exactly the reference tokens"""
+    converter = SinhalaTextToPhoneme()
+    for text in generate_corpus(converter, 20000):
+        assert converter.tokenize_sinhala_text(text) == reference_tokenize(converter, text), text
+
+def test_tokenizer_parity_on_words():
+    """Compiled tokenizer matches the reference on real words"""
+    converter = SinhalaTextToPhoneme()
+    words = ["අම්මා", "ප්‍රේම", "ක්‍රීඩා", "ස්කූල", "සිංහල", "ශ්‍රී ලංකා",
+             "සංදර්ශන", "කාර්ය", "පොත්", "ත්‍රෙන්", "මගේ නම.", ""]
+    for word in words:
+        assert converter.tokenize_sinhala_text(word) == reference_tokenize(converter, word)
+
+def test_token_spans_cover_text():
+    """Token spans are contiguous and slice back to the tokens"""
+    converter = SinhalaTextToPhoneme()
+    for text in generate_corpus(converter, 2000, seed=99):
+        spans = converter.tokenize_spans(text)
+        assert [text[start:end] for start, end in spans] == converter.tokenize_sinhala_text(text)
+        position = 0
+        for start, end in spans:
+            assert start == position and end > start
+            position = end
+        assert position == len(text)
+
+def main():
+    """Run all tokenizer tests"""
+    test_tokenizer_parity_on_generated_corpus()
+    test_tokenizer_parity_on_words()
+    test_token_spans_cover_text()
+    print("All tokenizer tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
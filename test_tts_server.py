@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests for the local HTTP synthesis server
+"""
+
+import io
+import json
+import http.client
+import time
+import wave
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+import numpy as np
+import tts_server
+from tts_server import RequestBatcher, TTSService, TTSServer
+from tts_load_client import run_load, post_json
+from synthesis_engine import SynthesisEngine
+from test_synthesis_engine import make_bank, TEXT
+
+def start_server(phonemes_dir, workers, cache_dir=None):
+    service = TTSService(phonemes_dir, workers=workers, cache_dir=cache_dir, sample_rate=8000)
+    server = TTSServer(('127.0.0.1', 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+def test_batcher_coalesces_waiting_requests():
+    """Requests queued while the worker is busy are sent as one batch"""
+    release = threading.Event()
+    batches = []
+
+    def run_batch(payloads, done, failed):
+        batches.append(list(payloads))
+        def finish():
+            release.wait()
+            done([payload * 2 for payload in payloads])
+        threading.Thread(target=finish).start()
+
+    batcher = RequestBatcher(run_batch, max_batch=8, max_wait=0.001, max_in_flight=1)
+    first = batcher.submit(0)
+    time.sleep(0.05)
+    futures = [batcher.submit(value) for value in range(1, 11)]
+    release.set()
+    assert first.result(5) == 0 and [f.result(5) for f in futures] == [v * 2 for v in range(1, 11)]
+    assert batches[0] == [0] and batches[1] == list(range(1, 9)) and batches[2] == [9, 10]
+    batcher.close()
+
+def test_endpoints_in_process():
+    """phonemize, synthesize and metrics over HTTP with in-process workers"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        server, url = start_server(tmp, workers=0, cache_dir=tmp + '/cache')
+        try:
+            status, body = post_json(url + '/phonemize', {'text': 'ගම කතා'}, 10)
+            assert status == 200 and json.loads(body)['phonemes'] == ['ga', 'ma', ' ', 'ka', 'thaa']
+            status, body = post_json(url + '/phonemize', {'texts': ['ගම', 'කතා']}, 10)
+            assert json.loads(body)['phoneme_strings'] == ['gama', 'kathaa']
+
+            expected = SynthesisEngine(tmp, sample_rate=8000).synthesize_pcm(TEXT, speed=1.5)
+            for _ in range(2):  # the second response comes from the cache
+                status, body = post_json(url + '/synthesize', {'text': TEXT, 'speed': 1.5}, 10)
+                with wave.open(io.BytesIO(body), 'rb') as w:
+                    assert w.getframerate() == 8000 and w.readframes(w.getnframes()) == expected
+
+            query = urllib.parse.urlencode({'text': 'ගම', 'sample_rate': 16000})
+            with urllib.request.urlopen(f"{url}/synthesize?{query}", timeout=10) as response:
+                assert response.headers['Content-Type'] == 'audio/wav'
+                assert response.read().startswith(b'RIFF')
+            assert post_json(url + '/synthesize', {'text': ''}, 10)[0] == 400
+            assert post_json(url + '/synthesize', {'text': TEXT, 'speed': 'fast'}, 10)[0] == 400
+            assert post_json(url + '/synthesize', {'text': TEXT, 'sample_rate': 0}, 10)[0] == 400
+            assert post_json(url + '/nothing', {}, 10)[0] == 404
+            assert post_json(url + '/phonemize', {'text': TEXT, 'separator': 1}, 10)[0] == 400
+
+            with urllib.request.urlopen(url + '/metrics', timeout=10) as response:
+                metrics = json.loads(response.read())
+            synthesize = metrics['endpoints']['/synthesize']
+            assert synthesize['requests'] == 6 and synthesize['errors'] == 3
+            assert set(synthesize['latency_ms']) == {'p50', 'p90', 'p99', 'max'}
+            assert metrics['cache']['hits'] == 1
+        finally:
+            stop_server(server)
+
+        # An unwritable cache directory does not fail synthesis
+        blocked = tmp + '/blocked'
+        open(blocked, 'w').close()
+        server, url = start_server(tmp, workers=0, cache_dir=blocked)
+        try:
+            status, body = post_json(url + '/synthesize', {'text': TEXT, 'speed': 1.5}, 10)
+            assert status == 200 and body.startswith(b'RIFF')
+        finally:
+            stop_server(server)
+
+def test_synthesis_is_streamed():
+    """The first chunk is sent before later ones are rendered; a stalled worker gives 504"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        server, url = start_server(tmp, workers=0, cache_dir=tmp + '/cache')
+        rendered = []
+        release = threading.Event()
+        render = tts_server._worker_engine.concat.render
+
+        def gated_render(sequence, sample_rate=None):
+            rendered.append(len(sequence))
+            if len(rendered) > tts_server.STREAM_READ_AHEAD:
+                release.wait(10)
+            return render(sequence, sample_rate)
+        tts_server._worker_engine.concat.render = gated_render
+
+        text = ' '.join([TEXT + '.'] * 4)
+        expected = np.concatenate(list(SynthesisEngine(tmp, sample_rate=8000).iter_chunks(text)))
+        try:
+            connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+            connection.request('POST', '/synthesize', json.dumps({'text': text}).encode('utf-8'),
+                               {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            assert response.headers['Transfer-Encoding'] == 'chunked'
+            first = response.read(46)
+            assert first.startswith(b'RIFF') and len(first) == 46 and not release.is_set()
+            release.set()
+            pcm = (first + response.read())[44:]
+            assert np.array_equal(np.frombuffer(pcm, dtype='<i2'), expected)
+            connection.close()
+
+            # The cached copy is sent whole, with a proper header
+            status, body = post_json(url + '/synthesize', {'text': text}, 10)
+            with wave.open(io.BytesIO(body), 'rb') as w:
+                assert w.readframes(w.getnframes()) == pcm
+            assert server.service.metrics()['cache']['hits'] == 1
+
+            release.clear()
+            server.service.request_timeout = 0.2
+            assert post_json(url + '/synthesize', {'text': 'කතා'}, 10)[0] == 504
+        finally:
+            release.set()
+            stop_server(server)
+
+def test_load_client_against_worker_processes():
+    """The bundled client drives the process pool without errors"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_bank(tmp)
+        server, url = start_server(tmp, workers=2)
+        try:
+            summary = run_load(url, 'synthesize', [TEXT, 'ගම'], 40, 8)
+            assert summary['ok'] == 40 and summary['errors'] == 0
+            summary = run_load(url, 'phonemize', [TEXT], 40, 8)
+            assert summary['ok'] == 40 and summary['p99_ms'] >= summary['p50_ms']
+            assert server.service.metrics()['endpoints']['/phonemize']['requests'] == 40
+        finally:
+            stop_server(server)
+
+def main():
+    """Run all server tests"""
+    test_batcher_coalesces_waiting_requests()
+    test_endpoints_in_process()
+    test_synthesis_is_streamed()
+    test_load_client_against_worker_processes()
+    print("All server tests passed! ✓")
+
+if __name__ == "__main__":
+    main()
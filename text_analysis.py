@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Linguistic statistics for Sinhala text
+
+TextStatistics counts characters, diacritics, tokens, consonant clusters
+and phonemes in one streaming pass and can be merged, so large files are
+split across worker processes. IncrementalAnalysis keeps per-paragraph
+results for the GUI so edits only re-analyze what changed.
+
+Examples:
+    python text_analysis.py corpus.txt
+    python text_analysis.py corpus.txt --workers 4 --top 30
+"""
+
+import os
+import sys
+import codecs
+import heapq
+import argparse
+import multiprocessing
+from collections import Counter, namedtuple
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sinhala_text_to_phoneme import SinhalaTextToPhoneme, iter_words
+from word_counter import WordCounter, consonant_cluster
+
+COUNT_KINDS = ('characters', 'diacritics', 'tokens', 'clusters', 'phonemes')
+RANGE_BYTES = 16 << 20  # largest byte range analyzed as one unit of work
+
+class TextStatistics(WordCounter):
+    """Frequency counters and totals for a body of text.
+
+    Characters are counted chunk by chunk as the text streams past and
+    words go through WordCounter's batches. Statistics of separate parts
+    of a text, such as paragraphs or byte ranges of a file handled by
+    different workers, combine exactly with merge().
+    """
+
+    kinds = COUNT_KINDS
+    totals = ('characters', 'words', 'tokens', 'phoneme_items')
+
+    def __init__(self, batch_words: int = 50000):
+        super().__init__(batch_words)
+
+    def add_text(self, text_stream, converter: Optional[SinhalaTextToPhoneme] = None,
+                 chunk_size: int = 1 << 20):
+        """Count a string, an iterable of text chunks or a text file object"""
+        converter = converter or SinhalaTextToPhoneme()
+        characters = self.counts['characters']
+
+        def chunks():
+            if isinstance(text_stream, str):
+                source = [text_stream]
+            elif hasattr(text_stream, 'read'):
+                source = iter(lambda: text_stream.read(chunk_size), '')
+            else:
+                source = text_stream
+            for chunk in source:
+                self.characters += len(chunk)
+                characters.update(chunk)
+                yield chunk
+
+        self.add_words(iter_words(chunks()), converter)
+
+    def add_word(self, word: str, tokens: Iterable[str], phonemes: Iterable[str],
+                 consonants, count: int = 1):
+        """Count an already tokenized and converted word"""
+        token_counts, cluster_counts, phoneme_counts = (
+            self.counts['tokens'], self.counts['clusters'], self.counts['phonemes'])
+        self.words += count
+        for token in tokens:
+            self.tokens += count
+            token_counts[token] += count
+            cluster = consonant_cluster(token, consonants)
+            if cluster:
+                cluster_counts[cluster] += count
+        for phoneme in phonemes:
+            self.phoneme_items += count
+            if phoneme.strip():
+                phoneme_counts[phoneme] += count
+
+    def count_word(self, word: str, count: int, converter: SinhalaTextToPhoneme):
+        self.add_word(word, converter.tokenize_sinhala_text(word), converter.word_to_phonemes(word),
+                      converter.sinhala_consonants, count)
+
+    def flush(self, converter: SinhalaTextToPhoneme):
+        """Convert and count the batched words; tidy the character counts"""
+        super().flush(converter)
+        characters = self.counts['characters']
+        for char in [char for char in characters if char.isspace()]:
+            del characters[char]
+        diacritics = self.counts['diacritics']
+        diacritics.clear()
+        diacritics.update({char: count for char, count in characters.items()
+                           if char in converter.sinhala_diacritics})
+
+    def top(self, kind: str, k: int = 20) -> List[Tuple[str, int]]:
+        """The k most frequent entries of a kind, selected with a heap"""
+        return heapq.nlargest(k, self.counts[kind].items(), key=itemgetter(1))
+
+    def statistics(self) -> Dict:
+        """Totals and frequency counters in the Analysis tab's format"""
+        return {
+            'total_characters': self.characters,
+            'total_words': self.words,
+            # text_to_phonemes puts one ' ' between consecutive words
+            'total_phonemes': self.phoneme_items + max(0, self.words - 1),
+            'total_tokens': self.tokens,
+            'consonant_clusters': sum(self.counts['clusters'].values()),
+            'unique_phonemes': len(self.counts['phonemes']),
+            'character_frequency': self.counts['characters'],
+            'diacritic_frequency': self.counts['diacritics'],
+            'token_frequency': self.counts['tokens'],
+            'cluster_frequency': self.counts['clusters'],
+            'phoneme_frequency': self.counts['phonemes']
+        }
+
+def file_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into up to parts byte ranges that end at line breaks"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for part in range(1, parts):
+            f.seek(max(bounds[-1], size * part // parts))
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def _read_range(path: str, start: int, end: int, chunk_size: int) -> Iterator[str]:
+    """Decode a byte range of a UTF-8 file chunk by chunk"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+def analyze_file_range(path: str, start: int = 0, end: Optional[int] = None,
+                       chunk_size: int = 1 << 20) -> TextStatistics:
+    """Statistics of one byte range of a UTF-8 text file"""
+    if end is None:
+        end = os.path.getsize(path)
+    statistics = TextStatistics()
+    statistics.add_text(_read_range(path, start, end, chunk_size), SinhalaTextToPhoneme(word_cache_size=4096))
+    return statistics
+
+def _analyze_range_item(item: Tuple[str, int, int]) -> TextStatistics:
+    return analyze_file_range(*item)
+
+def analyze_files(paths: Iterable[str], workers: Optional[int] = None,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  cancel=None) -> Optional[TextStatistics]:
+    """Statistics of UTF-8 text files, split into ranges across worker processes.
+
+    workers defaults to the CPU count; 0 or 1 analyzes in this process.
+    Files are split into at least one range per worker and at most
+    RANGE_BYTES per range. progress(done, total) is called as ranges finish. If cancel (a
+    threading.Event) is set, the remaining ranges are abandoned and None
+    is returned.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    items = []
+    for path in paths:
+        parts = max(workers, -(-os.path.getsize(path) // RANGE_BYTES), 1)
+        items.extend((path, start, end) for start, end in file_ranges(path, parts))
+    total = TextStatistics()
+
+    def merged(parts):
+        for done, part in enumerate(parts, 1):
+            total.merge(part)
+            if progress is not None:
+                progress(done, len(items))
+            if cancel is not None and cancel.is_set():
+                return None
+        return total
+
+    if workers <= 1 or len(items) <= 1:
+        return merged(map(_analyze_range_item, items))
+    # Leaving the with block terminates workers still running after a cancel
+    with multiprocessing.Pool(min(workers, len(items))) as pool:
+        return merged(pool.imap_unordered(_analyze_range_item, items))
+
+# Analysis of one paragraph (one line of text). words holds (word, tokens)
+# pairs and phonemes is the paragraph's text_to_phonemes() result.
+ParagraphAnalysis = namedtuple('ParagraphAnalysis', ['text', 'words', 'phonemes', 'clusters', 'statistics'])
+
+def analyze_paragraph(text: str, converter: SinhalaTextToPhoneme) -> ParagraphAnalysis:
+    """Tokenize, convert and count one paragraph"""
+    statistics = TextStatistics()
+    converted = {}
+    words = []
+    phonemes = []
+    for word in text.split():
+        entry = converted.get(word)
+        if entry is None:
+            entry = converted[word] = [tuple(converter.tokenize_sinhala_text(word)),
+                                       converter.word_to_phonemes(word), 0]
+        entry[2] += 1
+        words.append((word, entry[0]))
+        if phonemes:
+            phonemes.append(' ')
+        phonemes.extend(entry[1])
+
+    # Each distinct word is counted once, weighted by its occurrences
+    consonants = converter.sinhala_consonants
+    for word, (tokens, word_phonemes, count) in converted.items():
+        statistics.add_word(word, tokens, word_phonemes, consonants, count)
+    statistics.characters = len(text)
+    statistics.counts['characters'].update(text)
+    statistics.flush(converter)
+    clusters = tuple(cluster for _word, tokens in words for cluster in
+                     (consonant_cluster(token, consonants) for token in tokens) if cluster)
+    return ParagraphAnalysis(text, tuple(words), tuple(phonemes), clusters, statistics)
+
+class IncrementalAnalysis:
+    """Linguistic analysis of a document that is re-run only where it changed.
+
+    The text is kept as a list of per-paragraph (per-line) results. On
+    update() the unchanged paragraphs at the start and end are kept,
+    paragraphs in between are reused if their text already existed and
+    analyzed otherwise, and the document-wide TextStatistics is adjusted
+    by the removed and added paragraphs alone. An edit to one line of a
+    book-length text therefore costs about one paragraph's work.
+    """
+
+    def __init__(self, converter: Optional[SinhalaTextToPhoneme] = None):
+        self.converter = converter or SinhalaTextToPhoneme(word_cache_size=4096)
+        self.paragraphs = []
+        self.totals = TextStatistics()
+        self.last_update = {'analyzed': 0, 'reused': 0, 'removed': 0}
+
+    @property
+    def counts(self) -> Dict[str, Counter]:
+        """Document-wide frequency counters"""
+        return self.totals.counts
+
+    def update(self, text: str, progress: Optional[Callable[[int, int], None]] = None,
+               cancel=None) -> Optional[Dict[str, int]]:
+        """Bring the analysis up to date with text; return what was redone.
+
+        progress(done, total) is called as changed paragraphs are analyzed.
+        If cancel (a threading.Event) is set before the analysis finishes,
+        the model is left as it was and None is returned.
+        """
+        lines = text.split('\n')
+        old = self.paragraphs
+        start = 0
+        limit = min(len(old), len(lines))
+        while start < limit and old[start].text == lines[start]:
+            start += 1
+        old_end, new_end = len(old), len(lines)
+        while old_end > start and new_end > start and old[old_end - 1].text == lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        removed = old[start:old_end]
+        reusable = {paragraph.text: paragraph for paragraph in removed}
+        added = []
+        analyzed = 0
+        changed = lines[start:new_end]
+        for done, line in enumerate(changed):
+            if cancel is not None and cancel.is_set():
+                return None
+            if progress is not None and done % 200 == 0:
+                progress(done, len(changed))
+            paragraph = reusable.get(line)
+            if paragraph is None:
+                paragraph = analyze_paragraph(line, self.converter)
+                analyzed += 1
+            added.append(paragraph)
+        if progress is not None:
+            progress(len(changed), len(changed))
+
+        for paragraph in removed:
+            self.totals.merge(paragraph.statistics, -1)
+        for paragraph in added:
+            self.totals.merge(paragraph.statistics)
+        self.paragraphs = old[:start] + added + old[old_end:]
+        self.last_update = {'analyzed': analyzed, 'reused': len(added) - analyzed, 'removed': len(removed)}
+        return self.last_update
+
+    def phonemes(self) -> List[str]:
+        """Phonemes of the whole text, as text_to_phonemes would return them"""
+        phonemes = []
+        for paragraph in self.paragraphs:
+            if paragraph.words:
+                if phonemes:
+                    phonemes.append(' ')
+                phonemes.extend(paragraph.phonemes)
+        return phonemes
+
+    def statistics(self) -> Dict:
+        """Document totals and frequency counters"""
+        statistics = self.totals.statistics()
+        # Paragraphs are joined by the line breaks split off in update()
+        statistics['total_characters'] += max(0, len(self.paragraphs) - 1)
+        return statistics
+
+    def results(self) -> Dict:
+        """The whole analysis as one dict (lists are built on demand)"""
+        word_tokens = [pair for paragraph in self.paragraphs for pair in paragraph.words]
+        return {
+            'original_text': '\n'.join(paragraph.text for paragraph in self.paragraphs),
+            'words': [word for word, _tokens in word_tokens],
+            'word_tokens': word_tokens,
+            'tokens': [token for _word, tokens in word_tokens for token in tokens],
+            'clusters': [cluster for paragraph in self.paragraphs for cluster in paragraph.clusters],
+            'phonemes': self.phonemes(),
+            'statistics': self.statistics()
+        }
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Count characters, tokens, clusters and phonemes in Sinhala text.")
+    parser.add_argument('files', nargs='+', help="UTF-8 text files")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--top', type=int, default=20, help="entries to list per table (default: 20)")
+    args = parser.parse_args(argv)
+
+    statistics = analyze_files(args.files, args.workers)
+    summary = statistics.statistics()
+    for name in ('total_characters', 'total_words', 'total_tokens', 'total_phonemes',
+                 'consonant_clusters', 'unique_phonemes'):
+        print(f"{name.replace('_', ' ').capitalize()}: {summary[name]:,}")
+    for kind in COUNT_KINDS:
+        print(f"\nTop {kind}:")
+        for name, count in statistics.top(kind, args.top):
+            print(f"  {name:<12} {count:>12,}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
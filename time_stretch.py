@@ -0,0 +1,136 @@
+from typing import Iterable, Iterator
+import numpy as np
+
+class WSOLAStretcher:
+    """Streaming pitch-preserving tempo change (WSOLA).
+
+    Waveform-similarity overlap-add: output frames are laid down every
+    synthesis hop and read from the input every speed * hop samples. Each
+    frame's exact input position is searched within +/- search_ms for the
+    best cross-correlation with the natural continuation of the previous
+    frame, which keeps the waveform periodicity and therefore the pitch.
+
+    Feed int16 blocks of any size to process() and call flush() at the
+    end; memory stays bounded by a few frames regardless of input length.
+    """
+
+    def __init__(self, speed: float, sample_rate: int, frame_ms: float = 30.0,
+                 search_ms: float = 10.0):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = float(speed)
+        self.frame = max(4, int(sample_rate * frame_ms / 1000) // 2 * 2)
+        self.hop = self.frame // 2
+        self.search = int(sample_rate * search_ms / 1000)
+        self.analysis_hop = self.hop * self.speed
+        # Periodic Hann windows at 50% overlap sum to exactly one
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0          # absolute input index of _buffer[0]
+        self._frames = 0          # output frames produced so far
+        self._previous = None     # absolute input position of the last frame
+        self._overlap = np.zeros(self.frame, dtype=np.float32)
+        self._input_length = 0
+        self._output_length = 0
+
+    def _frame_ready(self, end_of_input: bool) -> bool:
+        position = int(round(self._frames * self.analysis_hop))
+        if end_of_input:
+            return position < self._input_length
+        needed = position + self.search + self.frame
+        if self._previous is not None:
+            needed = max(needed, self._previous + self.hop + self.frame)
+        return needed <= self._offset + len(self._buffer)
+
+    def _next_frame(self) -> np.ndarray:
+        """Overlap-add one frame and return the hop of finished output"""
+        position = int(round(self._frames * self.analysis_hop))
+        frame, hop, offset = self.frame, self.hop, self._offset
+
+        if self._previous is None:
+            best = position
+        else:
+            natural = self._previous + hop
+            template = self._buffer[natural - offset:natural - offset + frame]
+            low = max(position - self.search, offset)
+            region = self._buffer[low - offset:position + self.search + frame - offset]
+            if len(template) == frame and len(region) >= frame:
+                best = low + int(np.argmax(np.correlate(region, template, 'valid')))
+            else:
+                best = position
+
+        segment = self._buffer[best - offset:best - offset + frame]
+        self._overlap[:len(segment)] += segment * self.window[:len(segment)]
+        output = self._overlap[:hop].copy()
+        self._overlap[:-hop] = self._overlap[hop:]
+        self._overlap[-hop:] = 0
+
+        self._previous = best
+        self._frames += 1
+
+        # Drop input no later frame can reach
+        keep = min(int(round(self._frames * self.analysis_hop)) - self.search,
+                   self._previous + hop)
+        if keep - offset > 4 * frame:
+            self._buffer = self._buffer[keep - offset:]
+            self._offset = keep
+        return output
+
+    def _emit(self, parts, limit=None) -> np.ndarray:
+        if not parts:
+            return np.zeros(0, dtype=np.int16)
+        output = np.concatenate(parts)
+        if limit is not None:
+            output = output[:max(0, limit - self._output_length)]
+        self._output_length += len(output)
+        return np.clip(np.round(output), -32768, 32767).astype(np.int16)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Consume an int16 block and return whatever output is finished"""
+        block = np.asarray(block)
+        self._input_length += len(block)
+        if self.speed == 1.0:
+            self._output_length += len(block)
+            return block.astype(np.int16, copy=False)
+
+        self._buffer = np.concatenate([self._buffer, block.astype(np.float32)])
+        parts = []
+        while self._frame_ready(False):
+            parts.append(self._next_frame())
+        return self._emit(parts)
+
+    def flush(self) -> np.ndarray:
+        """Return the remaining output once all input has been processed"""
+        if self.speed == 1.0:
+            return np.zeros(0, dtype=np.int16)
+
+        # Pad so every remaining frame and its search window is in range
+        self._buffer = np.concatenate([
+            self._buffer, np.zeros(2 * (self.frame + self.search) + self.hop, dtype=np.float32)])
+        parts = []
+        while self._frame_ready(True):
+            parts.append(self._next_frame())
+        parts.append(self._overlap[:self.hop].copy())
+        self._overlap[:] = 0
+        return self._emit(parts, limit=int(round(self._input_length / self.speed)))
+
+def stretch_blocks(blocks: Iterable[np.ndarray], speed: float, sample_rate: int) -> Iterator[np.ndarray]:
+    """Time-stretch a stream of int16 blocks, yielding output blocks"""
+    stretcher = WSOLAStretcher(speed, sample_rate)
+    for block in blocks:
+        output = stretcher.process(block)
+        if len(output):
+            yield output
+    tail = stretcher.flush()
+    if len(tail):
+        yield tail
+
+def time_stretch(samples: np.ndarray, speed: float, sample_rate: int,
+                 block_size: int = 65536) -> np.ndarray:
+    """Change the tempo of int16 samples by speed without changing pitch"""
+    if speed == 1.0:
+        return np.asarray(samples, dtype=np.int16)
+    blocks = (samples[i:i + block_size] for i in range(0, len(samples), block_size))
+    parts = list(stretch_blocks(blocks, speed, sample_rate))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
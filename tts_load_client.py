@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Load generator for the local Sinhala TTS server
+
+Sends requests to /phonemize or /synthesize from a pool of concurrent
+clients and reports throughput and latency percentiles, followed by the
+server's own /metrics. Uses only the standard library.
+
+Examples:
+    python tts_load_client.py --endpoint phonemize --requests 2000 --concurrency 64
+    python tts_load_client.py --endpoint synthesize --text-file prompts.txt --speed 1.2
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TEXTS = [
+    "ආයුබෝවන්",
+    "මගේ නම සුනිල්.",
+    "අද කාලගුණය හොඳයි.",
+    "ශ්‍රී ලංකාව ලස්සන රටකි.",
+    "ඔබට කොහොමද?"
+]
+
+def post_json(url, payload, timeout):
+    """POST a JSON body; return (status, response bytes)"""
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run_load(base_url, endpoint, texts, requests, concurrency, settings=None, timeout=60.0):
+    """Issue the requests and return a summary dict"""
+    url = f"{base_url.rstrip('/')}/{endpoint}"
+    rng = random.Random(0)
+    payloads = [dict(settings or {}, text=rng.choice(texts)) for _ in range(requests)]
+
+    def send(payload):
+        started = time.perf_counter()
+        try:
+            status, body = post_json(url, payload, timeout)
+        except OSError:
+            status, body = None, b''
+        return status, len(body), time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(send, payloads))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for status, _size, seconds in results if status == 200)
+    return {
+        'requests': requests,
+        'ok': len(latencies),
+        'errors': requests - len(latencies),
+        'seconds': elapsed,
+        'requests_per_s': requests / elapsed if elapsed else 0.0,
+        'mb_received': sum(size for _status, size, _seconds in results) / 1e6,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Load-test the local Sinhala TTS server.")
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help="server base URL")
+    parser.add_argument('--endpoint', choices=('phonemize', 'synthesize'), default='synthesize')
+    parser.add_argument('--requests', type=int, default=200, help="total requests (default: 200)")
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help="requests in flight at once (default: 16)")
+    parser.add_argument('--text-file', help="UTF-8 file with one prompt per line")
+    parser.add_argument('--speed', type=float, help="speed sent with /synthesize requests")
+    parser.add_argument('--sample-rate', type=int, help="sample rate sent with /synthesize requests")
+    args = parser.parse_args(argv)
+
+    texts = DEFAULT_TEXTS
+    if args.text_file:
+        with open(args.text_file, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+    settings = {}
+    if args.endpoint == 'synthesize':
+        if args.speed:
+            settings['speed'] = args.speed
+        if args.sample_rate:
+            settings['sample_rate'] = args.sample_rate
+
+    summary = run_load(args.url, args.endpoint, texts, args.requests, args.concurrency, settings)
+    print(f"{summary['ok']}/{summary['requests']} ok in {summary['seconds']:.2f}s | "
+          f"{summary['requests_per_s']:.1f} req/s, {summary['mb_received']:.2f} MB | "
+          f"p50 {summary['p50_ms']:.1f} ms, p90 {summary['p90_ms']:.1f} ms, "
+          f"p99 {summary['p99_ms']:.1f} ms")
+
+    try:
+        with urllib.request.urlopen(f"{args.url.rstrip('/')}/metrics", timeout=10) as response:
+            print(json.dumps(json.loads(response.read()), indent=2, ensure_ascii=False))
+    except OSError as e:
+        print(f"Could not read /metrics: {e}", file=sys.stderr)
+    return 0 if summary['errors'] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server for Sinhala phonemization and speech synthesis
+
+Endpoints:
+    POST /phonemize   {"text": "..."} or {"texts": [...]}  -> JSON phonemes
+    POST /synthesize  {"text": "...", "sample_rate": 16000, "word_pause": 0.3,
+                       "sentence_pause": 0.6, "speed": 1.0} -> audio/wav
+    GET  /metrics     request counts, latency percentiles, batch sizes
+
+GET requests take the same fields as query parameters. Concurrent
+requests are coalesced into batches and run on a pool of worker
+processes, each of which loads the phoneme bank once. /synthesize
+renders sentence-sized chunks on the workers and streams the WAV with
+chunked transfer encoding as they complete; only cache hits are sent
+whole. Only the standard library and NumPy are used; nothing is fetched
+from the network.
+
+Examples:
+    python tts_server.py --phonemes phonemes --port 8765
+    curl -d '{"text": "ආයුබෝවන්"}' http://127.0.0.1:8765/synthesize -o hello.wav
+    python tts_load_client.py --endpoint synthesize --requests 500 --concurrency 32
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import struct
+import argparse
+import threading
+import multiprocessing
+import multiprocessing.dummy
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from synthesis_engine import SynthesisEngine, SYNTHESIS_DEFAULTS
+from synthesis_cache import SynthesisCache
+from sinhala_text_to_phoneme import iter_text_chunks
+
+MAX_TEXT_LENGTH = 20000
+
+# Data size written in the header of a streamed WAV, whose length is not
+# known when the header is sent
+STREAM_DATA_SIZE = 0xFFFFFFFF - 36
+# Chunks of one streamed text queued for the workers at a time
+STREAM_READ_AHEAD = 2
+
+# Worker process state: one engine per worker, built by the pool initializer
+_worker_engine = None
+
+def _init_server_worker(phonemes_path: str, engine_options: Dict):
+    global _worker_engine
+    _worker_engine = SynthesisEngine(phonemes_path, **engine_options)
+    _worker_engine.bank.load_all()
+
+def _phonemize_batch(texts: List[str]) -> List:
+    return [_worker_engine.text_to_phonemes(text) for text in texts]
+
+def _synthesize_batch(requests: List) -> List:
+    """PCM bytes per (chunk, settings, follows) request; failures are returned, not raised"""
+    results = []
+    for chunk, settings, follows in requests:
+        try:
+            samples = _worker_engine.render_chunk(chunk, settings, follows)
+            results.append(np.ascontiguousarray(samples, dtype='<i2').tobytes())
+        except Exception as e:
+            results.append(e)
+    return results
+
+def wav_header(data_size: int, sample_rate: int) -> bytes:
+    """44-byte header of a mono 16-bit PCM WAV file"""
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16,
+                       1, 1, sample_rate, sample_rate * 2, 2, 16, b'data', data_size)
+
+class RequestBatcher:
+    """Coalesce concurrent requests into batches for a worker pool.
+
+    submit() queues one payload and returns a Future. A dispatcher thread
+    takes the first waiting payload, gathers whatever else arrives within
+    max_wait seconds (up to max_batch) and sends the batch to run_batch.
+    At most max_in_flight batches run at once, so requests that arrive
+    while every worker is busy wait in the queue and join a larger batch.
+    """
+
+    def __init__(self, run_batch: Callable, max_batch: int = 16, max_wait: float = 0.005,
+                 max_in_flight: int = 2, on_batch: Optional[Callable[[int], None]] = None):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload) -> Future:
+        if self._closed:
+            raise RuntimeError("batcher is closed")
+        future = Future()
+        self._queue.put((payload, future))
+        return future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._slots.acquire()
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            if self.on_batch:
+                self.on_batch(len(batch))
+            self._run(batch)
+
+    def _run(self, batch):
+        futures = [future for _payload, future in batch]
+
+        def done(results):
+            self._slots.release()
+            for future, result in zip(futures, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        def failed(error):
+            self._slots.release()
+            for future in futures:
+                future.set_exception(error)
+
+        try:
+            self.run_batch([payload for payload, _future in batch], done, failed)
+        except Exception as e:
+            failed(e)
+
+class LatencyStats:
+    """Request counts and latency percentiles over a sliding window"""
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+        self._batches = deque(maxlen=window)
+        self.window = window
+        self.started = time.time()
+
+    def record(self, endpoint: str, seconds: float, error: bool = False):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if error:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self._batches.append(size)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            endpoints = {}
+            for endpoint, latencies in self._latencies.items():
+                values = np.array(latencies) * 1000
+                p50, p90, p99 = np.percentile(values, [50, 90, 99])
+                endpoints[endpoint] = {
+                    'requests': self._counts[endpoint],
+                    'errors': self._errors.get(endpoint, 0),
+                    'latency_ms': {'p50': round(p50, 3), 'p90': round(p90, 3),
+                                   'p99': round(p99, 3), 'max': round(values.max(), 3)}
+                }
+            batches = list(self._batches)
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'endpoints': endpoints,
+            'batches': {'count': len(batches),
+                        'mean_size': round(sum(batches) / len(batches), 2) if batches else 0,
+                        'max_size': max(batches) if batches else 0}
+        }
+
+class TTSService:
+    """Batched phonemization and synthesis shared by all request threads"""
+
+    def __init__(self, phonemes_path: str = 'phonemes', workers: Optional[int] = None,
+                 max_batch: int = 16, batch_wait_ms: float = 5.0,
+                 cache_dir: Optional[str] = None, request_timeout: float = 30.0,
+                 **engine_options):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.stats = LatencyStats()
+        self.request_timeout = request_timeout
+        cache = SynthesisCache(cache_dir) if cache_dir else None
+        # Settings, cache keys, text chunking and the speed change happen in
+        # this process; clips are only decoded by the workers, so this
+        # engine pins none
+        self.engine = SynthesisEngine(phonemes_path, cache=cache, pin_clips=0, **engine_options)
+
+        # workers=0 runs batches on a thread in this process
+        pool_class = multiprocessing.Pool if workers > 0 else multiprocessing.dummy.Pool
+        self.pool = pool_class(max(1, workers), initializer=_init_server_worker,
+                               initargs=(phonemes_path, engine_options))
+        in_flight = 2 * max(1, workers)
+        self.phonemizer = RequestBatcher(self._runner(_phonemize_batch), max_batch,
+                                         batch_wait_ms / 1000, in_flight, self.stats.record_batch)
+        self.synthesizer = RequestBatcher(self._runner(_synthesize_batch), max_batch,
+                                          batch_wait_ms / 1000, in_flight, self.stats.record_batch)
+
+    def _runner(self, function):
+        def run(payloads, done, failed):
+            self.pool.apply_async(function, (payloads,), callback=done, error_callback=failed)
+        return run
+
+    def _result(self, future: Future):
+        try:
+            return future.result(self.request_timeout)
+        except FutureTimeout:
+            raise TimeoutError(f"no worker result within {self.request_timeout:g} s")
+
+    def phonemize(self, texts: List[str]) -> List[List[str]]:
+        futures = [self.phonemizer.submit(text) for text in texts]
+        return [self._result(future) for future in futures]
+
+    def cached_wav(self, text: str, settings: Dict) -> Optional[bytes]:
+        """WAV bytes for text from the cache, or None"""
+        cache = self.engine.cache
+        if cache is None:
+            return None
+        return cache.get(self.engine.cache_key(text, **settings))
+
+    def stream_wav(self, text: str, settings: Dict) -> Iterator[bytes]:
+        """A WAV header with an open-ended size, then PCM blocks as workers render them.
+
+        Chunks are queued STREAM_READ_AHEAD at a time, so the first block
+        is not held back by a batch of the text's later chunks. The header
+        follows the first chunk, so a failure there still gets an error
+        status. The whole file is cached after the last block.
+        """
+        settings = self.engine.settings(**settings)
+        chunks = enumerate(iter_text_chunks(text))
+        pending = deque()
+
+        def fill():
+            for index, chunk in chunks:
+                pending.append(self.synthesizer.submit((chunk, settings, index > 0)))
+                if len(pending) >= STREAM_READ_AHEAD:
+                    return
+
+        def rendered():
+            while pending:
+                pcm = self._result(pending.popleft())
+                fill()
+                yield np.frombuffer(pcm, dtype='<i2')
+
+        fill()
+        if pending:
+            self._result(pending[0])
+        yield wav_header(STREAM_DATA_SIZE, settings['sample_rate'])
+        cache = self.engine.cache
+        blocks = []
+        for samples in self.engine.stretch_blocks(rendered(), settings):
+            block = np.ascontiguousarray(samples, dtype='<i2').tobytes()
+            if cache is not None:
+                blocks.append(block)
+            yield block
+
+        if cache is not None:
+            pcm = b''.join(blocks)
+            try:
+                cache.put(self.engine.cache_key(text, **settings),
+                          wav_header(len(pcm), settings['sample_rate']) + pcm)
+            except OSError as e:
+                # A full or read-only cache must not fail the request
+                print(f"Synthesis cache error: {e}")
+
+    def metrics(self) -> Dict:
+        metrics = self.stats.snapshot()
+        metrics['queue'] = {'phonemize': self.phonemizer.pending(),
+                            'synthesize': self.synthesizer.pending()}
+        if self.engine.cache is not None:
+            metrics['cache'] = self.engine.cache.info()
+        return metrics
+
+    def close(self):
+        self.phonemizer.close()
+        self.synthesizer.close()
+        self.pool.terminate()
+        self.pool.join()
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class StreamAborted(Exception):
+    """A streamed response failed after its headers were sent"""
+
+class TTSRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's TTSService"""
+
+    server_version = "SinhalaTTS/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self._handle(url.path, params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            params = json.loads(body.decode('utf-8')) if body.strip() else {}
+            if not isinstance(params, dict):
+                raise ValueError("request body must be a JSON object")
+        except ValueError as e:
+            self._send_json(400, {'error': f"invalid JSON: {e}"})
+            return
+        self._handle(url.path, params)
+
+    def _handle(self, path, params):
+        service = self.server.service
+        routes = {'/phonemize': self._phonemize, '/synthesize': self._synthesize,
+                  '/metrics': lambda _params: self._send_json(200, service.metrics())}
+        path = path.rstrip('/') or '/'
+        route = routes.get(path)
+        if route is None:
+            self._send_json(404, {'error': f"unknown endpoint {path}"})
+            return
+
+        started = time.perf_counter()
+        error = False
+        try:
+            route(params)
+        except RequestError as e:
+            error = True
+            self._send_json(e.status, {'error': str(e)})
+        except TimeoutError as e:
+            error = True
+            self._send_json(504, {'error': str(e)})
+        except (BrokenPipeError, ConnectionResetError, StreamAborted):
+            error = True
+        except Exception as e:
+            error = True
+            self._send_json(500, {'error': str(e)})
+        if path != '/metrics':
+            service.stats.record(path, time.perf_counter() - started, error)
+
+    @staticmethod
+    def _text(value) -> str:
+        if not isinstance(value, str) or not value.strip():
+            raise RequestError(400, "text must be a non-empty string")
+        if len(value) > MAX_TEXT_LENGTH:
+            raise RequestError(413, f"text longer than {MAX_TEXT_LENGTH} characters")
+        return value
+
+    def _phonemize(self, params):
+        texts = params.get('texts')
+        single = texts is None
+        texts = [params.get('text')] if single else texts
+        if not isinstance(texts, list):
+            raise RequestError(400, "texts must be a list of strings")
+        separator = params.get('separator', '')
+        if not isinstance(separator, str):
+            raise RequestError(400, "separator must be a string")
+        results = self.server.service.phonemize([self._text(text) for text in texts])
+        strings = [separator.join(phonemes) for phonemes in results]
+        if single:
+            self._send_json(200, {'phonemes': results[0], 'phoneme_string': strings[0]})
+        else:
+            self._send_json(200, {'phonemes': results, 'phoneme_strings': strings})
+
+    def _synthesize(self, params):
+        text = self._text(params.get('text'))
+        settings = {}
+        for name in SYNTHESIS_DEFAULTS:
+            if params.get(name) is not None:
+                try:
+                    settings[name] = float(params[name])
+                except (TypeError, ValueError):
+                    raise RequestError(400, f"{name} must be a number")
+        service = self.server.service
+        try:
+            wav = service.cached_wav(text, settings)
+            if wav is None:
+                blocks = service.stream_wav(text, settings)
+                header = next(blocks)
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, str(e))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        if wav is not None:
+            self.send_header('Content-Length', str(len(wav)))
+            self.end_headers()
+            self.wfile.write(wav)
+            return
+
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            self._write_chunk(header)
+            for block in blocks:
+                self._write_chunk(block)
+        except (BrokenPipeError, ConnectionResetError):
+            blocks.close()
+            raise
+        except Exception as e:
+            # The status line is gone; closing without the last chunk tells
+            # the client that the body is incomplete
+            self.close_connection = True
+            self.log_error("synthesis failed mid-stream: %s", e)
+            raise StreamAborted(str(e))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b'%X\r\n%s\r\n' % (len(data), data))
+
+    def _send_json(self, status: int, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; the default of 5 drops bursts
+
+    def __init__(self, address, service: TTSService, verbose: bool = False):
+        super().__init__(address, TTSRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve Sinhala phonemization and synthesis over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument('--phonemes', default='phonemes',
+                        help="phonemes directory or packed bank file (default: phonemes)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument('--max-batch', type=int, default=16,
+                        help="most requests coalesced into one batch (default: 16)")
+    parser.add_argument('--batch-wait-ms', type=float, default=5.0,
+                        help="how long a batch waits for more requests (default: 5)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="directory for cached WAV renders (default: no cache)")
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help="seconds to wait for a worker before answering 504 (default: 30)")
+    parser.add_argument('--crossfade-ms', type=float, default=8.0,
+                        help="crossfade between phoneme clips (default: 8)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    return parser
+
+def main(argv=None):
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    service = TTSService(args.phonemes, args.workers, args.max_batch, args.batch_wait_ms,
+                         args.cache_dir, args.timeout, crossfade_ms=args.crossfade_ms)
+    server = TTSServer((args.host, args.port), service, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving Sinhala TTS on http://{host}:{port} "
+          f"({len(service.engine.bank)} phonemes)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+HAL_KIRIMA = '්'
+
+def consonant_cluster(token: str, consonants) -> Optional[str]:
+    """The consonant + hal kirima + consonant cluster a token starts with, if any"""
+    if (len(token) >= 3 and token[1] == HAL_KIRIMA and
+            token[0] in consonants and token[2] in consonants):
+        return token[:3]
+    return None
+
+class WordCounter:
+    """Mergeable frequency counters filled from a stream of words.
+
+    Words are batched by distinct word, up to batch_words of them, and
+    count_word() sees each distinct word once per batch with its number
+    of occurrences, so each is converted once per batch. Memory therefore
+    depends on the batch and vocabulary sizes, never on the length of the
+    input. Counters of separate parts of a corpus combine exactly with
+    merge(), which also sums the integer attributes named in totals.
+
+    Subclasses name their counters in kinds and implement count_word().
+    """
+
+    kinds: Tuple[str, ...] = ()
+    totals: Tuple[str, ...] = ('words',)
+
+    def __init__(self, batch_words: int):
+        self.batch_words = batch_words
+        self.counts: Dict[str, Counter] = {kind: Counter() for kind in self.kinds}
+        for name in self.totals:
+            setattr(self, name, 0)
+        self._pending = Counter()
+
+    def add_words(self, words: Iterable[str], converter):
+        """Count a stream of words"""
+        pending = self._pending
+        for word in words:
+            pending[word] += 1
+            if len(pending) >= self.batch_words:
+                self.flush(converter)
+        self.flush(converter)
+
+    def count_word(self, word: str, count: int, converter):
+        """Add count occurrences of word to the counters"""
+        raise NotImplementedError
+
+    def flush(self, converter):
+        """Count the words batched so far"""
+        for word, count in self._pending.items():
+            self.count_word(word, count, converter)
+        self._pending.clear()
+
+    def merge(self, other: 'WordCounter', sign: int = 1) -> 'WordCounter':
+        """Add another part's counts (or remove them with sign=-1)"""
+        for kind in self.kinds:
+            total = self.counts[kind]
+            for key, count in other.counts[kind].items():
+                value = total[key] + sign * count
+                if value:
+                    total[key] = value
+                else:
+                    del total[key]
+        for name in self.totals:
+            setattr(self, name, getattr(self, name) + sign * getattr(other, name))
+        return self